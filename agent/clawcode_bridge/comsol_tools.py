@@ -102,6 +102,8 @@ _ACTION_SCHEMAS: Dict[str, Dict[str, Any]] = {
             "file_path": {"type": "string"},
             "geom_tag": {"type": "string"},
             "feature_tag": {"type": "string"},
+            "decimate_target": {"type": "integer"},
+            "parts": {"type": "array", "items": {"type": "string"}},
         },
         "required": ["file_path"],
     },
@@ -3,8 +3,9 @@
 import os
 import platform
 import shutil
+import threading
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
 from agent.utils.config import get_project_root, get_settings
 from agent.utils.java_runtime import ensure_bundled_java
@@ -29,6 +30,37 @@ def _jpype():
         ) from e
 
 
+MODEL_UTIL_CLASS = "com.comsol.model.util.ModelUtil"
+
+# JPype 在 Python 每次 GC 时回调触发 Java GC；只转发每第 N 次回收，避免纯 Python 代码被拖慢
+_JPYPE_GC_HOOK_EVERY = 64
+
+
+def _throttle_jpype_gc_hook(every: int = _JPYPE_GC_HOOK_EVERY) -> bool:
+    """把 gc.callbacks 中 JPype 的 _collect 回调替换为节流版本；找不到回调时不做任何事。"""
+    import gc
+
+    try:
+        import _jpype  # type: ignore[import-not-found]
+    except ImportError:
+        return False
+    collect = getattr(_jpype, "_collect", None)
+    if collect is None or collect not in gc.callbacks:
+        return False
+    state = {"count": 0, "forward": False}
+
+    def _throttled_collect(phase, info):
+        # start/stop 成对转发，保证 JPype 看到完整的一次回收
+        if phase == "start":
+            state["count"] += 1
+            state["forward"] = state["count"] % every == 0
+        if state["forward"]:
+            collect(phase, info)
+
+    gc.callbacks[gc.callbacks.index(collect)] = _throttled_collect
+    return True
+
+
 def _resolve_comsol_native_path(settings) -> Optional[str]:
     if getattr(settings, "comsol_native_path", None) and Path(settings.comsol_native_path).exists():
         return str(Path(settings.comsol_native_path).resolve())
@@ -96,10 +128,85 @@ def _build_classpath(jar_path: str) -> str:
     return str(path)
 
 
+# JArray(JInt) 类型，首次转换实体编号时解析
+_JIntArray = None
+
+
+def _jint_array(values):
+    """把实体/域编号一次性转换为 Java int[]，避免 JPype 逐个装箱 Integer。
+    已安装 numpy 时走 int32 缓冲区整块拷贝；jpype 不可用时原样返回列表。"""
+    global _JIntArray
+    try:
+        if _JIntArray is None:
+            jp = _jpype()
+            _JIntArray = jp.JArray(jp.JInt)
+    except Exception:
+        return list(values)
+    try:
+        import numpy as np
+
+        return _JIntArray(np.ascontiguousarray(values, dtype=np.int32))
+    except ImportError:
+        return _JIntArray(list(values))
+
+
+# JArray(JDouble) 类型，首次写入数值数组属性时解析
+_JDoubleArray = None
+
+
+def _jdouble_array(values):
+    """把数值序列一次性转换为 Java double[]（numpy 可用时走 float64 缓冲区）；jpype 不可用时返回列表。"""
+    global _JDoubleArray
+    try:
+        if _JDoubleArray is None:
+            jp = _jpype()
+            _JDoubleArray = jp.JArray(jp.JDouble)
+    except Exception:
+        return list(values)
+    try:
+        import numpy as np
+
+        return _JDoubleArray(np.ascontiguousarray(values, dtype=np.float64))
+    except ImportError:
+        return _JDoubleArray([float(v) for v in values])
+
+
+def _java_value(value):
+    """set(key, value) 前的值转换：纯数值列表/元组预先包装为 int[] / double[]，
+    让 JPype 走数组整块拷贝而非逐元素序列转换；其他值原样返回。"""
+    if not isinstance(value, (list, tuple)) or not value:
+        return value
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value):
+        return value
+    if all(isinstance(v, int) for v in value):
+        return _jint_array(value)
+    return _jdouble_array(value)
+
+
+# JArray(JString) 类型，首次批量复制材料属性时解析
+_JStringArray = None
+
+
+def _jstring_array(values):
+    """把字符串序列一次性转换为 Java String[]；jpype 不可用时原样返回列表。"""
+    global _JStringArray
+    try:
+        if _JStringArray is None:
+            jp = _jpype()
+            _JStringArray = jp.JArray(jp.JString)
+    except Exception:
+        return list(values)
+    return _JStringArray(list(values))
+
+
 class COMSOLRunner:
     """COMSOL Java API 运行器"""
 
     _jvm_started = False
+    # 多个控制器/线程首次调用时只允许一个去启动 JVM，其余等待并复用
+    _jvm_lock = threading.Lock()
+    # 已解析的 Java 类（类名 -> JClass），进程内共享，避免重复走 JPype 类型查找
+    _java_classes: Dict[str, Any] = {}
 
     def __init__(self):
         self._ensure_jvm_started()
@@ -109,7 +216,12 @@ class COMSOLRunner:
     def _ensure_jvm_started(cls):
         if cls._jvm_started:
             return
+        with cls._jvm_lock:
+            if not cls._jvm_started:
+                cls._start_jvm()
 
+    @classmethod
+    def _start_jvm(cls):
         logger.info("启动 JVM...")
         settings = get_settings()
         if not settings.comsol_jar_path:
@@ -119,7 +231,7 @@ class COMSOLRunner:
         comsol_jvm = _get_comsol_jvm_path(settings)
         if comsol_jvm:
             java_home = str(Path(comsol_jvm).resolve().parent.parent.parent)
-            logger.info("使用 COMSOL 自带 JRE: %s", java_home)
+            logger.info("使用 COMSOL 自带 JRE: {}", java_home)
         else:
             java_home = ensure_bundled_java()
         os.environ["JAVA_HOME"] = java_home
@@ -132,7 +244,7 @@ class COMSOLRunner:
             old_path = os.environ.get("PATH", "")
             if native_path not in old_path:
                 os.environ["PATH"] = native_path + path_sep + old_path
-            logger.info("COMSOL 本地库路径: %s", native_path)
+            logger.info("COMSOL 本地库路径: {}", native_path)
         if comsol_jvm:
             jre_bin = Path(comsol_jvm).resolve().parent.parent
             if jre_bin.exists():
@@ -143,26 +255,32 @@ class COMSOLRunner:
             jpype = _jpype()
             jvm_path = comsol_jvm if comsol_jvm else jpype.getDefaultJVMPath()
             jpype.startJVM(jvm_path, *jvm_args)
+            if _throttle_jpype_gc_hook():
+                logger.debug("JPype GC 回调已节流为每 {} 次回收转发一次", _JPYPE_GC_HOOK_EVERY)
             # 使用 JClass 加载，避免 "No module named 'com'"（com 为 Java 包，非 Python 模块）
-            ModelUtil = jpype.JClass("com.comsol.model.util.ModelUtil")
+            ModelUtil = jpype.JClass(MODEL_UTIL_CLASS)
+            # 登记到共享类表，create_model / JavaAPIController 直接复用，不再重复查找
+            cls._java_classes[MODEL_UTIL_CLASS] = ModelUtil
             ModelUtil.initStandalone(False)
             logger.info("JVM 启动成功，COMSOL API 已加载")
             cls._jvm_started = True
         except RuntimeError:
             raise
         except Exception as e:
-            logger.error(f"加载 COMSOL API 失败: {e}")
+            logger.error("加载 COMSOL API 失败: {}", e)
             raise RuntimeError(f"无法加载 COMSOL API: {e}") from e
 
     def create_model(self, model_name: str):
-        jpype = _jpype()
-        ModelUtil = jpype.JClass("com.comsol.model.util.ModelUtil")
-        logger.info(f"创建模型: {model_name}")
+        ModelUtil = self.get_java_class(MODEL_UTIL_CLASS)
+        logger.info("创建模型: {}", model_name)
         return ModelUtil.create(model_name)
 
     def get_java_class(self, class_name: str):
-        jpype = _jpype()
-        return jpype.JClass(class_name)
+        java_class = self._java_classes.get(class_name)
+        if java_class is None:
+            java_class = _jpype().JClass(class_name)
+            self._java_classes[class_name] = java_class
+        return java_class
 
     def invoke_static_api(self, class_name: str, method_name: str, *args: Any):
         java_class = self.get_java_class(class_name)
@@ -179,45 +297,55 @@ class COMSOLRunner:
 
     # ===== 2D Shapes =====
 
-    def create_rectangle(self, model, shape: GeometryShape, name: Optional[str] = None) -> None:
+    def create_rectangle(
+        self, model, shape: GeometryShape, name: Optional[str] = None, geom=None
+    ) -> None:
         name = name or shape.name or "rect1"
         w, h = shape.parameters["width"], shape.parameters["height"]
         x, y = shape.position.get("x", 0.0), shape.position.get("y", 0.0)
-        geom = self._geom(model)
+        geom = self._geom(model) if geom is None else geom
         feat = geom.create(name, "Rectangle")
         feat.set("size", [w, h])
         feat.set("pos", [x, y])
 
-    def create_circle(self, model, shape: GeometryShape, name: Optional[str] = None) -> None:
+    def create_circle(
+        self, model, shape: GeometryShape, name: Optional[str] = None, geom=None
+    ) -> None:
         name = name or shape.name or "circ1"
         r = shape.parameters["radius"]
         x, y = shape.position.get("x", 0.0), shape.position.get("y", 0.0)
-        geom = self._geom(model)
+        geom = self._geom(model) if geom is None else geom
         feat = geom.create(name, "Circle")
         feat.set("r", r)
         feat.set("pos", [x, y])
 
-    def create_ellipse(self, model, shape: GeometryShape, name: Optional[str] = None) -> None:
+    def create_ellipse(
+        self, model, shape: GeometryShape, name: Optional[str] = None, geom=None
+    ) -> None:
         name = name or shape.name or "ell1"
         a, b = shape.parameters["a"], shape.parameters["b"]
         x, y = shape.position.get("x", 0.0), shape.position.get("y", 0.0)
-        geom = self._geom(model)
+        geom = self._geom(model) if geom is None else geom
         feat = geom.create(name, "Ellipse")
         feat.set("a", a)
         feat.set("b", b)
         feat.set("pos", [x, y])
 
-    def create_polygon(self, model, shape: GeometryShape, name: Optional[str] = None) -> None:
+    def create_polygon(
+        self, model, shape: GeometryShape, name: Optional[str] = None, geom=None
+    ) -> None:
         name = name or shape.name or "poly1"
         xs, ys = shape.parameters["x"], shape.parameters["y"]
-        geom = self._geom(model)
+        geom = self._geom(model) if geom is None else geom
         feat = geom.create(name, "Polygon")
-        feat.set("x", xs)
-        feat.set("y", ys)
+        feat.set("x", _java_value(xs))
+        feat.set("y", _java_value(ys))
 
     # ===== 3D Shapes =====
 
-    def create_block(self, model, shape: GeometryShape, name: Optional[str] = None) -> None:
+    def create_block(
+        self, model, shape: GeometryShape, name: Optional[str] = None, geom=None
+    ) -> None:
         name = name or shape.name or "blk1"
         w = shape.parameters["width"]
         h = shape.parameters["height"]
@@ -227,12 +355,14 @@ class COMSOLRunner:
             shape.position.get("y", 0.0),
             shape.position.get("z", 0.0),
         )
-        geom = self._geom(model)
+        geom = self._geom(model) if geom is None else geom
         feat = geom.create(name, "Block")
         feat.set("size", [w, d, h])
         feat.set("pos", [x, y, z])
 
-    def create_cylinder(self, model, shape: GeometryShape, name: Optional[str] = None) -> None:
+    def create_cylinder(
+        self, model, shape: GeometryShape, name: Optional[str] = None, geom=None
+    ) -> None:
         name = name or shape.name or "cyl1"
         r, h = shape.parameters["radius"], shape.parameters["height"]
         x, y, z = (
@@ -240,13 +370,15 @@ class COMSOLRunner:
             shape.position.get("y", 0.0),
             shape.position.get("z", 0.0),
         )
-        geom = self._geom(model)
+        geom = self._geom(model) if geom is None else geom
         feat = geom.create(name, "Cylinder")
         feat.set("r", r)
         feat.set("h", h)
         feat.set("pos", [x, y, z])
 
-    def create_sphere(self, model, shape: GeometryShape, name: Optional[str] = None) -> None:
+    def create_sphere(
+        self, model, shape: GeometryShape, name: Optional[str] = None, geom=None
+    ) -> None:
         name = name or shape.name or "sph1"
         r = shape.parameters["radius"]
         x, y, z = (
@@ -254,12 +386,14 @@ class COMSOLRunner:
             shape.position.get("y", 0.0),
             shape.position.get("z", 0.0),
         )
-        geom = self._geom(model)
+        geom = self._geom(model) if geom is None else geom
         feat = geom.create(name, "Sphere")
         feat.set("r", r)
         feat.set("pos", [x, y, z])
 
-    def create_cone(self, model, shape: GeometryShape, name: Optional[str] = None) -> None:
+    def create_cone(
+        self, model, shape: GeometryShape, name: Optional[str] = None, geom=None
+    ) -> None:
         name = name or shape.name or "cone1"
         rb = shape.parameters["radius_bottom"]
         rt = shape.parameters.get("radius_top", 0.0)
@@ -269,14 +403,16 @@ class COMSOLRunner:
             shape.position.get("y", 0.0),
             shape.position.get("z", 0.0),
         )
-        geom = self._geom(model)
+        geom = self._geom(model) if geom is None else geom
         feat = geom.create(name, "Cone")
         feat.set("r", rb)
         feat.set("rtop", rt)
         feat.set("h", h)
         feat.set("pos", [x, y, z])
 
-    def create_torus(self, model, shape: GeometryShape, name: Optional[str] = None) -> None:
+    def create_torus(
+        self, model, shape: GeometryShape, name: Optional[str] = None, geom=None
+    ) -> None:
         name = name or shape.name or "tor1"
         rmaj = shape.parameters["radius_major"]
         rmin = shape.parameters["radius_minor"]
@@ -285,7 +421,7 @@ class COMSOLRunner:
             shape.position.get("y", 0.0),
             shape.position.get("z", 0.0),
         )
-        geom = self._geom(model)
+        geom = self._geom(model) if geom is None else geom
         feat = geom.create(name, "Torus")
         feat.set("rmaj", rmaj)
         feat.set("rmin", rmin)
@@ -305,11 +441,12 @@ class COMSOLRunner:
         "torus": "create_torus",
     }
 
-    def create_shape(self, model, shape: GeometryShape, index: int = 1) -> None:
+    def create_shape(self, model, shape: GeometryShape, index: int = 1, geom=None) -> None:
+        """按形状类型创建几何特征；geom 为已取得的几何序列句柄时直接使用，不再逐个形状查找 comp1/geom1。"""
         creator_name = self._SHAPE_CREATORS.get(shape.type)
         if not creator_name:
             raise ValueError(f"不支持的形状类型: {shape.type}")
-        getattr(self, creator_name)(model, shape)
+        getattr(self, creator_name)(model, shape, geom=geom)
 
     @staticmethod
     def _seq_has(seq, name: str) -> bool:
@@ -326,7 +463,7 @@ class COMSOLRunner:
                 try:
                     n = getattr(seq, attr)()
                     if n is not None:
-                        return name in [str(x) for x in n]
+                        return any(str(x) == name for x in n)
                 except Exception:
                     pass
         return False
@@ -342,7 +479,7 @@ class COMSOLRunner:
         return model.geom(geom_name)
 
     def build_geometry(self, model, geom_name: str = "geom1") -> None:
-        logger.info(f"构建几何: {geom_name}")
+        logger.info("构建几何: {}", geom_name)
         geom = self._geom(model, geom_name)
         geom.run()
 
@@ -350,7 +487,7 @@ class COMSOLRunner:
         output_path = Path(output_path).resolve()
         output_path.parent.mkdir(parents=True, exist_ok=True)
         save_path_str = output_path.as_posix()
-        logger.info(f"保存模型到: {output_path}")
+        logger.info("保存模型到: {}", output_path)
         model.save(save_path_str)
 
         if not output_path.exists():
@@ -362,9 +499,9 @@ class COMSOLRunner:
             if project_copy.resolve() != output_path.resolve():
                 project_models.mkdir(parents=True, exist_ok=True)
                 shutil.copy2(output_path, project_copy)
-                logger.info(f"已同步保存到项目目录: {project_copy}")
+                logger.info("已同步保存到项目目录: {}", project_copy)
 
-        logger.info(f"模型已成功保存: {output_path}")
+        logger.info("模型已成功保存: {}", output_path)
         return output_path
 
     def create_model_from_plan(
@@ -375,16 +512,19 @@ class COMSOLRunner:
     ) -> Path:
         safe_name = (plan.model_name or "model").replace(" ", "_").strip() or "model"
         dimension = plan.dimension
-        logger.info(f"根据计划创建 {dimension}D 模型: {safe_name}")
+        logger.info("根据计划创建 {}D 模型: {}", dimension, safe_name)
 
         model = self.create_model(safe_name)
         model.component().create("comp1")
-        model.component("comp1").geom().create("geom1", dimension)
+        # create() 返回的几何序列句柄供所有形状复用
+        geom = model.component("comp1").geom().create("geom1", dimension)
+        if geom is None:
+            geom = self._geom(model)
 
         for i, shape in enumerate(plan.shapes, 1):
             if not shape.name:
                 shape.name = f"{shape.type}{i}"
-            self.create_shape(model, shape, i)
+            self.create_shape(model, shape, i, geom=geom)
 
         self.build_geometry(model, "geom1")
 
@@ -1,19 +1,35 @@
 """Java API 控制器 - 混合模式控制 Java API 调用（支持材料、3D、扩展物理场）"""
 
-import base64
+import asyncio
+import atexit
+import hashlib
 import importlib.util
+import os
 import re
-import shutil
+import sys
 import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache, wraps
 from html import unescape
 from pathlib import Path
-from types import MethodType
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType, MethodType
+from typing import Any, Dict, List, Optional, Tuple
 from urllib.request import Request, urlopen
 from uuid import uuid4
 
-from agent.executor.comsol_runner import COMSOLRunner
+from agent.executor.comsol_runner import (
+    MODEL_UTIL_CLASS,
+    COMSOLRunner,
+    _java_value,
+    _jint_array,
+    _jstring_array,
+)
+from agent.executor.step_fragment import extract_step_parts
 from agent.utils.config import get_settings
 from agent.utils.logger import get_logger
 from agent.schemas.material import MaterialDefinition, MaterialPlan
@@ -39,72 +55,577 @@ def _jpype():
         ) from e
 
 
-PHYSICS_TYPE_TO_COMSOL_TAG = {
-    "heat": "HeatTransfer",
-    "electromagnetic": "ElectromagneticWaves",
-    "structural": "SolidMechanics",
-    "fluid": "SinglePhaseFlow",
-    "acoustics": "Acoustics",
-    "piezoelectric": "Piezoelectric",
-    "chemical": "ChemicalSpeciesTransport",
-    "multibody": "MultibodyDynamics",
-}
-
-STUDY_TYPE_TO_COMSOL_TAG = {
-    "stationary": "Stationary",
-    "time_dependent": "Time",
-    "eigenvalue": "Eigenvalue",
-    "frequency": "Frequency",
-    "parametric": "Parametric",
-}
-
-COUPLING_TYPE_TO_COMSOL_TAG = {
-    "thermal_stress": "ThermalExpansion",
-    "fluid_structure": "FluidStructureInteraction",
-    "electromagnetic_heat": "ElectromagneticHeat",
-}
+try:  # 可选：pybase64 走 SIMD 编码，预览图等大块数据比标准库快数倍
+    from pybase64 import b64encode as _b64encode
+except ImportError:
+    from binascii import b2a_base64
+
+    def _b64encode(data: bytes) -> bytes:
+        """无 pybase64 时直接调用 binascii（不换行），省去 base64.b64encode 的包装层。"""
+        return b2a_base64(data, newline=False)
+
+# JVM 启动后首次解析的 ModelUtil 类，进程内复用，避免每次加载模型都走 JClass 查找
+_ModelUtil = None
+
+
+def _get_model_util():
+    """返回缓存的 com.comsol.model.util.ModelUtil；首次调用时确保 JVM 已启动。"""
+    global _ModelUtil
+    if _ModelUtil is None:
+        COMSOLRunner._ensure_jvm_started()
+        # 启动 JVM 时已登记的类直接复用；否则用 JClass 加载，避免 "No module named 'com'"
+        _ModelUtil = COMSOLRunner._java_classes.get(MODEL_UTIL_CLASS)
+        if _ModelUtil is None:
+            _ModelUtil = _jpype().JClass(MODEL_UTIL_CLASS)
+    return _ModelUtil
+
+
+def _bulk_set(feat, values: Dict[str, Any]) -> bool:
+    """尝试用 set(String[], String[]) 一次写入多个参数，减少 JNI 往返；成功返回 True。
+    值含列表等非标量时不尝试；该重载不存在（TypeError）时按节点类型记入 _CAPS，之后同类型不再尝试；
+    其他失败（如某个参数名无效）返回 False，由调用方逐个 set 以定位具体参数。"""
+    if not values or not all(isinstance(v, (str, int, float)) for v in values.values()):
+        return False
+    key = (type(feat), "set(String[],String[])")
+    if not _CAPS.get(key, True):
+        return False
+    try:
+        feat.set(
+            _jstring_array(values.keys()),
+            _jstring_array(str(v) for v in values.values()),
+        )
+    except TypeError:
+        _CAPS[key] = False
+        return False
+    except Exception:
+        return False
+    _CAPS[key] = True
+    return True
+
+
+def _set_params_lenient(feat, values: Dict[str, Any]) -> None:
+    """写入可选参数（kwargs 透传等），无效参数忽略。节点支持 properties() 时先一次取出合法参数名，
+    过滤掉未知键再批量写入，避免为每个无效键构造 Java 异常；逐个写入时单个失败仍忽略。"""
+    if not values:
+        return
+    if _has_cap(feat, "properties"):
+        try:
+            known = set(_java_strings(feat.properties()))
+            if known:
+                values = {k: v for k, v in values.items() if k in known}
+        except Exception:
+            pass
+    if _bulk_set(feat, values):
+        return
+    for k, v in values.items():
+        try:
+            feat.set(k, v)
+        except Exception:
+            pass
+
+
+class _UnsupportedApi(RuntimeError):
+    """当前 COMSOL 版本缺少所需接口。_do_* 在修改模型前检查并抛出，模型未被改动，调用方无需丢弃缓存。"""
+
+
+def _brief_error(exc: BaseException) -> str:
+    """异常消息的首个非空行。Java 异常的 str() 常附整段堆栈，返回给调用方/RPC 时只保留摘要。"""
+    for line in str(exc).splitlines():
+        if line.strip():
+            return line.strip()
+    return type(exc).__name__
+
+
+def _param_unchanged(param, name: str, value: Any) -> bool:
+    """全局参数的当前表达式是否已等于 value（按字符串比较，忽略首尾空白）；无法读取时视为已变化。"""
+    if not _has_cap(param, "get"):
+        return False
+    try:
+        current = param.get(name)
+    except Exception:
+        return False
+    return current is not None and str(current).strip() == str(value).strip()
+
+
+def _next_tag(existing, prefix: str) -> str:
+    """按已有 tag 中 prefix+N 的最大编号生成下一个 tag（imp1、imp2 ...），一次扫描、不逐个 has() 试探。"""
+    pattern = re.compile(rf"{re.escape(prefix)}(\d+)")
+    last = max(
+        (int(m.group(1)) for m in map(pattern.fullmatch, existing) if m is not None),
+        default=0,
+    )
+    return f"{prefix}{last + 1}"
+
+
+# java.lang.String 类，首次批量转换 String[] 时解析
+_JavaString = None
+
+
+def _java_strings(values) -> List[str]:
+    """把 COMSOL 返回的 String[] 转为 Python 列表。Java 数组先在 JVM 内 String.join 成一个字符串，
+    整体过一次 JNI 再在 Python 侧拆分，不再逐个元素取值（节点 tag 不含换行）；其他序列逐个 str()。"""
+    global _JavaString
+    try:
+        jp = _jpype()
+        if isinstance(values, jp.JArray):
+            if len(values) == 0:
+                return []
+            if _JavaString is None:
+                _JavaString = jp.JClass("java.lang.String")
+            return str(_JavaString.join("\n", values)).split("\n")
+    except Exception:
+        pass
+    return [str(x) for x in values]
+
+
+# 已加载模型缓存：绝对路径 -> ((st_mtime_ns, st_size), 模型 tag, 模型对象)。
+# 文件未被外部修改时直接复用 JVM 内的模型，避免每次调用都 ModelUtil.load 整个 .mph。
+_MODEL_CACHE: "OrderedDict[str, Tuple[Tuple[int, int], str, Any]]" = OrderedDict()
+_MODEL_CACHE_MAX = 8
+
+# 模型缓存及其派生缓存（_MODEL_TAGS、_GEOM_READY、_QUERY_CACHE 等）的进程级锁。后台网格线程、
+# 延迟保存定时器与 AsyncJavaAPIController 的工作线程都会更新这些 OrderedDict；可重入，
+# 便于缓存辅助函数互相调用
+_CACHE_LOCK = threading.RLock()
+
+# (模型绝对路径, 文件时间戳, 宽, 高) -> (图像字节, MIME, sha256)；文件保存后时间戳变化即自然失效
+_PREVIEW_CACHE: "OrderedDict[Tuple[str, Any, int, int], Tuple[bytes, str, str]]" = OrderedDict()
+_PREVIEW_CACHE_MAX = 8
+
+
+def _file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+# 模型路径 -> 已通过容器检查时的文件时间戳；同一版本文件只读一次头尾
+_MPH_CHECKED: Dict[str, Tuple[int, int]] = {}
+# ZIP 结尾目录记录（EOCD）最多带 64KB 注释，只需读文件末尾这么多字节
+_ZIP_EOCD_SCAN = 22 + 0xFFFF
+
+
+def _mph_container_ok(path: Path, stamp: Tuple[int, int]) -> bool:
+    """.mph 为 ZIP 容器：检查开头的 "PK" 与末尾的结尾目录记录，识别保存中途被截断的文件。
+    结果按 (mtime_ns, size) 缓存，文件未变化时不再读盘。"""
+    key = str(path)
+    if _MPH_CHECKED.get(key) == stamp:
+        return True
+    try:
+        with open(path, "rb") as f:
+            head = f.read(2)
+            f.seek(max(0, stamp[1] - _ZIP_EOCD_SCAN))
+            tail = f.read()
+    except OSError:
+        return False
+    ok = head == b"PK" and b"PK\x05\x06" in tail
+    if ok:
+        _MPH_CHECKED[key] = stamp
+    return ok
+
+
+def _cached_model(path: Path, readonly: bool = False):
+    """返回与磁盘文件一致的缓存模型；文件已变化或不存在时丢弃条目并返回 None。
+    readonly=True 时若时间戳不一致是因为该路径正在保存，直接返回正在写出的内存模型，
+    不丢弃条目、不 ModelUtil.remove、不改 tag。"""
+    key = str(path)
+    with _CACHE_LOCK:
+        entry = _MODEL_CACHE.get(key)
+        if entry is None:
+            return None
+        if readonly and _save_in_progress(key):
+            _MODEL_CACHE.move_to_end(key)
+            return entry[2]
+        if key not in _MODEL_PINS and _file_stamp(path) != entry[0]:
+            del _MODEL_CACHE[key]
+            _forget_model_state(entry[2])
+            _release_unless_reused(key, entry[1])
+            return None
+        _MODEL_CACHE.move_to_end(key)
+        return entry[2]
+
+
+# 各路径在 JVM 中的模型 tag：绝对路径 -> tag，首次加载时确定，之后不随缓存内容变化
+_MODEL_TAGS: Dict[str, str] = {}
+
+
+def _model_tag(path: Path) -> str:
+    """path 在 JVM 中的模型 tag：同一路径始终使用同一 tag，重载时 COMSOL 原地替换旧模型；
+    文件名已被其他路径占用（不同目录下的同名文件）时追加路径摘要，避免互相替换、来回重载。"""
+    key = str(path)
+    with _CACHE_LOCK:
+        tag = _MODEL_TAGS.get(key)
+        if tag is None:
+            base = path.stem or "model"
+            if base in _MODEL_TAGS.values():
+                tag = f"{base}_{zlib.crc32(key.encode('utf-8')):08x}"
+            else:
+                tag = base
+            _MODEL_TAGS[key] = tag
+        return tag
+
+
+def _release_model(tag: str) -> None:
+    """从 JVM 中移除 tag 对应的模型（ModelUtil 尚未解析时无模型可移除）。"""
+    if _ModelUtil is not None:
+        try:
+            _ModelUtil.remove(tag)
+        except Exception as e:
+            logger.debug("释放缓存模型 {} 失败: {}", tag, e)
+
+
+def _release_unless_reused(key: str, tag: str) -> None:
+    """丢弃 key 的缓存条目后：tag 就是该路径重载时要用的 tag 则留给 ModelUtil.load 原地替换；
+    否则（如另存后挂在新路径下的模型）不会再被替换，立即从 JVM 中移除，避免常驻。"""
+    if tag != _MODEL_TAGS.get(key):
+        _release_model(tag)
+
+
+def _cache_model(path: Path, tag: str, model) -> None:
+    """记录 path 对应的已加载模型；超出容量时淘汰最久未用的模型并从 JVM 中移除。"""
+    stamp = _file_stamp(path)
+    if stamp is None:
+        return
+    key = str(path)
+    evicted = []
+    with _CACHE_LOCK:
+        # 同一模型对象只对应一个文件；ModelUtil.load 同 tag 会替换旧模型，旧条目一并移除
+        for other, (_, other_tag, other_model) in list(_MODEL_CACHE.items()):
+            if other != key and (other_model is model or other_tag == tag):
+                del _MODEL_CACHE[other]
+                if other_model is not model:
+                    _forget_model_state(other_model)
+        previous = _MODEL_CACHE.get(key)
+        if previous is not None and previous[2] is not model:
+            _forget_model_state(previous[2])
+            if previous[1] != tag:
+                _release_model(previous[1])
+        _MODEL_CACHE[key] = (stamp, tag, model)
+        _MODEL_CACHE.move_to_end(key)
+        while len(_MODEL_CACHE) > _MODEL_CACHE_MAX:
+            # 跳过后台任务正在使用的模型；全部被占用时暂时超出容量
+            old_key = next((k for k in _MODEL_CACHE if k not in _MODEL_PINS), None)
+            if old_key is None:
+                break
+            _, old_tag, old_model = _MODEL_CACHE.pop(old_key)
+            # 同时丢掉按模型/路径挂着的派生缓存，不再持有 Java 代理，模型才能在 JVM 中真正释放
+            _forget_model_state(old_model)
+            _drop_cached_queries(old_key)
+            del old_model
+            evicted.append((old_key, old_tag))
+    # 延迟保存在锁外写出再释放：写出线程持有保存锁时会等待 _CACHE_LOCK，锁内写出可能互相等待
+    for old_key, old_tag in evicted:
+        flush_pending_saves(old_key)
+        _release_model(old_tag)
+
+
+def _remember_saved_model(model, dest_path: Path) -> None:
+    """模型保存后内存与 dest_path 一致：把缓存条目改挂到 dest_path 并刷新时间戳。"""
+    with _CACHE_LOCK:
+        _drop_cached_queries(str(dest_path))
+        for _, tag, cached in _MODEL_CACHE.values():
+            if cached is model:
+                # tag 随模型改挂到 dest_path；原路径下次加载另取 tag，不会原地替换掉这个模型
+                for other in [k for k, t in _MODEL_TAGS.items() if t == tag]:
+                    del _MODEL_TAGS[other]
+                _MODEL_TAGS[str(dest_path)] = tag
+                break
+        else:
+            return
+    _cache_model(dest_path, tag, model)
+
+
+def _discard_cached_model(model_path) -> None:
+    """修改失败（内存模型可能已与磁盘不一致）时丢弃缓存，下次调用重新加载。"""
+    key = str(_absolute_path(model_path))
+    with _CACHE_LOCK:
+        _drop_cached_queries(key)
+        # batch() 内或有延迟保存时保留内存模型：此前的修改尚未落盘，重新加载会丢失；
+        # 后台任务仍在使用的模型也保留，由任务结束时自行丢弃
+        if key in _BATCH_DEPTH or key in _DEBOUNCED_SAVES or key in _MODEL_PINS:
+            return
+        entry = _MODEL_CACHE.pop(key, None)
+        if entry is not None:
+            _forget_model_state(entry[2])
+            _release_unless_reused(key, entry[1])
+
+
+def clear_model_cache() -> None:
+    """清空已加载模型缓存（不从 JVM 移除模型）。"""
+    with _CACHE_LOCK:
+        _MODEL_CACHE.clear()
+        _PREVIEW_CACHE.clear()
+        _QUERY_CACHE.clear()
+        _MODEL_ACCESSORS.clear()
+        _GEOM_READY.clear()
+        _MODEL_TAGS.clear()
+
+
+# id(model) -> (模型, {接口类别: (作用域对象, 方法名)})；保存模型引用以校验 id 未被复用
+_MODEL_ACCESSORS: "OrderedDict[int, Tuple[Any, Dict[str, Tuple[Any, str]]]]" = OrderedDict()
+
+# 几何已构建的模型：id(model) -> 模型。与 _MODEL_CACHE 一样进程内共享，所有控制器实例看到同一状态；
+# 保存模型引用以校验 id 未被复用，模型离开缓存时随 _forget_model_state 一并移除
+_GEOM_READY: Dict[int, Any] = {}
+
+
+def _forget_model_state(model) -> None:
+    """模型离开 _MODEL_CACHE（过期、被替换、淘汰或丢弃）时移除按模型记下的派生状态。"""
+    _MODEL_ACCESSORS.pop(id(model), None)
+    if _GEOM_READY.get(id(model)) is model:
+        del _GEOM_READY[id(model)]
+
+
+# 只读查询（list_*/has_*/list_model_tree 等）结果缓存：(方法名, 绝对路径, 文件时间戳, 其余参数) -> 成功结果。
+# 文件保存后时间戳变化即失效；保存、丢弃、淘汰模型时另经 _drop_cached_queries 显式移除该路径的条目，
+# 粗粒度 mtime 的文件系统上保存前后时间戳相同也不会返回旧结果
+_QUERY_CACHE: "OrderedDict[Tuple[Any, ...], Dict[str, Any]]" = OrderedDict()
+_QUERY_CACHE_MAX = 128
+
+
+def _drop_cached_queries(key: str) -> None:
+    """移除绝对路径 key 下的全部只读查询缓存。"""
+    with _CACHE_LOCK:
+        for cached in [k for k in _QUERY_CACHE if k[1] == key]:
+            del _QUERY_CACHE[cached]
+
+
+def _copy_result(value):
+    """复制缓存结果中的列表与字典值（如 list_model_tree 的 tree），调用方修改不会污染缓存。"""
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return {k: _copy_result(v) for k, v in value.items()}
+    return value
+
+
+def _cached_query(method):
+    """只读查询方法 (self, model_path, ...) 的结果按文件时间戳缓存，重复轮询不再进入 JVM。
+    仅缓存 status 为 success 的结果；文件不存在或该路径有未落盘修改（batch/延迟保存）时不走缓存。
+    返回结果的副本（列表、字典值另行复制），调用方修改不会污染缓存。"""
+
+    @wraps(method)
+    def wrapper(self, model_path, *args, **kwargs):
+        path = str(_absolute_path(model_path))
+        stamp = _file_stamp(Path(path))
+        if stamp is None or path in _BATCH_DEPTH or path in _DEBOUNCED_SAVES:
+            return method(self, model_path, *args, **kwargs)
+        key = (method.__name__, path, stamp, args, tuple(sorted(kwargs.items())))
+        with _CACHE_LOCK:
+            result = _QUERY_CACHE.get(key)
+            if result is not None:
+                _QUERY_CACHE.move_to_end(key)
+                return _copy_result(result)
+        # 查询本身在锁外执行，不阻塞其他线程的缓存访问
+        result = method(self, model_path, *args, **kwargs)
+        if result.get("status") != "success":
+            return result
+        with _CACHE_LOCK:
+            _QUERY_CACHE[key] = result
+            while len(_QUERY_CACHE) > _QUERY_CACHE_MAX:
+                _QUERY_CACHE.popitem(last=False)
+        return _copy_result(result)
+
+    return wrapper
+
+
+# JavaAPIController.batch() 期间延迟原地保存：绝对路径 -> 嵌套层数 / 退出时待保存的模型
+_BATCH_DEPTH: Dict[str, int] = {}
+_BATCH_PENDING: Dict[str, Any] = {}
+
+# 后台任务（start_mesh）正在使用的缓存模型：绝对路径 -> 任务数。任务结束前该条目不被淘汰、
+# 不被 _discard_cached_model 丢弃，也不因时间戳变化而重新加载，避免 ModelUtil.remove 掉正在划分网格的模型；
+# 前台调用经 _load_model 取该路径时直接报“模型正忙”。与模型缓存一样在 _CACHE_LOCK 下读写
+_MODEL_PINS: Dict[str, int] = {}
+
+
+def _pin_model(key: str) -> None:
+    with _CACHE_LOCK:
+        _MODEL_PINS[key] = _MODEL_PINS.get(key, 0) + 1
+
+
+def _unpin_model(key: str) -> None:
+    with _CACHE_LOCK:
+        if _MODEL_PINS.get(key, 0) <= 1:
+            _MODEL_PINS.pop(key, None)
+        else:
+            _MODEL_PINS[key] -= 1
+
+
+# (对象类型, 方法名) -> 是否存在。JPype 代理的方法定义在 Java 类上，同一类型只需 hasattr 探测一次
+_CAPS: Dict[Tuple[type, str], bool] = {}
+
+
+def _has_cap(obj, name: str) -> bool:
+    """按对象类型缓存的 hasattr，用于 COMSOL 不同版本的接口能力探测。"""
+    key = (type(obj), name)
+    cap = _CAPS.get(key)
+    if cap is None:
+        cap = _CAPS[key] = hasattr(obj, name)
+    return cap
+
+
+@lru_cache(maxsize=8)
+def _pick_materials_accessor(model_cls: type) -> Optional[str]:
+    """模型根节点的材料入口名（materials / material），只取决于模型的 Java 类。"""
+    if hasattr(model_cls, "materials"):
+        return "materials"
+    if hasattr(model_cls, "material"):
+        return "material"
+    return None
+
+
+def _frozen_tag_map(mapping: Dict[str, str]) -> "MappingProxyType[str, str]":
+    """导入时构建只读映射，COMSOL tag 字符串统一 intern，供各调用点反复传给 Java 侧。"""
+    return MappingProxyType({k: sys.intern(v) for k, v in mapping.items()})
+
+
+PHYSICS_TYPE_TO_COMSOL_TAG = _frozen_tag_map(
+    {
+        "heat": "HeatTransfer",
+        "electromagnetic": "ElectromagneticWaves",
+        "structural": "SolidMechanics",
+        "fluid": "SinglePhaseFlow",
+        "acoustics": "Acoustics",
+        "piezoelectric": "Piezoelectric",
+        "chemical": "ChemicalSpeciesTransport",
+        "multibody": "MultibodyDynamics",
+    }
+)
+
+STUDY_TYPE_TO_COMSOL_TAG = _frozen_tag_map(
+    {
+        "stationary": "Stationary",
+        "time_dependent": "Time",
+        "eigenvalue": "Eigenvalue",
+        "frequency": "Frequency",
+        "parametric": "Parametric",
+    }
+)
+
+COUPLING_TYPE_TO_COMSOL_TAG = _frozen_tag_map(
+    {
+        "thermal_stress": "ThermalExpansion",
+        "fluid_structure": "FluidStructureInteraction",
+        "electromagnetic_heat": "ElectromagneticHeat",
+    }
+)
 
 # COMSOL 线弹性/固体力学材料属性名：我们 schema 用 poissonsratio/youngsmodulus，API 用 nu/E
-MATERIAL_PROPERTY_COMSOL_ALIAS = {
-    "thermalconductivity": "k",
-    "thermal conductivity": "k",
-    "density": "rho",
-    "specificheat": "Cp",
-    "specific heat": "Cp",
-    "poissonsratio": "nu",
-    "youngsmodulus": "E",
-}
+MATERIAL_PROPERTY_COMSOL_ALIAS = _frozen_tag_map(
+    {
+        "thermalconductivity": "k",
+        "thermal conductivity": "k",
+        "density": "rho",
+        "specificheat": "Cp",
+        "specific heat": "Cp",
+        "poissonsratio": "nu",
+        "youngsmodulus": "E",
+    }
+)
+
+# (属性组/材料节点类型, 请求的属性名) -> COMSOL 实际接受的写法（别名或原名），按类型只试探一次
+_PROPERTY_NAME_FORMS: Dict[Tuple[type, str], str] = {}
+
+
+def _set_aliased_property(node, write, prop: str, value) -> None:
+    """用 write(name, value) 写入材料属性，name 在 COMSOL 别名与原名之间按节点类型记忆：
+    已知写法直接使用，只有首次或已知写法失败时才依次试探其余写法；全部失败时抛出最后的异常。"""
+    key = (type(node), prop)
+    known = _PROPERTY_NAME_FORMS.get(key)
+    alias = MATERIAL_PROPERTY_COMSOL_ALIAS.get(prop, prop)
+    candidates = [alias] if alias == prop else [alias, prop]
+    if known is not None:
+        candidates.remove(known)
+        candidates.insert(0, known)
+    err: Optional[Exception] = None
+    for name in candidates:
+        try:
+            write(name, value)
+        except Exception as e:
+            err = e
+            continue
+        _PROPERTY_NAME_FORMS[key] = name
+        return
+    raise err
+
+
+# 传热接口 solid1 的默认用户定义热属性（铝），_add_physics_direct 一次批量写入
+_HEAT_SOLID_DEFAULTS = MappingProxyType(
+    {
+        "k_mat": "userdef",
+        "k": "237[W/(m*K)]",
+        "rho_mat": "userdef",
+        "rho": "2700[kg/m^3]",
+        "Cp_mat": "userdef",
+        "Cp": "900[J/(kg*K)]",
+    }
+)
+
+# 物理场类型 -> 接口名前缀（ht0、solid0 ...），_physics_interface_name 使用
+PHYSICS_INTERFACE_NAME_PREFIX = _frozen_tag_map(
+    {
+        "heat": "ht",
+        "electromagnetic": "emw",
+        "structural": "solid",
+        "fluid": "fluid",
+        "acoustics": "acpr",
+        "piezoelectric": "pzd",
+        "chemical": "chds",
+        "multibody": "mbd",
+    }
+)
+
+# rename_material 复制属性时遍历的属性组与属性名
+MATERIAL_COPY_PROPERTY_GROUPS = ("Def", "SolidMechanics", "Thermal")
+MATERIAL_COPY_PROPERTIES = (
+    "nu",
+    "E",
+    "density",
+    "thermalconductivity",
+    "specificheat",
+    "youngsmodulus",
+    "poissonsratio",
+)
 
 # 固体传热所需导热系数 k 的典型值（W/(m·K)），避免「未定义固体1所需的材料属性k」
 # 用于内置材料加载失败或自定义属性未含 k 时补全
-THERMAL_K_BY_NAME = {
-    "steel": 50.0,
-    "钢": 50.0,
-    "copper": 400.0,
-    "铜": 400.0,
-    "aluminum": 237.0,
-    "铝": 237.0,
-    "water": 0.6,
-    "水": 0.6,
-}
+THERMAL_K_BY_NAME = MappingProxyType(
+    {
+        "steel": 50.0,
+        "钢": 50.0,
+        "copper": 400.0,
+        "铜": 400.0,
+        "aluminum": 237.0,
+        "铝": 237.0,
+        "water": 0.6,
+        "水": 0.6,
+    }
+)
 # 无法从名称推断时，固体域默认导热系数（W/(m·K)）
 DEFAULT_THERMAL_K_SOLID = 50.0
 DEFAULT_DENSITY_SOLID = 2700.0
 DEFAULT_CP_SOLID = 900.0
 
-DENSITY_BY_NAME = {
-    "steel": 7850.0,
-    "copper": 8960.0,
-    "aluminum": 2700.0,
-    "water": 1000.0,
-}
+DENSITY_BY_NAME = MappingProxyType(
+    {
+        "steel": 7850.0,
+        "copper": 8960.0,
+        "aluminum": 2700.0,
+        "water": 1000.0,
+    }
+)
 
-CP_BY_NAME = {
-    "steel": 475.0,
-    "copper": 385.0,
-    "aluminum": 900.0,
-    "water": 4180.0,
-}
+CP_BY_NAME = MappingProxyType(
+    {
+        "steel": 475.0,
+        "copper": 385.0,
+        "aluminum": 900.0,
+        "water": 4180.0,
+    }
+)
 
 
 def _comsol_value(value: Any, unit: Optional[str] = None) -> str:
@@ -153,16 +674,7 @@ def _material_property_group(feat, preferred: str = "def"):
 
 def _ensure_material_thermal_k(feat, mat_def: MaterialDefinition) -> None:
     """为材料设置导热系数 k（若尚未设置），避免固体传热报「未定义固体1所需的材料属性k」。"""
-    key = ""
-    for part in (mat_def.builtin_name, mat_def.label, mat_def.name):
-        if part:
-            key = (part or "").strip().lower()
-            break
-    k_val = DEFAULT_THERMAL_K_SOLID
-    for name, val in THERMAL_K_BY_NAME.items():
-        if name in key or key in name:
-            k_val = val
-            break
+    k_val = _material_lookup_value(mat_def, THERMAL_K_BY_NAME, DEFAULT_THERMAL_K_SOLID)
     try:
         _material_property_group(feat).set("thermalconductivity", _comsol_value(k_val, "W/(m*K)"))
     except Exception:
@@ -171,14 +683,12 @@ def _ensure_material_thermal_k(feat, mat_def: MaterialDefinition) -> None:
 
 def _material_lookup_value(
     mat_def: MaterialDefinition,
-    table: Dict[str, float],
+    table: "MappingProxyType[str, float]",
     default: float,
 ) -> float:
-    key = ""
-    for part in (mat_def.builtin_name, mat_def.label, mat_def.name):
-        if part:
-            key = (part or "").strip().lower()
-            break
+    """按材料的内置名/标签/名称（取第一个非空）在 table 中做子串匹配，未命中返回 default。"""
+    parts = (mat_def.builtin_name, mat_def.label, mat_def.name)
+    key = next((part.strip().lower() for part in parts if part), "")
     for name, val in table.items():
         if name in key or key in name:
             return val
@@ -217,53 +727,320 @@ def _ensure_material_heat_properties(feat, mat_def: MaterialDefinition) -> None:
         try:
             group.set(name, value)
         except Exception as exc:
-            logger.warning("璁剧疆鏉愭枡鐑睘鎬?%s 澶辫触: %s", name, exc)
+            logger.warning("璁剧疆鏉愭枡鐑睘鎬?{} 澶辫触: {}", name, exc)
+
+
+def _absolute_path(path) -> Path:
+    """返回绝对路径；已是绝对路径时直接使用，不再 resolve()（resolve 会逐级 stat 解析符号链接）。
+    字符串路径经 _absolute_str_path 缓存，同一 model_path 反复调用时不再重复构造 Path。"""
+    if isinstance(path, str):
+        return _absolute_str_path(path, "" if os.path.isabs(path) else os.getcwd())
+    path = Path(path)
+    return path if path.is_absolute() else path.resolve()
+
+
+@lru_cache(maxsize=64)
+def _absolute_str_path(path: str, cwd: str) -> Path:
+    """按 (路径字符串, 当前目录) 缓存的绝对路径；相对路径的结果随当前目录不同而不同，故 cwd 入键。"""
+    p = Path(path)
+    return p if p.is_absolute() else p.resolve()
+
+
+@lru_cache(maxsize=1)
+def _scratch_dir() -> str:
+    """短命中间文件（预览 PNG 等）的目录：Linux 上优先内存盘 /dev/shm，否则系统临时目录。"""
+    shm = Path("/dev/shm")
+    if sys.platform.startswith("linux") and shm.is_dir() and os.access(shm, os.W_OK):
+        return str(shm)
+    return tempfile.gettempdir()
+
+
+def _compact_preview(data: bytes, quality: int = 80) -> Tuple[bytes, str]:
+    """预览 PNG 转码为 WebP（需 Pillow），返回 (较小的那份字节, MIME)；不可用或未变小时保持 PNG。"""
+    try:
+        from io import BytesIO
+
+        from PIL import Image  # type: ignore[import-not-found]
+
+        buf = BytesIO()
+        with Image.open(BytesIO(data)) as img:
+            img.save(buf, format="WEBP", quality=quality, method=4)
+        webp = buf.getvalue()
+    except Exception:
+        return data, "image/png"
+    if webp and len(webp) < len(data):
+        return webp, "image/webp"
+    return data, "image/png"
+
+
+# 已分配的预览槽文件；每个线程一个，进程退出时统一删除
+_PREVIEW_SLOTS: Dict[int, Path] = {}
+
+
+def _preview_slot() -> Path:
+    """当前线程的预览 PNG 路径（scratch 目录下按进程号/线程号命名），反复覆盖写入同一文件。"""
+    ident = threading.get_ident()
+    slot = _PREVIEW_SLOTS.get(ident)
+    if slot is None:
+        name = f"comsol_preview_{os.getpid()}_{ident}.png"
+        slot = _PREVIEW_SLOTS[ident] = Path(_scratch_dir()) / name
+    return slot
+
+
+# encoding="path" 时写出的预览文件：图像 sha256 -> 路径，只保留最近 _PREVIEW_CACHE_MAX 个
+_PREVIEW_FILES: "OrderedDict[str, Path]" = OrderedDict()
+
+
+def _preview_file(data: bytes, mime: str, digest: str) -> Path:
+    """把预览图写到 scratch 目录下按内容摘要命名的文件并返回路径；同一图像已写出时直接复用。
+    先写临时文件再改名，前端不会读到半截文件；超出容量时删除最久未用的文件。"""
+    path = _PREVIEW_FILES.get(digest)
+    if path is not None and path.exists():
+        _PREVIEW_FILES.move_to_end(digest)
+        return path
+    ext = "webp" if mime == "image/webp" else "png"
+    path = Path(_scratch_dir()) / f"comsol_preview_{os.getpid()}_{digest[:16]}.{ext}"
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    _PREVIEW_FILES[digest] = path
+    while len(_PREVIEW_FILES) > _PREVIEW_CACHE_MAX:
+        _, old = _PREVIEW_FILES.popitem(last=False)
+        old.unlink(missing_ok=True)
+    return path
+
+
+def _remove_preview_slots() -> None:
+    for slot in list(_PREVIEW_SLOTS.values()) + list(_PREVIEW_FILES.values()):
+        slot.unlink(missing_ok=True)
+    _PREVIEW_SLOTS.clear()
+    _PREVIEW_FILES.clear()
+
+
+atexit.register(_remove_preview_slots)
+
+
+@lru_cache(maxsize=256)
+def _ensure_dir(directory: str) -> None:
+    """创建导出目录；同一目录在进程内只 mkdir 一次。"""
+    Path(directory).mkdir(parents=True, exist_ok=True)
+
+
+def _export_target(out_path) -> str:
+    """导出文件的绝对路径字符串，并确保其所在目录存在。"""
+    path = _absolute_path(out_path)
+    _ensure_dir(str(path.parent))
+    return str(path)
+
+
+# 可在导入前抽稀的三角面片格式；STEP/IGES 为 B-rep，不做处理
+_DECIMATABLE_SUFFIXES = frozenset({".stl", ".obj"})
+# 可按零件裁出片段的 STEP 后缀
+_STEP_SUFFIXES = frozenset({".step", ".stp"})
+
+
+def _decimate_mesh_file(path: Path, target_faces: int) -> Path:
+    """用 pymeshlab 把 STL/OBJ 抽稀到约 target_faces 个面，返回抽稀后的文件路径。
+
+    结果写在源文件旁（<stem>.decimated-<N><suffix>），比源文件新时直接复用。
+    COMSOL 导入大面片网格的耗时随面数超线性增长，先抽稀可显著缩短 geom.run()。"""
+    out = path.with_name(f"{path.stem}.decimated-{target_faces}{path.suffix}")
+    if out.exists() and out.stat().st_mtime >= path.stat().st_mtime:
+        return out
+    try:
+        import pymeshlab  # type: ignore[import-not-found]
+    except ModuleNotFoundError as e:
+        raise RuntimeError(
+            "网格抽稀需要 pymeshlab，请执行: uv pip install pymeshlab 或 pip install pymeshlab"
+        ) from e
+    ms = pymeshlab.MeshSet()
+    ms.load_new_mesh(str(path))
+    ms.meshing_remove_duplicate_vertices()
+    if ms.current_mesh().face_number() > target_faces:
+        ms.meshing_decimation_quadric_edge_collapse(
+            targetfacenum=int(target_faces), preservenormal=True
+        )
+        ms.apply_coord_laplacian_smoothing(stepsmoothnum=1)
+    ms.save_current_mesh(str(out))
+    return out
+
+
+def _file_locked(path: Path) -> bool:
+    """Windows 上以读写方式试开一次 path，被其他进程独占（PermissionError）时返回 True。
+    不截断、不写入；文件不存在或非 Windows（无强制文件锁）时返回 False。"""
+    if os.name != "nt":
+        return False
+    try:
+        with open(path, "r+b"):
+            return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+
+
+# 目标文件被占用（WinError 32）时 replace 的重试间隔（秒）；占用多为异步刷盘导致的短暂锁
+_SAVE_REPLACE_RETRY_DELAYS = (0.1, 0.25, 0.6, 1.5)
+
+
+def _fsync_path(path: Path, directory: bool = False) -> None:
+    """尽力把文件（或目录项）刷到磁盘；平台不支持时忽略。"""
+    if directory and not hasattr(os, "O_DIRECTORY"):
+        return  # Windows 无法对目录 fsync
+    flags = (os.O_RDONLY | getattr(os, "O_DIRECTORY", 0)) if directory else os.O_RDWR
+    try:
+        fd = os.open(str(path), flags)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# 延迟保存（COMSOL_SAVE_DEBOUNCE_MS > 0）：绝对路径 -> (模型, allow_fallback, 计时器)；同一路径后写覆盖先写
+_DEBOUNCED_SAVES: Dict[str, Tuple[Any, bool, threading.Timer]] = {}
+_DEBOUNCE_LOCK = threading.Lock()
+
+
+def _schedule_save(model, dest_path: Path, allow_fallback: bool, delay: float) -> None:
+    """登记一次延迟保存；窗口内同一路径的再次保存会取消旧计时器，只保留最后一次。"""
+    key = str(dest_path)
+    timer = threading.Timer(delay, flush_pending_saves, (key,))
+    timer.daemon = True
+    with _DEBOUNCE_LOCK:
+        pending = _DEBOUNCED_SAVES.get(key)
+        if pending is not None:
+            pending[2].cancel()
+        _DEBOUNCED_SAVES[key] = (model, allow_fallback, timer)
+    _drop_cached_queries(key)
+    timer.start()
+
+
+def flush_pending_saves(model_path=None) -> None:
+    """立即写出延迟中的保存；model_path 为空时写出全部。进程退出时自动调用。"""
+    with _DEBOUNCE_LOCK:
+        if model_path is None:
+            keys = list(_DEBOUNCED_SAVES)
+        else:
+            keys = [str(_absolute_path(model_path))]
+        pending = [(k, _DEBOUNCED_SAVES[k]) for k in keys if k in _DEBOUNCED_SAVES]
+    for key, entry in pending:
+        model, allow_fallback, timer = entry
+        timer.cancel()
+        try:
+            # 写出后经 _remember_saved_model 在 _CACHE_LOCK 下刷新缓存条目
+            _write_model_avoid_lock(model, Path(key), allow_fallback)
+        except Exception as e:
+            logger.warning("延迟保存 {} 失败: {}", key, e)
+        # 写出完成后才移除登记：写出期间 _discard_cached_model、查询与预览缓存仍视该路径有未落盘修改，
+        # 不会丢掉或绕过正在写出的内存模型；写出期间又登记了新的保存则保留新条目
+        with _CACHE_LOCK, _DEBOUNCE_LOCK:
+            if _DEBOUNCED_SAVES.get(key) is entry:
+                del _DEBOUNCED_SAVES[key]
+
+
+atexit.register(flush_pending_saves)
 
 
 def _save_model_avoid_lock(model, dest_path: Path, allow_fallback: bool = True):
-    """保存 model 到 dest_path。优先直接覆盖原路径（避免自进程占用导致 replace 失败）；否则先写临时再替换或落备用路径。"""
-    import os
-    import time
+    """保存 model 到 dest_path。batch() 内只记录；配置了 COMSOL_SAVE_DEBOUNCE_MS 时延迟合并写出；
+    否则立即写出（见 _write_model_avoid_lock）。"""
+    dest_path = _absolute_path(dest_path)
+    key = str(dest_path)
+    if key in _BATCH_DEPTH:
+        # 批量修改中：只记录待保存模型，由 batch() 退出时统一保存一次
+        _BATCH_PENDING[key] = model
+        _drop_cached_queries(key)
+        return dest_path
+    debounce_ms = get_settings().comsol_save_debounce_ms
+    if debounce_ms > 0:
+        _schedule_save(model, dest_path, allow_fallback, debounce_ms / 1000.0)
+        return dest_path
+    return _write_model_avoid_lock(model, dest_path, allow_fallback)
 
-    dest_path = Path(dest_path).resolve()
-    dest_path.parent.mkdir(parents=True, exist_ok=True)
+
+def _ensure_parent_dir(path: Path) -> None:
+    """保存前确保父目录存在：目录已在时只做一次 isdir 检查，不再每次发出 mkdir 系统调用。"""
+    if not os.path.isdir(path.parent):
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+
+# 目标路径 -> 保存锁。后台网格线程、延迟保存定时器与前台调用可能同时写同一文件，
+# 而临时文件按进程号固定命名，同一目标的写出需串行，避免互相覆盖临时文件
+_SAVE_LOCKS: Dict[str, threading.Lock] = {}
+
+
+def _save_in_progress(key: str) -> bool:
+    """绝对路径 key 是否正有线程在写出（持有其保存锁）。"""
+    lock = _SAVE_LOCKS.get(key)
+    return lock is not None and lock.locked()
+
+
+def _wait_for_save(key: str) -> None:
+    """等待绝对路径 key 上进行中的写出结束；写出完成时缓存条目的时间戳已刷新。"""
+    lock = _SAVE_LOCKS.get(key)
+    if lock is not None:
+        with lock:
+            pass
+
+
+def _write_model_avoid_lock(model, dest_path: Path, allow_fallback: bool = True):
+    """写出 model 到 dest_path；同一目标路径的写出经 _SAVE_LOCKS 串行化。"""
+    key = str(dest_path)
+    lock = _SAVE_LOCKS.get(key) or _SAVE_LOCKS.setdefault(key, threading.Lock())
+    with lock:
+        return _write_model_unlocked(model, dest_path, allow_fallback)
+
+
+def _write_model_unlocked(model, dest_path: Path, allow_fallback: bool = True):
+    """写出 model 到 dest_path。优先直接覆盖原路径（避免自进程占用导致 replace 失败）；否则先写临时再替换或落备用路径。"""
+    _ensure_parent_dir(dest_path)
 
     # 同一进程内从该路径加载的模型往往仍占用该文件，用临时文件再 replace 会报共享冲突。先尝试直接保存到目标路径。
     try:
         model.save(dest_path.as_posix())
+        _remember_saved_model(model, dest_path)
         return dest_path
     except Exception:
         pass
 
-    fd, tmp_path = tempfile.mkstemp(
-        suffix=".mph", prefix=dest_path.stem + "_", dir=str(dest_path.parent)
-    )
-    try:
-        os.close(fd)
-    except Exception:
-        pass
-    tmp_path = Path(tmp_path)
+    fallback = dest_path.parent / (dest_path.stem + "_updated.mph")
+    if allow_fallback and _file_locked(dest_path):
+        # 目标被其他进程（如 COMSOL GUI）以独占方式打开：replace 注定失败，直接保存到备用路径，
+        # 省去临时文件写出与重试等待
+        model.save(fallback.as_posix())
+        logger.info("原文件被占用，已保存到: {}", fallback)
+        _remember_saved_model(model, fallback)
+        return fallback
+
+    # 同目录下按进程号命名的临时文件（保留 .mph 后缀，COMSOL 按后缀决定保存格式），
+    # 写完后 os.replace 原子替换；进程异常退出遗留的临时文件会被同进程号的下次保存覆盖
+    tmp_path = dest_path.with_name(f"{dest_path.stem}.tmp-{os.getpid()}.mph")
     try:
         model.save(tmp_path.as_posix())
-        for attempt in range(3 if not allow_fallback else 1):
+        # 先把临时文件落盘再 replace，避免断电后目标文件只剩半截内容
+        _fsync_path(tmp_path)
+        for delay in _SAVE_REPLACE_RETRY_DELAYS + (None,):
             try:
                 tmp_path.replace(dest_path)
+                _fsync_path(dest_path.parent, directory=True)
+                _remember_saved_model(model, dest_path)
                 return dest_path
             except OSError as e:
                 if getattr(e, "winerror", None) != 32:
                     raise
+                if delay is not None:
+                    time.sleep(delay)
+                    continue
                 if allow_fallback:
-                    fallback = dest_path.parent / (dest_path.stem + "_updated.mph")
-                    shutil.copy2(str(tmp_path), str(fallback))
-                    try:
-                        tmp_path.unlink()
-                    except Exception:
-                        pass
-                    logger.info(f"原文件被占用，已保存到: {fallback}")
+                    # 临时文件已是完整新内容，直接改名为备用路径，不再整文件复制
+                    os.replace(str(tmp_path), str(fallback))
+                    logger.info("原文件被占用，已保存到: {}", fallback)
+                    _remember_saved_model(model, fallback)
                     return fallback
-                if attempt < 2:
-                    time.sleep(0.5)
-                    continue
                 try:
                     tmp_path.unlink()
                 except Exception:
@@ -281,9 +1058,10 @@ def _save_model_avoid_lock(model, dest_path: Path, allow_fallback: bool = True):
 
 def _save_model_to_new_path(model, dest_path: Path) -> Path:
     """保存到新路径（非覆盖），避免占用冲突。用于按阶段命名时每步写入新文件。"""
-    dest_path = Path(dest_path).resolve()
-    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    dest_path = _absolute_path(dest_path)
+    _ensure_parent_dir(dest_path)
     model.save(dest_path.as_posix())
+    _remember_saved_model(model, dest_path)
     return dest_path
 
 
@@ -295,22 +1073,72 @@ class JavaAPIController:
         self.comsol_runner: Optional[COMSOLRunner] = None
         self._official_api_entries: Optional[List[Dict[str, str]]] = None
         self._official_api_wrappers: Dict[str, Dict[str, str]] = {}
+        # 后台网格任务：模型绝对路径 -> {thread, started, error, saved_path}，见 start_mesh/mesh_status
+        self._mesh_jobs: Dict[str, Dict[str, Any]] = {}
         wrappers_path = Path(__file__).resolve().parent / "comsol_official_api_wrappers.py"
         if wrappers_path.exists():
             try:
                 self.load_official_api_wrapper_module(str(wrappers_path))
             except Exception as e:
-                logger.warning("加载静态官方 API 包装模块失败: %s", e)
+                logger.warning("加载静态官方 API 包装模块失败: {}", e)
+
+    @staticmethod
+    def warmup(background: bool = True) -> Optional[threading.Thread]:
+        """预先启动 JVM 并解析 ModelUtil，使首个真正的模型调用不再承担启动耗时。
+        background=True 时在守护线程中进行并返回该线程；失败只记录日志，首次实际调用时会再报错。"""
+
+        def _start():
+            try:
+                _get_model_util()
+                logger.info("COMSOL JVM 预热完成")
+            except Exception as e:
+                logger.warning("COMSOL JVM 预热失败: {}", e)
+
+        if not background:
+            _start()
+            return None
+        thread = threading.Thread(target=_start, name="comsol-jvm-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def clear_model_cache() -> None:
+        """清空已加载模型及其派生查询缓存，之后每个路径的首次调用都从磁盘重新加载。"""
+        clear_model_cache()
 
     # ===== Model load helper =====
 
-    def _load_model(self, model_path: str):
-        COMSOLRunner._ensure_jvm_started()
-        jpype = _jpype()
-        # 使用 JClass 加载，避免 "No module named 'com'"（com 为 Java 包，非 Python 模块）
-        ModelUtil = jpype.JClass("com.comsol.model.util.ModelUtil")
-        path = Path(model_path)
-        return ModelUtil.load(path.stem or "model", str(path.resolve()))
+    def _load_model(self, model_path, readonly: bool = False, reload: bool = False):
+        """加载（或从缓存取出）模型；model_path 可为 str 或已是绝对路径的 Path，不做 resolve()。
+
+        readonly=True 供 list_*/has_*/测量/预览等只读查询使用，调用方不修改、不保存模型：该路径正在保存
+        （后台网格线程、延迟保存定时器）导致时间戳不一致时直接读取内存模型，不淘汰、不 ModelUtil.remove、
+        不改 tag；其他调用先等待该路径的写出结束，不会把写了一半的文件当作外部修改重新加载。
+        reload=True 跳过缓存强制从磁盘重新加载（文件被外部改写但时间戳与大小未变时使用）。
+        命中缓存时保留“几何已构建”等按模型记下的状态（修改几何的方法自行调用 _geometry_changed），
+        连续的 add_physics 等调用不再重复 geom.run()；从磁盘重新加载得到新模型对象，旧模型的状态
+        在其缓存条目过期时一并移除（见 _forget_model_state）。"""
+        path = _absolute_path(model_path)
+        with _CACHE_LOCK:
+            busy = str(path) in _MODEL_PINS
+        if busy:
+            # 模型对象非线程安全：后台网格任务结束前不与前台调用同时使用
+            raise RuntimeError("模型正在后台划分网格，请用 mesh_status 等待任务结束后再操作")
+        if not readonly:
+            _wait_for_save(str(path))
+        model = None if reload else _cached_model(path, readonly)
+        if model is not None:
+            return model
+        # 缓存未命中时先写出该路径上延迟中的保存，保证从磁盘加载到最新内容
+        flush_pending_saves(path)
+        ModelUtil = _get_model_util()
+        tag = _model_tag(path)
+        model = ModelUtil.load(tag, str(path))
+        # 刚从磁盘载入：即使 JPype 返回同一代理对象，此前记下的状态也已不适用
+        with _CACHE_LOCK:
+            _forget_model_state(model)
+        _cache_model(path, tag, model)
+        return model
 
     def _get_comsol_runner(self) -> COMSOLRunner:
         if self.comsol_runner is None:
@@ -319,74 +1147,92 @@ class JavaAPIController:
 
     # ===== Materials =====
 
-    @staticmethod
-    def _materials_api(model):
-        """获取材料的 API：COMSOL 部分版本为 model.material()（单数），部分为 model.materials()（复数）。
-        若在 component 下，则用 model.component('comp1').material()。不支持时直接抛错并中断。"""
+    def _model_accessor(self, model, kind: str, resolve):
+        """按模型缓存接口入口 (作用域对象, 方法名)：首次调用 resolve(model) 探测，之后直接复用。
+        避免每次取材料/选择集都重复 component/hasattr 探测。"""
+        with _CACHE_LOCK:
+            entry = _MODEL_ACCESSORS.get(id(model))
+            if entry is None or entry[0] is not model:
+                entry = (model, {})
+                _MODEL_ACCESSORS[id(model)] = entry
+                while len(_MODEL_ACCESSORS) > _MODEL_CACHE_MAX * 2:
+                    _MODEL_ACCESSORS.popitem(last=False)
+        accessor = entry[1].get(kind)
+        if accessor is None:
+            accessor = entry[1][kind] = resolve(model)
+        return accessor
+
+    def _comp1(self, model):
+        """返回 model.component('comp1')，不存在时返回 None；按模型缓存，组件结构在调用间不变。"""
+        return self._model_accessor(model, "comp1", self._resolve_comp1)[0]
+
+    def _resolve_comp1(self, model):
         try:
-            if hasattr(model, "materials"):
-                return model.materials()
-            if hasattr(model, "material"):
-                return model.material()
-        except Exception as e:
-            raise RuntimeError(f"COMSOL 材料 API 不可用: {e}") from e
+            if self._node_list_has(model.component(), "comp1"):
+                return (model.component("comp1"),)
+        except Exception:
+            pass
+        return (None,)
+
+    def _resolve_material_accessor(self, model):
+        """材料入口：优先 component('comp1').material()，否则 model.materials()/material()。"""
+        comp = self._comp1(model)
+        if comp is not None and _has_cap(comp, "material"):
+            return comp, "material"
+        attr = _pick_materials_accessor(type(model))
+        if attr is not None:
+            return model, attr
+        raise RuntimeError("Current COMSOL model object has no material API")
+
+    def _materials_api(self, model):
+        """Return the material sequence, preferring the component scope."""
+        scope, attr = self._model_accessor(model, "material", self._resolve_material_accessor)
         try:
-            if self._node_list_has(model.component(), "comp1") and hasattr(model.component("comp1"), "material"):
-                return model.component("comp1").material()
+            return getattr(scope, attr)()
         except Exception as e:
-            raise RuntimeError(f"COMSOL 材料 API 不可用（component.material）: {e}") from e
-        raise RuntimeError(
-            "当前 COMSOL 模型对象无 material()/materials() 接口，请确认 COMSOL 版本与 API。"
-        )
+            raise RuntimeError(f"COMSOL material API unavailable: {e}") from e
 
     def _material_feature(self, model, name: str):
-        """获取名为 name 的材料节点。先尝试 model 级，再尝试 component 级。"""
-        try:
-            if hasattr(model, "materials"):
-                return model.materials(name)
-            if hasattr(model, "material"):
-                return model.material(name)
-        except Exception as e:
-            raise RuntimeError(f"获取材料节点 '{name}' 失败: {e}") from e
+        """Return a material feature, preferring the component scope."""
+        scope, attr = self._model_accessor(model, "material", self._resolve_material_accessor)
         try:
-            if self._node_list_has(model.component(), "comp1"):
-                return model.component("comp1").material(name)
+            return getattr(scope, attr)(name)
         except Exception as e:
-            raise RuntimeError(f"获取材料节点 '{name}' 失败: {e}") from e
-        raise RuntimeError("当前 COMSOL 模型不支持材料节点访问")
+            raise RuntimeError(f"Failed to get material feature {name!r}: {e}") from e
 
-    @staticmethod
-    def _physics_api(model):
+    def _component(self, model):
+        """component('comp1') 存在时返回它，否则返回 model 本身；geom/mesh/physics 在两者上同名。"""
+        comp = self._comp1(model)
+        return comp if comp is not None else model
+
+    def _physics_api(self, model):
         """获取物理场 API：component 下用 component('comp1').physics()，否则用 model.physics()。"""
-        try:
-            if self._node_list_has(model.component(), "comp1") and hasattr(model.component("comp1"), "physics"):
-                return model.component("comp1").physics()
-        except Exception:
-            pass
-        if hasattr(model, "physics"):
+        comp = self._comp1(model)
+        if comp is not None and _has_cap(comp, "physics"):
+            return comp.physics()
+        if _has_cap(model, "physics"):
             return model.physics()
         raise RuntimeError("当前 COMSOL 模型无 physics() 接口")
 
     def _physics_feature(self, model, name: str):
         """获取名为 name 的物理场节点。与 _physics_api 同源（component 或 root）。"""
-        try:
-            if self._node_list_has(model.component(), "comp1") and hasattr(model.component("comp1"), "physics"):
-                return model.component("comp1").physics(name)
-        except Exception:
-            pass
+        comp = self._comp1(model)
+        if comp is not None and _has_cap(comp, "physics"):
+            return comp.physics(name)
         return model.physics(name)
 
     # ===== 材料节点：查询 / 删除 / 重命名 / 存在检查 / 更新属性 / 批量删除 =====
 
+    @_cached_query
     def list_material_tags(self, model_path: str) -> Dict[str, Any]:
         """查询模型中现有材料节点名称列表。API: model.material().names() 或 .tags()。"""
         try:
-            model = self._load_model(model_path)
+            model = self._load_model(model_path, readonly=True)
             mat_seq = self._materials_api(model)
             tags = self._tags_or_names(mat_seq)
             return {"status": "success", "tags": tags, "names": tags}
         except Exception as e:
-            logger.warning("list_material_tags 失败: %s", e)
+            logger.warning("list_material_tags 失败: {}", e)
             return {"status": "error", "message": str(e), "tags": [], "names": []}
 
     def list_material_names(self, model_path: str) -> Dict[str, Any]:
@@ -397,29 +1243,30 @@ class JavaAPIController:
         """删除指定名称的材料节点。API: model.material().remove(\"mat1\")."""
         try:
             model = self._load_model(model_path)
-            mat_seq = self._materials_api(model)
-            if hasattr(mat_seq, "remove"):
-                mat_seq.remove(name)
-            else:
-                return {"status": "error", "message": "当前 COMSOL 版本不支持 materials().remove()"}
-            _save_model_avoid_lock(model, Path(model_path))
-            return {"status": "success", "message": f"已删除材料 {name}", "removed": name}
+            result = self._do_remove_material(model, name)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
+            return {"status": "success", **result}
+        except _UnsupportedApi as e:
+            # 接口检查在修改前完成，模型未被改动，保留缓存
+            return {"status": "error", "message": str(e)}
         except Exception as e:
-            logger.warning("remove_material 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("remove_material 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
+    @_cached_query
     def has_material(self, model_path: str, name: str) -> Dict[str, Any]:
         """检查材料节点是否存在。API: model.material().has(\"mat1\") 或 names()/tags() 包含。"""
         try:
-            model = self._load_model(model_path)
+            model = self._load_model(model_path, readonly=True)
             mat_seq = self._materials_api(model)
-            if hasattr(mat_seq, "has"):
+            if _has_cap(mat_seq, "has"):
                 exists = mat_seq.has(name)
             else:
-                exists = name in self._tags_or_names(mat_seq)
+                exists = self._tags_contain(mat_seq, name)
             return {"status": "success", "exists": bool(exists)}
         except Exception as e:
-            logger.warning("has_material 失败: %s", e)
+            logger.warning("has_material 失败: {}", e)
             return {"status": "error", "message": str(e), "exists": False}
 
     def rename_material(self, model_path: str, old_name: str, new_name: str) -> Dict[str, Any]:
@@ -427,62 +1274,35 @@ class JavaAPIController:
         try:
             model = self._load_model(model_path)
             mat_seq = self._materials_api(model)
-            if not (hasattr(mat_seq, "has") and mat_seq.has(old_name)):
+            if not (_has_cap(mat_seq, "has") and mat_seq.has(old_name)):
                 return {"status": "error", "message": f"材料节点不存在: {old_name}"}
-            if hasattr(mat_seq, "has") and mat_seq.has(new_name):
+            if _has_cap(mat_seq, "has") and mat_seq.has(new_name):
                 return {"status": "error", "message": f"目标名称已存在: {new_name}"}
             feat_old = self._material_feature(model, old_name)
             mat_seq.create(new_name)
             feat_new = self._material_feature(model, new_name)
             try:
-                if hasattr(feat_old, "label"):
+                if _has_cap(feat_old, "label"):
                     feat_new.label(feat_old.get("label") or new_name)
             except Exception:
                 pass
+            if _has_cap(feat_old, "getString") and _has_cap(feat_new, "set"):
+                kinds = self._read_properties(
+                    feat_old, ("family", "materialType"), lenient=True, getter="getString"
+                )
+                self._set_properties_batch(feat_new, kinds)
             try:
-                if hasattr(feat_old, "getString") and hasattr(feat_new, "set"):
-                    for key in ("family", "materialType"):
-                        try:
-                            v = feat_old.getString(key)
-                            if v:
-                                feat_new.set(key, v)
-                        except Exception:
-                            pass
-            except Exception:
-                pass
-            try:
-                if hasattr(feat_old, "propertyGroup"):
-                    for g in ("Def", "SolidMechanics", "Thermal"):
-                        try:
-                            pg_old = feat_old.propertyGroup(g)
-                            pg_new = feat_new.propertyGroup(g)
-                            for prop in (
-                                "nu",
-                                "E",
-                                "density",
-                                "thermalconductivity",
-                                "specificheat",
-                                "youngsmodulus",
-                                "poissonsratio",
-                            ):
-                                try:
-                                    val = pg_old.get(prop)
-                                    if val is not None:
-                                        pg_new.set(prop, val)
-                                except Exception:
-                                    pass
-                        except Exception:
-                            pass
+                self._copy_material_properties(feat_old, feat_new)
             except Exception:
                 pass
             try:
-                if hasattr(feat_old, "selection") and hasattr(feat_new, "selection"):
+                if _has_cap(feat_old, "selection") and _has_cap(feat_new, "selection"):
                     feat_new.selection().set(feat_old.selection().entities())
             except Exception:
                 pass
-            if hasattr(mat_seq, "remove"):
+            if _has_cap(mat_seq, "remove"):
                 mat_seq.remove(old_name)
-            _save_model_avoid_lock(model, Path(model_path))
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {
                 "status": "success",
                 "message": f"已重命名 {old_name} -> {new_name}",
@@ -490,9 +1310,60 @@ class JavaAPIController:
                 "new_name": new_name,
             }
         except Exception as e:
-            logger.warning("rename_material 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("rename_material 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
+    def _copy_material_properties(self, feat_old, feat_new) -> None:
+        """把旧材料各属性组中的属性复制到新材料（rename_material 使用）。
+        属性组支持 properties() 时一次取出实际定义的属性名并全部复制，整组共用一个 try；
+        否则退回逐个试探 MATERIAL_COPY_PROPERTIES 中的常用属性。"""
+        if not _has_cap(feat_old, "propertyGroup"):
+            return
+        for g in MATERIAL_COPY_PROPERTY_GROUPS:
+            try:
+                pg_old = feat_old.propertyGroup(g)
+                pg_new = feat_new.propertyGroup(g)
+            except Exception:
+                continue
+            values = None
+            if _has_cap(pg_old, "properties"):
+                try:
+                    values = self._read_properties(pg_old, _java_strings(pg_old.properties()))
+                except Exception:
+                    values = None
+            if values is None:
+                values = self._read_properties(pg_old, MATERIAL_COPY_PROPERTIES, lenient=True)
+            if values:
+                self._set_properties_batch(pg_new, values)
+
+    @staticmethod
+    def _read_properties(node, props, lenient: bool = False, getter: str = "get") -> Dict[str, Any]:
+        """逐个读取 node 上的 props，跳过空值；lenient 时忽略单个属性读取失败（属性是否存在未知时用）。"""
+        read = getattr(node, getter)
+        values: Dict[str, Any] = {}
+        for prop in props:
+            try:
+                val = read(prop)
+            except Exception:
+                if not lenient:
+                    raise
+                continue
+            if val is not None and str(val) != "":
+                values[prop] = val
+        return values
+
+    @staticmethod
+    def _set_properties_batch(pg, values: Dict[str, Any]) -> None:
+        """优先经 _bulk_set 一次写入整组属性；批量写入不可用或失败时逐个 set，单个失败忽略。"""
+        if _bulk_set(pg, values):
+            return
+        for prop, val in values.items():
+            try:
+                pg.set(prop, val)
+            except Exception:
+                pass
+
     def update_material_properties(
         self, model_path: str, name: str, properties: Dict[str, Any], property_group: str = "Def"
     ) -> Dict[str, Any]:
@@ -500,65 +1371,29 @@ class JavaAPIController:
         支持 property_group 为 Def / def、SolidMechanics、Thermal 等。"""
         try:
             model = self._load_model(model_path)
-            feat = self._material_feature(model, name)
-            group = (property_group or "Def").strip()
-            if group.lower() == "def":
-                group = "Def"
-            for k, v in properties.items():
-                key = MATERIAL_PROPERTY_COMSOL_ALIAS.get(k, k)
-                done = False
-                if hasattr(feat, "property"):
-                    try:
-                        feat.property(key, v)
-                        done = True
-                    except Exception:
-                        try:
-                            feat.property(k, v)
-                            done = True
-                        except Exception:
-                            pass
-                if not done:
-                    try:
-                        pg = feat.propertyGroup(group)
-                        pg.set(key, v)
-                    except Exception:
-                        try:
-                            pg.set(k, v)
-                        except Exception as e2:
-                            logger.warning("设置属性 %s 失败: %s", k, e2)
-            _save_model_avoid_lock(model, Path(model_path))
-            return {"status": "success", "message": f"已更新材料 {name} 属性", "material": name}
+            result = self._do_update_material(model, name, properties, property_group)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
+            return {"status": "success", **result}
         except Exception as e:
-            logger.warning("update_material_properties 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("update_material_properties 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def remove_all_materials(self, model_path: str) -> Dict[str, Any]:
         """清除模型中所有材料节点（批量删除）。API: model.material().remove(tag) 逐项。"""
         try:
             model = self._load_model(model_path)
-            mat_seq = self._materials_api(model)
-            tags = self._tags_or_names(mat_seq)
-            if not hasattr(mat_seq, "remove"):
-                return {
-                    "status": "error",
-                    "message": "当前 COMSOL 版本不支持 materials().remove()",
-                    "removed": [],
-                }
-            for tag in tags:
-                try:
-                    mat_seq.remove(tag)
-                except Exception as e:
-                    logger.warning("删除材料 %s 失败: %s", tag, e)
-            _save_model_avoid_lock(model, Path(model_path))
-            return {
-                "status": "success",
-                "message": f"已删除 {len(tags)} 个材料节点",
-                "removed": tags,
-            }
+            result = self._do_remove_all_materials(model)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
+            return {"status": "success", **result}
+        except _UnsupportedApi as e:
+            return {"status": "error", "message": str(e), "removed": []}
         except Exception as e:
-            logger.warning("remove_all_materials 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("remove_all_materials 失败: {}", e)
             return {"status": "error", "message": str(e), "removed": []}
 
+    @_cached_query
     def list_model_tree(self, model_path: str) -> Dict[str, Any]:
         """获取模型树中主要节点信息（材料、物理场、研究、网格、几何）。
         兼容 model.xxx().tags() 与 model.xxx().names()。"""
@@ -571,75 +1406,105 @@ class JavaAPIController:
             "results": [],
         }
         try:
-            model = self._load_model(model_path)
-            try:
-                ms = self._materials_api(model)
-                out["materials"] = self._tags_or_names(ms)
-            except Exception:
-                pass
-            try:
-                ph = self._physics_api(model)
-                out["physics"] = self._tags_or_names(ph)
-            except Exception:
-                pass
-            try:
-                if hasattr(model, "study"):
-                    out["studies"] = self._tags_or_names(model.study())
-            except Exception:
-                pass
-            try:
-                if hasattr(model, "mesh"):
-                    out["meshes"] = self._tags_or_names(model.mesh())
-            except Exception:
-                pass
-            try:
-                if self._node_list_has(model.component(), "comp1") and hasattr(
-                    model.component("comp1").geom(), "tags"
-                ):
-                    out["geometries"] = self._tags_or_names(model.component("comp1").geom())
-                elif hasattr(model, "geom"):
-                    out["geometries"] = self._tags_or_names(model.geom())
-            except Exception:
-                pass
-            try:
-                if hasattr(model, "result"):
-                    out["results"] = self._tags_or_names(model.result())
-            except Exception:
-                pass
+            model = self._load_model(model_path, readonly=True)
+            self._collect_model_tree(model, out)
             return {"status": "success", "tree": out}
         except Exception as e:
-            logger.warning("list_model_tree 失败: %s", e)
+            logger.warning("list_model_tree 失败: {}", e)
             return {"status": "error", "message": str(e), "tree": out}
 
+    def _collect_model_tree(self, model, out: Dict[str, List[str]]) -> None:
+        """一次遍历收集模型树各类节点名称，写入 out；单类失败不影响其它类。
+        配置 comsol_parallel_tree_queries 时各类只读查询并行执行。"""
+
+        def _geometries():
+            comp = self._comp1(model)
+            # comp.geom() 取一次复用，探测与取名共用同一个 Java 句柄
+            geom_seq = comp.geom() if comp is not None else None
+            if geom_seq is not None and _has_cap(geom_seq, "tags"):
+                return self._tags_or_names(geom_seq)
+            return self._tags_or_names(model.geom()) if _has_cap(model, "geom") else None
+
+        def _physics():
+            # 先按能力缓存判断接口是否存在，缺失时直接跳过，不经 _physics_api 抛出再吞掉异常
+            comp = self._comp1(model)
+            if (comp is None or not _has_cap(comp, "physics")) and not _has_cap(model, "physics"):
+                return None
+            return self._tags_or_names(self._physics_api(model))
+
+        queries = {
+            "materials": lambda: self._tags_or_names(self._materials_api(model)),
+            "physics": _physics,
+            "studies": lambda: (
+                self._tags_or_names(model.study()) if _has_cap(model, "study") else None
+            ),
+            "meshes": lambda: (
+                self._tags_or_names(model.mesh()) if _has_cap(model, "mesh") else None
+            ),
+            "geometries": _geometries,
+            "results": lambda: (
+                self._tags_or_names(model.result()) if _has_cap(model, "result") else None
+            ),
+        }
+
+        def _run(query):
+            try:
+                return query()
+            except Exception:
+                return None
+
+        if getattr(self.settings, "comsol_parallel_tree_queries", False):
+            from concurrent.futures import ThreadPoolExecutor
+
+            # 先在当前线程解析 comp1，避免各线程重复探测并同时写入接口缓存
+            self._comp1(model)
+            with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+                values = dict(zip(queries, pool.map(_run, queries.values())))
+        else:
+            values = {bucket: _run(query) for bucket, query in queries.items()}
+        for bucket, value in values.items():
+            if value is not None:
+                out[bucket] = value
+
     @staticmethod
-    def _tags_or_names(seq) -> List[str]:
-        """COMSOL 部分版本用 .names()，部分用 .tags()，统一返回名称列表。"""
-        if hasattr(seq, "names"):
+    def _raw_tags(seq):
+        """返回 .names()/.tags() 的原始 Java String[]（不复制），都不可用时返回空元组。"""
+        if _has_cap(seq, "names"):
             try:
                 n = seq.names()
                 if n is not None:
-                    return [str(x) for x in n]
+                    return n
             except Exception:
                 pass
-        if hasattr(seq, "tags"):
+        if _has_cap(seq, "tags"):
             try:
                 t = seq.tags()
                 if t is not None:
-                    return [str(x) for x in t]
+                    return t
             except Exception:
                 pass
-        return []
+        return ()
+
+    @staticmethod
+    def _tags_or_names(seq) -> List[str]:
+        """COMSOL 部分版本用 .names()，部分用 .tags()，统一返回名称列表。"""
+        return _java_strings(JavaAPIController._raw_tags(seq))
+
+    @staticmethod
+    def _tags_contain(seq, name: str) -> bool:
+        """在原始 String[] 上逐项比较，命中即停，不构造 Python 列表。"""
+        return any(str(x) == name for x in JavaAPIController._raw_tags(seq))
 
     def _node_list_has(self, seq, name: str) -> bool:
         """检查节点列表是否包含 name。兼容无 .has() 的 ModelNodeListClient/GeomListClient 等。"""
         if seq is None:
             return False
-        if hasattr(seq, "has"):
+        if _has_cap(seq, "has"):
             try:
                 return bool(seq.has(name))
             except Exception:
                 pass
-        return name in self._tags_or_names(seq)
+        return self._tags_contain(seq, name)
 
     # ===== 研究节点：删除 / 查询名称 / 重命名 =====
 
@@ -647,15 +1512,15 @@ class JavaAPIController:
         """删除研究节点。API: model.study().remove(\"std1\")."""
         try:
             model = self._load_model(model_path)
-            st = model.study()
-            if hasattr(st, "remove"):
-                st.remove(name)
-            else:
-                return {"status": "error", "message": "当前 COMSOL 版本不支持 study().remove()"}
-            _save_model_avoid_lock(model, Path(model_path))
-            return {"status": "success", "message": f"已删除研究 {name}", "removed": name}
+            result = self._do_remove_study(model, name)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
+            return {"status": "success", **result}
+        except _UnsupportedApi as e:
+            # 接口检查在修改前完成，模型未被改动，保留缓存
+            return {"status": "error", "message": str(e)}
         except Exception as e:
-            logger.warning("remove_study 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("remove_study 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def clear_study(self, model_path: str) -> Dict[str, Any]:
@@ -664,7 +1529,7 @@ class JavaAPIController:
             model = self._load_model(model_path)
             st = model.study()
             names = self._tags_or_names(st)
-            if not hasattr(st, "remove"):
+            if not _has_cap(st, "remove"):
                 return {
                     "status": "error",
                     "message": "当前 COMSOL 版本不支持 study().remove()",
@@ -674,26 +1539,27 @@ class JavaAPIController:
                 try:
                     st.remove(name)
                 except Exception as e:
-                    logger.warning("删除研究 %s 失败: %s", name, e)
-            _save_model_avoid_lock(model, Path(model_path))
+                    logger.warning("删除研究 {} 失败: {}", name, e)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {
                 "status": "success",
                 "message": f"已删除 {len(names)} 个研究节点",
                 "removed": names,
             }
         except Exception as e:
-            logger.warning("clear_study 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("clear_study 失败: {}", e)
             return {"status": "error", "message": str(e), "removed": []}
 
     def list_study_names(self, model_path: str) -> Dict[str, Any]:
         """查询现有研究名称。API: model.study().names() 或 .tags()。"""
         try:
-            model = self._load_model(model_path)
+            model = self._load_model(model_path, readonly=True)
             st = model.study()
             names = self._tags_or_names(st)
             return {"status": "success", "names": names}
         except Exception as e:
-            logger.warning("list_study_names 失败: %s", e)
+            logger.warning("list_study_names 失败: {}", e)
             return {"status": "error", "message": str(e), "names": []}
 
     def rename_study(self, model_path: str, old_name: str, new_name: str) -> Dict[str, Any]:
@@ -701,19 +1567,19 @@ class JavaAPIController:
         try:
             model = self._load_model(model_path)
             st = model.study()
-            if hasattr(st, "has") and not st.has(old_name):
+            if _has_cap(st, "has") and not st.has(old_name):
                 return {"status": "error", "message": f"研究节点不存在: {old_name}"}
-            if hasattr(st, "has") and st.has(new_name):
+            if _has_cap(st, "has") and st.has(new_name):
                 return {"status": "error", "message": f"目标名称已存在: {new_name}"}
             feat = model.study(old_name)
-            if hasattr(feat, "name"):
+            if _has_cap(feat, "name"):
                 feat.name(new_name)
             else:
                 return {
                     "status": "error",
                     "message": "当前 COMSOL 版本不支持 study(tag).name(newName)",
                 }
-            _save_model_avoid_lock(model, Path(model_path))
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {
                 "status": "success",
                 "message": f"已重命名研究 {old_name} -> {new_name}",
@@ -721,67 +1587,71 @@ class JavaAPIController:
                 "new_name": new_name,
             }
         except Exception as e:
-            logger.warning("rename_study 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("rename_study 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
+    @_cached_query
     def has_node(self, model_path: str, node_path: str) -> Dict[str, Any]:
         """检查节点是否存在。API: model.hasNode(\"/studies/std1\"). 路径格式如 /studies/std1, /physics/ht0。"""
         try:
-            model = self._load_model(model_path)
             path = (node_path or "").strip()
             if not path.startswith("/"):
                 path = "/" + path
-            if hasattr(model, "hasNode"):
-                exists = model.hasNode(path)
+            model = self._load_model(model_path, readonly=True)
+            if _has_cap(model, "hasNode"):
+                exists = bool(model.hasNode(path))
             else:
                 return {
                     "status": "error",
                     "message": "当前 COMSOL 版本不支持 hasNode(path)",
                     "exists": False,
                 }
-            return {"status": "success", "exists": bool(exists), "path": path}
+            return {"status": "success", "exists": exists, "path": path}
         except Exception as e:
-            logger.warning("has_node 失败: %s", e)
+            logger.warning("has_node 失败: {}", e)
             return {"status": "error", "message": str(e), "exists": False}
 
     def clear_all_results(self, model_path: str) -> Dict[str, Any]:
         """清除所有结果数据。API: model.result().clearAll()。"""
         try:
             model = self._load_model(model_path)
-            if not hasattr(model, "result"):
+            if not _has_cap(model, "result"):
                 return {"status": "error", "message": "当前 COMSOL 模型无 result() 接口"}
             res = model.result()
-            if hasattr(res, "clearAll"):
+            if _has_cap(res, "clearAll"):
                 res.clearAll()
             else:
                 return {"status": "error", "message": "当前 COMSOL 版本不支持 result().clearAll()"}
-            _save_model_avoid_lock(model, Path(model_path))
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {"status": "success", "message": "已清除所有结果数据"}
         except Exception as e:
-            logger.warning("clear_all_results 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("clear_all_results 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def get_node_tree(self, model_path: str) -> Dict[str, Any]:
         """获取模型树结构。API: model.getNodeTree()。若不存在则回退到 list_model_tree。"""
         try:
-            model = self._load_model(model_path)
-            if hasattr(model, "getNodeTree"):
+            model = self._load_model(model_path, readonly=True)
+            if _has_cap(model, "getNodeTree"):
                 tree = model.getNodeTree()
                 # 若返回 Java 对象，尝试转为可序列化结构
-                if tree is not None and hasattr(tree, "toString"):
+                if tree is not None and _has_cap(tree, "toString"):
                     return {"status": "success", "node_tree": tree.toString()}
                 return {"status": "success", "node_tree": tree}
             return self.list_model_tree(model_path)
         except Exception as e:
-            logger.warning("get_node_tree 失败: %s", e)
+            logger.warning("get_node_tree 失败: {}", e)
             return {"status": "error", "message": str(e), "node_tree": None}
 
     # ===== 物理场节点：查询 / 删除 / 存在检查 =====
 
+    @_cached_query
     def list_physics_tags(self, model_path: str) -> Dict[str, Any]:
         """获取所有物理场名称列表。API: model.physics().names() 或 .tags()。"""
         try:
-            model = self._load_model(model_path)
+            model = self._load_model(model_path, readonly=True)
             ph = self._physics_api(model)
             tags = self._tags_or_names(ph)
             return {"status": "success", "tags": tags, "names": tags}
@@ -796,25 +1666,26 @@ class JavaAPIController:
         """删除已存在的物理场节点。API: model.physics().remove(\"ht0\")."""
         try:
             model = self._load_model(model_path)
-            ph = self._physics_api(model)
-            if hasattr(ph, "remove"):
-                ph.remove(name)
-            else:
-                return {"status": "error", "message": "当前 COMSOL 版本不支持 physics().remove()"}
-            _save_model_avoid_lock(model, Path(model_path))
-            return {"status": "success", "message": f"已删除物理场 {name}", "removed": name}
+            result = self._do_remove_physics(model, name)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
+            return {"status": "success", **result}
+        except _UnsupportedApi as e:
+            # 接口检查在修改前完成，模型未被改动，保留缓存
+            return {"status": "error", "message": str(e)}
         except Exception as e:
+            _discard_cached_model(model_path)
             return {"status": "error", "message": str(e)}
 
+    @_cached_query
     def has_physics(self, model_path: str, name: str) -> Dict[str, Any]:
         """检查物理场节点是否存在。API: model.physics().has(\"phys1\") 或 names()/tags() 包含。"""
         try:
-            model = self._load_model(model_path)
+            model = self._load_model(model_path, readonly=True)
             ph = self._physics_api(model)
-            if hasattr(ph, "has"):
+            if _has_cap(ph, "has"):
                 exists = ph.has(name)
             else:
-                exists = name in self._tags_or_names(ph)
+                exists = self._tags_contain(ph, name)
             return {"status": "success", "exists": bool(exists)}
         except Exception as e:
             return {"status": "error", "message": str(e), "exists": False}
@@ -823,64 +1694,40 @@ class JavaAPIController:
         """重命名物理场节点。API: model.physics(\"ht0\").name(\"newName\")."""
         try:
             model = self._load_model(model_path)
-            ph = self._physics_api(model)
-            if hasattr(ph, "has") and not ph.has(old_name):
-                return {"status": "error", "message": f"物理场节点不存在: {old_name}"}
-            if hasattr(ph, "has") and ph.has(new_name):
-                return {"status": "error", "message": f"目标名称已存在: {new_name}"}
-            feat = self._physics_feature(model, old_name)
-            if hasattr(feat, "name"):
-                feat.name(new_name)
-            else:
-                return {
-                    "status": "error",
-                    "message": "当前 COMSOL 版本不支持 physics(tag).name(newName)",
-                }
-            _save_model_avoid_lock(model, Path(model_path))
-            return {
-                "status": "success",
-                "message": f"已重命名物理场 {old_name} -> {new_name}",
-                "old_name": old_name,
-                "new_name": new_name,
-            }
+            result = self._do_rename_physics(model, old_name, new_name)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
+            return {"status": "success", **result}
+        except (LookupError, _UnsupportedApi) as e:
+            # 前置检查未通过，模型未被修改，保留缓存
+            return {"status": "error", "message": str(e)}
         except Exception as e:
-            logger.warning("rename_physics 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("rename_physics 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def clear_physics(self, model_path: str) -> Dict[str, Any]:
         """清除所有物理场节点。API: model.physics().clear()."""
         try:
             model = self._load_model(model_path)
-            ph = self._physics_api(model)
-            if hasattr(ph, "clear"):
-                ph.clear()
-            else:
-                tags = self._tags_or_names(ph)
-                if hasattr(ph, "remove"):
-                    for tag in tags:
-                        try:
-                            ph.remove(tag)
-                        except Exception as e:
-                            logger.warning("删除物理场 %s 失败: %s", tag, e)
-                else:
-                    return {
-                        "status": "error",
-                        "message": "当前 COMSOL 版本不支持 physics().clear() 或 remove()",
-                    }
-            _save_model_avoid_lock(model, Path(model_path))
-            return {"status": "success", "message": "已清除所有物理场节点"}
+            result = self._do_clear_physics(model)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
+            return {"status": "success", **result}
+        except _UnsupportedApi as e:
+            return {"status": "error", "message": str(e)}
         except Exception as e:
-            logger.warning("clear_physics 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("clear_physics 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
+    @_cached_query
     def physics_feature_is_active(
         self, model_path: str, physics_tag: str, feature_tag: str
     ) -> Dict[str, Any]:
         """检查物理场下某特征是否已激活。API: model.physics(\"ht0\").feature(\"temp1\").isActive()."""
         try:
-            model = self._load_model(model_path)
+            model = self._load_model(model_path, readonly=True)
             feat = self._physics_feature(model, physics_tag).feature(feature_tag)
-            active = feat.isActive() if hasattr(feat, "isActive") else True
+            active = feat.isActive() if _has_cap(feat, "isActive") else True
             return {
                 "status": "success",
                 "active": bool(active),
@@ -888,7 +1735,7 @@ class JavaAPIController:
                 "feature": feature_tag,
             }
         except Exception as e:
-            logger.warning("physics_feature_is_active 失败: %s", e)
+            logger.warning("physics_feature_is_active 失败: {}", e)
             return {"status": "error", "message": str(e), "active": False}
 
     def set_physics_feature_param(
@@ -897,30 +1744,225 @@ class JavaAPIController:
         """修改已存在边界条件/特征参数。API: model.physics(\"ht0\").feature(\"temp1\").set(\"T0\", \"293.15\")."""
         try:
             model = self._load_model(model_path)
-            feat = self._physics_feature(model, physics_tag).feature(feature_tag)
-            feat.set(key, value)
-            _save_model_avoid_lock(model, Path(model_path))
-            return {
-                "status": "success",
-                "message": f"已设置 {physics_tag}.{feature_tag}.{key}",
-                "physics": physics_tag,
-                "feature": feature_tag,
-                "key": key,
-            }
+            result = self._do_set_physics(model, physics_tag, feature_tag, key, value)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
+            return {"status": "success", **result}
         except Exception as e:
-            logger.warning("set_physics_feature_param 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("set_physics_feature_param 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
+    # ===== 批量操作：一次加载、多次修改、一次保存 =====
+
+    @contextmanager
+    def batch(self, model_path: str):
+        """块内对 model_path 的各次原地保存只记录不落盘，退出时统一保存一次。
+        用法：with controller.batch(path): controller.remove_selection(path, ...); ...
+        块内抛出异常时不保存，并丢弃内存中的模型缓存。另存到其他路径的操作不受影响。"""
+        key = str(_absolute_path(model_path))
+        _BATCH_DEPTH[key] = _BATCH_DEPTH.get(key, 0) + 1
+        completed = False
+        try:
+            yield self
+            completed = True
+        finally:
+            _BATCH_DEPTH[key] -= 1
+            if not _BATCH_DEPTH[key]:
+                del _BATCH_DEPTH[key]
+                model = _BATCH_PENDING.pop(key, None)
+                if not completed:
+                    _discard_cached_model(key)
+                elif model is not None:
+                    _save_model_avoid_lock(model, Path(key))
+
+    # op["kind"] -> 处理方法名；处理方法接收已加载模型与 op["args"]，只修改不保存，失败时抛异常
+    _OPERATION_HANDLERS = {
+        "update_material": "_do_update_material",
+        "remove_material": "_do_remove_material",
+        "set_physics": "_do_set_physics",
+        "remove_physics": "_do_remove_physics",
+        "remove_study": "_do_remove_study",
+        "remove_all_materials": "_do_remove_all_materials",
+        "rename_physics": "_do_rename_physics",
+        "clear_physics": "_do_clear_physics",
+        "set_parameters": "_set_parameters_batch",
+        "export_plot_image": "_do_export_plot_image",
+        "export_data": "_do_export_data",
+        "table_export": "_do_table_export",
+        "execute_direct": "_do_execute_direct",
+    }
+
+    def apply_operations(
+        self,
+        model_path: str,
+        ops: List[Dict[str, Any]],
+        save_to_path: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """在同一个已加载模型上依次执行多个修改操作，最后只保存一次。
+        ops 每项为 {"kind": ..., "args": {...}}；单个操作失败不影响后续操作，
+        results 中按顺序给出每个操作的 status。全部失败时不保存。"""
+        try:
+            model = self._load_model(model_path)
+        except Exception as e:
+            logger.warning("apply_operations 加载模型失败: {}", e)
+            return {"status": "error", "message": str(e), "results": []}
+        results: List[Dict[str, Any]] = []
+        ok = 0
+        for index, op in enumerate(ops or []):
+            kind = (op or {}).get("kind")
+            handler_name = self._OPERATION_HANDLERS.get(kind)
+            try:
+                if handler_name is None:
+                    raise ValueError(f"不支持的操作类型: {kind}")
+                result = getattr(self, handler_name)(model, **(op.get("args") or {}))
+                results.append({"index": index, "kind": kind, "status": "success", **result})
+                ok += 1
+            except Exception as e:
+                logger.warning("批量操作 #{} ({}) 失败: {}", index, kind, e)
+                results.append(
+                    {"index": index, "kind": kind, "status": "error", "message": str(e)}
+                )
+        failed = len(results) - ok
+        if not ok:
+            _discard_cached_model(model_path)
+            return {"status": "error", "message": "没有成功执行的操作，未保存模型", "results": results}
+        try:
+            if save_to_path:
+                saved_path = _save_model_to_new_path(model, Path(save_to_path))
+            else:
+                saved_path = _save_model_avoid_lock(model, _absolute_path(model_path))
+        except Exception as e:
+            _discard_cached_model(model_path)
+            logger.warning("apply_operations 保存失败: {}", e)
+            return {"status": "error", "message": str(e), "results": results}
+        out = {
+            "status": "success",
+            "message": f"已执行 {ok} 个操作",
+            "results": results,
+            "saved_path": str(saved_path),
+        }
+        if failed:
+            out["status"] = "warning"
+            out["message"] = f"已执行 {ok} 个操作，{failed} 个操作失败"
+        return out
+
+    def update_materials_bulk(
+        self, model_path: str, updates: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """批量更新材料属性。updates 每项为 update_material_properties 的参数：
+        {"name": ..., "properties": {...}, "property_group": "Def"}。"""
+        ops = [{"kind": "update_material", "args": dict(u)} for u in updates or []]
+        return self.apply_operations(model_path, ops)
+
+    def set_physics_feature_params_bulk(
+        self, model_path: str, params: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """批量修改物理场特征参数。params 每项为
+        {"physics_tag": ..., "feature_tag": ..., "key": ..., "value": ...}。"""
+        ops = [{"kind": "set_physics", "args": dict(p)} for p in params or []]
+        return self.apply_operations(model_path, ops)
+
+    def _do_update_material(
+        self, model, name: str, properties: Dict[str, Any], property_group: str = "Def"
+    ) -> Dict[str, Any]:
+        feat = self._material_feature(model, name)
+        group = (property_group or "Def").strip()
+        if group.lower() == "def":
+            group = "Def"
+        # 写入方式只探测一次：支持 feat.property 时用它，否则用属性组 set
+        node = feat if _has_cap(feat, "property") else feat.propertyGroup(group)
+        write = node.property if node is feat else node.set
+        for k, v in properties.items():
+            try:
+                _set_aliased_property(node, write, k, _java_value(v))
+            except Exception as e:
+                logger.warning("设置属性 {} 失败: {}", k, e)
+        return {"message": f"已更新材料 {name} 属性", "material": name}
+
+    def _do_remove_material(self, model, name: str) -> Dict[str, Any]:
+        mat_seq = self._materials_api(model)
+        if not _has_cap(mat_seq, "remove"):
+            raise _UnsupportedApi("当前 COMSOL 版本不支持 materials().remove()")
+        mat_seq.remove(name)
+        return {"message": f"已删除材料 {name}", "removed": name}
+
+    def _do_set_physics(
+        self, model, physics_tag: str, feature_tag: str, key: str, value: Any
+    ) -> Dict[str, Any]:
+        feat = self._physics_feature(model, physics_tag).feature(feature_tag)
+        feat.set(key, _java_value(value))
+        return {
+            "message": f"已设置 {physics_tag}.{feature_tag}.{key}",
+            "physics": physics_tag,
+            "feature": feature_tag,
+            "key": key,
+        }
+
+    def _do_remove_physics(self, model, name: str) -> Dict[str, Any]:
+        ph = self._physics_api(model)
+        if not _has_cap(ph, "remove"):
+            raise _UnsupportedApi("当前 COMSOL 版本不支持 physics().remove()")
+        ph.remove(name)
+        return {"message": f"已删除物理场 {name}", "removed": name}
+
+    def _do_remove_study(self, model, name: str) -> Dict[str, Any]:
+        st = model.study()
+        if not _has_cap(st, "remove"):
+            raise _UnsupportedApi("当前 COMSOL 版本不支持 study().remove()")
+        st.remove(name)
+        return {"message": f"已删除研究 {name}", "removed": name}
+
+    def _do_remove_all_materials(self, model) -> Dict[str, Any]:
+        mat_seq = self._materials_api(model)
+        if not _has_cap(mat_seq, "remove"):
+            raise _UnsupportedApi("当前 COMSOL 版本不支持 materials().remove()")
+        tags = self._tags_or_names(mat_seq)
+        for tag in tags:
+            try:
+                mat_seq.remove(tag)
+            except Exception as e:
+                logger.warning("删除材料 {} 失败: {}", tag, e)
+        return {"message": f"已删除 {len(tags)} 个材料节点", "removed": tags}
+
+    def _do_rename_physics(self, model, old_name: str, new_name: str) -> Dict[str, Any]:
+        ph = self._physics_api(model)
+        if _has_cap(ph, "has") and not ph.has(old_name):
+            raise LookupError(f"物理场节点不存在: {old_name}")
+        if _has_cap(ph, "has") and ph.has(new_name):
+            raise LookupError(f"目标名称已存在: {new_name}")
+        feat = self._physics_feature(model, old_name)
+        if not _has_cap(feat, "name"):
+            raise _UnsupportedApi("当前 COMSOL 版本不支持 physics(tag).name(newName)")
+        feat.name(new_name)
+        return {
+            "message": f"已重命名物理场 {old_name} -> {new_name}",
+            "old_name": old_name,
+            "new_name": new_name,
+        }
+
+    def _do_clear_physics(self, model) -> Dict[str, Any]:
+        ph = self._physics_api(model)
+        if _has_cap(ph, "clear"):
+            ph.clear()
+        elif _has_cap(ph, "remove"):
+            for tag in self._tags_or_names(ph):
+                try:
+                    ph.remove(tag)
+                except Exception as e:
+                    logger.warning("删除物理场 {} 失败: {}", tag, e)
+        else:
+            raise _UnsupportedApi("当前 COMSOL 版本不支持 physics().clear() 或 remove()")
+        return {"message": "已清除所有物理场节点"}
+
     # ===== 几何节点：查询 =====
 
+    @_cached_query
     def list_geometry_tags(self, model_path: str) -> Dict[str, Any]:
         """查询几何节点名称列表。API: model.geom().names() 或 .tags()；component 下为 component('comp1').geom()。"""
         try:
-            model = self._load_model(model_path)
-            if self._node_list_has(model.component(), "comp1"):
-                geom_seq = model.component("comp1").geom()
-            else:
-                geom_seq = model.geom()
+            model = self._load_model(model_path, readonly=True)
+            comp = self._comp1(model)
+            geom_seq = comp.geom() if comp is not None else model.geom()
             tags = self._tags_or_names(geom_seq)
             return {"status": "success", "tags": tags, "names": tags}
         except Exception as e:
@@ -930,27 +1972,23 @@ class JavaAPIController:
         """重命名几何节点。API: model.geom(\"geom1\").name(\"newGeomName\")。component 下为 component('comp1').geom(\"geom1\").name(\"newName\")。"""
         try:
             model = self._load_model(model_path)
-            geom_seq = None
-            if self._node_list_has(model.component(), "comp1"):
-                geom_seq = model.component("comp1").geom()
-            if geom_seq is None or not hasattr(geom_seq, "has"):
+            comp = self._comp1(model)
+            geom_seq = comp.geom() if comp is not None else None
+            if geom_seq is None or not _has_cap(geom_seq, "has"):
                 geom_seq = model.geom()
             if not self._node_list_has(geom_seq, old_name):
                 return {"status": "error", "message": f"几何节点不存在: {old_name}"}
             if self._node_list_has(geom_seq, new_name):
                 return {"status": "error", "message": f"目标名称已存在: {new_name}"}
-            if self._node_list_has(model.component(), "comp1"):
-                feat = model.component("comp1").geom(old_name)
-            else:
-                feat = model.geom(old_name)
-            if hasattr(feat, "name"):
+            feat = comp.geom(old_name) if comp is not None else model.geom(old_name)
+            if _has_cap(feat, "name"):
                 feat.name(new_name)
             else:
                 return {
                     "status": "error",
                     "message": "当前 COMSOL 版本不支持 geom(tag).name(newName)",
                 }
-            _save_model_avoid_lock(model, Path(model_path))
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {
                 "status": "success",
                 "message": f"已重命名几何 {old_name} -> {new_name}",
@@ -958,21 +1996,29 @@ class JavaAPIController:
                 "new_name": new_name,
             }
         except Exception as e:
-            logger.warning("rename_geometry 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("rename_geometry 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     # ===== Selection（选择集）=====
 
+    def _resolve_selection_accessor(self, model):
+        if _has_cap(model, "selection"):
+            return model, "selection"
+        comp = self._comp1(model)
+        if comp is not None and _has_cap(comp, "selection"):
+            return comp, "selection"
+        raise RuntimeError("当前 COMSOL 模型无 selection() 接口")
+
     def _selection_api(self, model):
         """获取 selection 列表 API：model.selection() 或 component 下 component('comp1').selection()。"""
         try:
-            if hasattr(model, "selection"):
-                return model.selection()
-            if self._node_list_has(model.component(), "comp1") and hasattr(model.component("comp1"), "selection"):
-                return model.component("comp1").selection()
+            scope, attr = self._model_accessor(
+                model, "selection", self._resolve_selection_accessor
+            )
+            return getattr(scope, attr)()
         except Exception as e:
             raise RuntimeError(f"COMSOL selection API 不可用: {e}") from e
-        raise RuntimeError("当前 COMSOL 模型无 selection() 接口")
 
     def create_selection(
         self,
@@ -988,48 +2034,49 @@ class JavaAPIController:
         try:
             model = self._load_model(model_path)
             sel_list = self._selection_api(model)
-            if hasattr(sel_list, "has") and sel_list.has(tag):
+            if _has_cap(sel_list, "has") and sel_list.has(tag):
                 return {"status": "error", "message": f"选择集已存在: {tag}"}
             sel_list.create(tag, kind or "Explicit")
             sel = (
                 sel_list.get(tag)
-                if hasattr(sel_list, "get")
+                if _has_cap(sel_list, "get")
                 else getattr(sel_list, tag)
-                if hasattr(sel_list, tag)
+                if _has_cap(sel_list, tag)
                 else None
             )
-            if sel is None and hasattr(sel_list, "tags"):
+            if sel is None and _has_cap(sel_list, "tags"):
                 tags = self._tags_or_names(sel_list)
                 if tag in tags:
                     sel = sel_list(tag) if callable(sel_list) else None
             if sel is not None:
-                if hasattr(sel, "geom"):
+                if _has_cap(sel, "geom"):
                     sel.geom(geom_tag)
-                if entity_dim is not None and hasattr(sel, "set") and entities is not None:
+                if entity_dim is not None and _has_cap(sel, "set") and entities is not None:
                     try:
-                        sel.set(entities)
+                        sel.set(_jint_array(entities))
                     except Exception:
                         pass
-                elif kwargs.get("all") and hasattr(sel, "all"):
+                elif kwargs.get("all") and _has_cap(sel, "all"):
                     try:
                         sel.all()
                     except Exception:
                         pass
-            _save_model_avoid_lock(model, Path(model_path))
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {"status": "success", "message": f"已创建选择集 {tag}", "tag": tag}
         except Exception as e:
-            logger.warning("create_selection 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("create_selection 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def list_selection_tags(self, model_path: str) -> Dict[str, Any]:
         """查询选择集标签列表。"""
         try:
-            model = self._load_model(model_path)
+            model = self._load_model(model_path, readonly=True)
             sel_list = self._selection_api(model)
             tags = self._tags_or_names(sel_list)
             return {"status": "success", "tags": tags}
         except Exception as e:
-            logger.warning("list_selection_tags 失败: %s", e)
+            logger.warning("list_selection_tags 失败: {}", e)
             return {"status": "error", "message": str(e), "tags": []}
 
     def remove_selection(self, model_path: str, tag: str) -> Dict[str, Any]:
@@ -1037,14 +2084,15 @@ class JavaAPIController:
         try:
             model = self._load_model(model_path)
             sel_list = self._selection_api(model)
-            if hasattr(sel_list, "remove"):
+            if _has_cap(sel_list, "remove"):
                 sel_list.remove(tag)
             else:
                 return {"status": "error", "message": "当前 COMSOL 版本不支持 selection().remove()"}
-            _save_model_avoid_lock(model, Path(model_path))
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {"status": "success", "message": f"已删除选择集 {tag}", "removed": tag}
         except Exception as e:
-            logger.warning("remove_selection 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("remove_selection 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def rename_selection(self, model_path: str, old_name: str, new_name: str) -> Dict[str, Any]:
@@ -1052,25 +2100,29 @@ class JavaAPIController:
         try:
             model = self._load_model(model_path)
             sel_list = self._selection_api(model)
-            if hasattr(sel_list, "has") and not sel_list.has(old_name):
+            if _has_cap(sel_list, "has") and not sel_list.has(old_name):
                 return {"status": "error", "message": f"选择集不存在: {old_name}"}
-            if hasattr(sel_list, "has") and sel_list.has(new_name):
+            if _has_cap(sel_list, "has") and sel_list.has(new_name):
                 return {"status": "error", "message": f"目标名称已存在: {new_name}"}
             sel = sel_list(old_name) if callable(sel_list) else sel_list.get(old_name)
-            if sel is not None and hasattr(sel, "name"):
+            if sel is not None and _has_cap(sel, "name"):
                 sel.name(new_name)
-            elif hasattr(sel_list, "remove"):
+            elif _has_cap(sel_list, "remove"):
                 sel_list.create(new_name, "Explicit")
                 try:
                     new_sel = sel_list(new_name) if callable(sel_list) else sel_list.get(new_name)
-                    if new_sel is not None and hasattr(sel, "entities") and hasattr(new_sel, "set"):
+                    if (
+                        new_sel is not None
+                        and _has_cap(sel, "entities")
+                        and _has_cap(new_sel, "set")
+                    ):
                         new_sel.set(sel.entities())
                 except Exception:
                     pass
                 sel_list.remove(old_name)
             else:
                 return {"status": "error", "message": "当前 COMSOL 版本不支持选择集重命名"}
-            _save_model_avoid_lock(model, Path(model_path))
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {
                 "status": "success",
                 "message": f"已重命名选择集 {old_name} -> {new_name}",
@@ -1078,7 +2130,8 @@ class JavaAPIController:
                 "new_name": new_name,
             }
         except Exception as e:
-            logger.warning("rename_selection 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("rename_selection 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     # ===== 几何 IO / 几何工具 =====
@@ -1089,45 +2142,54 @@ class JavaAPIController:
         file_path: str,
         geom_tag: str = "geom1",
         feature_tag: Optional[str] = None,
+        decimate_target: Optional[int] = None,
+        parts: Optional[List[str]] = None,
         **kwargs: Any,
     ) -> Dict[str, Any]:
-        """导入几何文件（STEP/IGES/STL 等）。在 geom 下创建 Import 特征并 run()。"""
+        """导入几何文件（STEP/IGES/STL 等）。在 geom 下创建 Import 特征并 run()。
+
+        decimate_target 给定且文件为 STL/OBJ 时，先用 pymeshlab 抽稀到约该面数再导入；
+        parts 给定且文件为 STEP 时，只把这些零件（名称或 id）裁成片段文件再导入。"""
         try:
             model = self._load_model(model_path)
+            self._geometry_changed(model)
             path = Path(file_path)
             if not path.is_absolute():
                 path = Path(model_path).parent / path
             if not path.exists():
                 return {"status": "error", "message": f"文件不存在: {path}"}
-            geom_seq = (
-                model.component("comp1").geom() if self._node_list_has(model.component(), "comp1") else model.geom()
-            )
-            if not self._node_list_has(geom_seq, geom_tag):
+            scope = self._component(model)
+            if not self._node_list_has(scope.geom(), geom_tag):
                 return {"status": "error", "message": f"几何节点不存在: {geom_tag}"}
-            geom = (
-                model.component("comp1").geom(geom_tag)
-                if self._node_list_has(model.component(), "comp1")
-                else model.geom(geom_tag)
-            )
-            feat_tag = feature_tag or "imp1"
-            geom.create(feat_tag, "Import")
-            imp = geom.feature(feat_tag)
-            imp.set("filename", str(path.resolve()))
-            for k, v in kwargs.items():
-                try:
-                    imp.set(k, v)
-                except Exception:
-                    pass
+            geom = scope.geom(geom_tag)
+            if not feature_tag:
+                feature_tag = _next_tag(self._tags_or_names(geom.feature()), "imp")
+            source = path
+            if decimate_target and path.suffix.lower() in _DECIMATABLE_SUFFIXES:
+                source = _decimate_mesh_file(path, int(decimate_target))
+            elif parts and path.suffix.lower() in _STEP_SUFFIXES:
+                source = extract_step_parts(path, parts)
+            feat_tag = feature_tag
+            imp = geom.create(feat_tag, "Import")
+            if imp is None:
+                imp = geom.feature(feat_tag)
+            imp.set("filename", str(_absolute_path(source)))
+            _set_params_lenient(imp, kwargs)
             geom.run()
-            _save_model_avoid_lock(model, Path(model_path))
-            return {
+            _save_model_avoid_lock(model, _absolute_path(model_path))
+            out = {
                 "status": "success",
                 "message": f"已导入几何 {path.name}",
                 "feature": feat_tag,
                 "path": str(path),
             }
+            if source != path:
+                key = "fragment_path" if path.suffix.lower() in _STEP_SUFFIXES else "decimated_path"
+                out[key] = str(source)
+            return out
         except Exception as e:
-            logger.warning("import_geometry 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("import_geometry 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def geometry_measure(
@@ -1139,38 +2201,32 @@ class JavaAPIController:
     ) -> Dict[str, Any]:
         """几何测量（体积/面积/长度等）。使用 COMSOL measure 工具；不可用时返回明确错误。"""
         try:
-            model = self._load_model(model_path)
-            geom_seq = (
-                model.component("comp1").geom() if self._node_list_has(model.component(), "comp1") else model.geom()
-            )
-            if not self._node_list_has(geom_seq, geom_tag):
+            model = self._load_model(model_path, readonly=True)
+            scope = self._component(model)
+            if not self._node_list_has(scope.geom(), geom_tag):
                 return {"status": "error", "message": f"几何节点不存在: {geom_tag}"}
-            geom = (
-                model.component("comp1").geom(geom_tag)
-                if self._node_list_has(model.component(), "comp1")
-                else model.geom(geom_tag)
-            )
-            if not hasattr(geom, "measure"):
+            geom = scope.geom(geom_tag)
+            if not _has_cap(geom, "measure"):
                 return {"status": "error", "message": "当前 COMSOL 版本不支持 geom.measure()"}
             measure = geom.measure()
             if (
-                not hasattr(measure, "getVolume")
-                and not hasattr(measure, "getArea")
-                and not hasattr(measure, "getLength")
+                not _has_cap(measure, "getVolume")
+                and not _has_cap(measure, "getArea")
+                and not _has_cap(measure, "getLength")
             ):
                 return {"status": "error", "message": "measure 接口无 getVolume/getArea/getLength"}
             if selection:
                 try:
-                    measure.selection().set(selection)
+                    measure.selection().set(_jint_array(selection))
                 except Exception:
                     pass
             value = None
             what_lower = (what or "volume").lower()
-            if "volume" in what_lower and hasattr(measure, "getVolume"):
+            if "volume" in what_lower and _has_cap(measure, "getVolume"):
                 value = measure.getVolume()
-            elif "area" in what_lower and hasattr(measure, "getArea"):
+            elif "area" in what_lower and _has_cap(measure, "getArea"):
                 value = measure.getArea()
-            elif "length" in what_lower and hasattr(measure, "getLength"):
+            elif "length" in what_lower and _has_cap(measure, "getLength"):
                 value = measure.getLength()
             if value is None:
                 return {"status": "error", "message": f"不支持的测量类型: {what}"}
@@ -1180,7 +2236,7 @@ class JavaAPIController:
                 "what": what,
             }
         except Exception as e:
-            logger.warning("geometry_measure 失败: %s", e)
+            logger.warning("geometry_measure 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     # ===== 网格高级 =====
@@ -1188,9 +2244,10 @@ class JavaAPIController:
     def _mesh_api(self, model):
         """获取 mesh 列表：model.mesh() 或 component('comp1').mesh()。"""
         try:
-            if self._node_list_has(model.component(), "comp1") and hasattr(model.component("comp1"), "mesh"):
-                return model.component("comp1").mesh()
-            if hasattr(model, "mesh"):
+            comp = self._comp1(model)
+            if comp is not None and _has_cap(comp, "mesh"):
+                return comp.mesh()
+            if _has_cap(model, "mesh"):
                 return model.mesh()
         except Exception as e:
             raise RuntimeError(f"COMSOL mesh API 不可用: {e}") from e
@@ -1206,10 +2263,11 @@ class JavaAPIController:
             if self._mesh_has(mesh_list, tag):
                 return {"status": "success", "message": f"网格已存在: {tag}", "tag": tag}
             mesh_list.create(tag, geom_tag)
-            _save_model_avoid_lock(model, Path(model_path))
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {"status": "success", "message": f"已创建网格 {tag}", "tag": tag}
         except Exception as e:
-            logger.warning("mesh_create 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("mesh_create 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def mesh_list(self, model_path: str) -> Dict[str, Any]:
@@ -1220,7 +2278,7 @@ class JavaAPIController:
             tags = self._tags_or_names(mesh_list)
             return {"status": "success", "tags": tags}
         except Exception as e:
-            logger.warning("mesh_list 失败: %s", e)
+            logger.warning("mesh_list 失败: {}", e)
             return {"status": "error", "message": str(e), "tags": []}
 
     def mesh_remove(self, model_path: str, tag: str) -> Dict[str, Any]:
@@ -1228,14 +2286,15 @@ class JavaAPIController:
         try:
             model = self._load_model(model_path)
             mesh_list = self._mesh_api(model)
-            if hasattr(mesh_list, "remove"):
+            if _has_cap(mesh_list, "remove"):
                 mesh_list.remove(tag)
             else:
                 return {"status": "error", "message": "当前 COMSOL 版本不支持 mesh().remove()"}
-            _save_model_avoid_lock(model, Path(model_path))
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {"status": "success", "message": f"已删除网格 {tag}", "removed": tag}
         except Exception as e:
-            logger.warning("mesh_remove 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("mesh_remove 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def mesh_set_size(
@@ -1257,7 +2316,7 @@ class JavaAPIController:
                 mesh.create("size", "Size")
             except Exception:
                 pass
-            size_feat = mesh.feature("size") if hasattr(mesh, "feature") else None
+            size_feat = mesh.feature("size") if _has_cap(mesh, "feature") else None
             if size_feat is not None:
                 if hauto is not None:
                     try:
@@ -1269,49 +2328,82 @@ class JavaAPIController:
                         size_feat.set("hmax", hmax)
                     except Exception:
                         pass
-                for k, v in kwargs.items():
-                    try:
-                        size_feat.set(k, v)
-                    except Exception:
-                        pass
-            _save_model_avoid_lock(model, Path(model_path))
+                _set_params_lenient(size_feat, kwargs)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {"status": "success", "message": f"已设置网格 {mesh_tag} 尺寸"}
         except Exception as e:
-            logger.warning("mesh_set_size 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("mesh_set_size 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def mesh_stats(self, model_path: str, mesh_tag: str = "mesh1") -> Dict[str, Any]:
         """返回网格统计（单元数、顶点数等）。"""
         try:
-            model = self._load_model(model_path)
+            model = self._load_model(model_path, readonly=True)
             mesh_list = self._mesh_api(model)
             if not self._mesh_has(mesh_list, mesh_tag):
                 return {"status": "error", "message": f"网格不存在: {mesh_tag}"}
             mesh = mesh_list(mesh_tag) if callable(mesh_list) else mesh_list.get(mesh_tag)
             out = {"status": "success", "num_vertex": None, "num_elem": None}
-            if hasattr(mesh, "getNumVertex"):
+            if _has_cap(mesh, "getNumVertex"):
                 try:
                     out["num_vertex"] = mesh.getNumVertex()
                 except Exception:
                     pass
-            if hasattr(mesh, "getNumElem"):
+            if _has_cap(mesh, "getNumElem"):
                 try:
                     out["num_elem"] = mesh.getNumElem()
                 except Exception:
                     pass
-            if hasattr(mesh, "stat"):
+            if _has_cap(mesh, "stat"):
                 try:
                     st = mesh.stat()
                     if st is not None:
-                        if hasattr(st, "getNumVertex"):
+                        if _has_cap(st, "getNumVertex"):
                             out["num_vertex"] = st.getNumVertex()
-                        if hasattr(st, "getNumElem"):
+                        if _has_cap(st, "getNumElem"):
                             out["num_elem"] = st.getNumElem()
                 except Exception:
                     pass
             return out
         except Exception as e:
-            logger.warning("mesh_stats 失败: %s", e)
+            logger.warning("mesh_stats 失败: {}", e)
+            return {"status": "error", "message": str(e)}
+
+    def mesh_arrays(
+        self,
+        model_path: str,
+        mesh_tag: str = "mesh1",
+        elem_types: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """以 numpy 数组返回网格顶点与单元，供下游直接做数值处理。
+
+        getVertex() 返回 double[sdim][N]、getElem(type) 返回 int[k][M]，整块经缓冲区转为数组后转置：
+        vertex 形如 (N, sdim)，elements[type] 形如 (M, k)（0 起始的顶点编号）。
+        elem_types 缺省时用 getTypes() 列出的全部单元类型。结果含 ndarray，不可直接 JSON 序列化。"""
+        try:
+            import numpy as np
+        except ImportError:
+            return {"status": "error", "message": "mesh_arrays 需要 numpy，请执行: pip install numpy"}
+        try:
+            model = self._load_model(model_path, readonly=True)
+            mesh_list = self._mesh_api(model)
+            if not self._mesh_has(mesh_list, mesh_tag):
+                return {"status": "error", "message": f"网格不存在: {mesh_tag}"}
+            mesh = mesh_list(mesh_tag) if callable(mesh_list) else mesh_list.get(mesh_tag)
+            if not _has_cap(mesh, "getVertex") or not _has_cap(mesh, "getElem"):
+                return {"status": "error", "message": "当前 COMSOL 版本不支持 getVertex/getElem"}
+            vertex = np.ascontiguousarray(np.asarray(mesh.getVertex(), dtype=np.float64).T)
+            if elem_types is None:
+                elem_types = _java_strings(mesh.getTypes()) if _has_cap(mesh, "getTypes") else []
+            elements = {}
+            for etype in elem_types:
+                block = np.asarray(mesh.getElem(etype), dtype=np.int32)
+                if block.size:
+                    elements[etype] = np.ascontiguousarray(block.T)
+            return {"status": "success", "vertex": vertex, "elements": elements}
+        except Exception as e:
+            logger.warning("mesh_arrays 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     # ===== 研究/求解高级 =====
@@ -1322,7 +2414,7 @@ class JavaAPIController:
         """清除求解器序列关联的解数据。API: model.sol(solver_tag).clearSolutionData() 或类似。"""
         try:
             model = self._load_model(model_path)
-            if not hasattr(model, "sol"):
+            if not _has_cap(model, "sol"):
                 return {"status": "error", "message": "当前 COMSOL 模型无 sol() 接口"}
             sol_list = model.sol()
             tags = self._tags_or_names(sol_list)
@@ -1332,14 +2424,15 @@ class JavaAPIController:
             for tag in to_clear:
                 try:
                     seq = model.sol(tag) if callable(model.sol()) else sol_list.get(tag)
-                    if seq is not None and hasattr(seq, "clearSolutionData"):
+                    if seq is not None and _has_cap(seq, "clearSolutionData"):
                         seq.clearSolutionData()
                 except Exception as e:
-                    logger.warning("clearSolutionData %s 失败: %s", tag, e)
-            _save_model_avoid_lock(model, Path(model_path))
+                    logger.warning("clearSolutionData {} 失败: {}", tag, e)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {"status": "success", "message": "已清除求解数据"}
         except Exception as e:
-            logger.warning("clear_solution_data 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("clear_solution_data 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     # ===== 结果/后处理与导出 =====
@@ -1356,43 +2449,12 @@ class JavaAPIController:
         """导出结果图为图片。使用 result 下 export 或 plot 的 image 导出。"""
         try:
             model = self._load_model(model_path)
-            if not hasattr(model, "result"):
-                return {"status": "error", "message": "当前 COMSOL 模型无 result() 接口"}
-            res = model.result()
-            if not hasattr(res, "export"):
-                return {"status": "error", "message": "result().export() 不可用"}
-            exp_list = res.export()
-            path = Path(out_path)
-            path.parent.mkdir(parents=True, exist_ok=True)
-            tag = "img1"
-            try:
-                exp_list.create(tag, "Image")
-            except Exception:
-                try:
-                    exp_list.create(tag, "Plot")
-                except Exception as e1:
-                    return {"status": "error", "message": f"无法创建 Image 导出: {e1}"}
-            feat = exp_list(tag) if callable(exp_list) else exp_list.get(tag)
-            if feat is not None:
-                feat.set("filename", str(path.resolve()))
-                feat.set("width", str(width))
-                feat.set("height", str(height))
-                if plot_group_tag:
-                    try:
-                        feat.set("plotgroup", plot_group_tag)
-                    except Exception:
-                        pass
-                for k, v in kwargs.items():
-                    try:
-                        feat.set(k, v)
-                    except Exception:
-                        pass
-                if hasattr(feat, "run"):
-                    feat.run()
-            _save_model_avoid_lock(model, Path(model_path))
+            self._do_export_plot_image(model, plot_group_tag, out_path, width, height, **kwargs)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {"status": "success", "message": f"已导出图片到 {out_path}", "path": out_path}
         except Exception as e:
-            logger.warning("export_plot_image 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("export_plot_image 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def export_data(
@@ -1406,34 +2468,12 @@ class JavaAPIController:
         """导出数据（表格/数据文件）。result().export().create(tag, type) + set + run()。"""
         try:
             model = self._load_model(model_path)
-            if not hasattr(model, "result"):
-                return {"status": "error", "message": "当前 COMSOL 模型无 result() 接口"}
-            res = model.result()
-            if not hasattr(res, "export"):
-                return {"status": "error", "message": "result().export() 不可用"}
-            exp_list = res.export()
-            path = Path(out_path)
-            path.parent.mkdir(parents=True, exist_ok=True)
-            tag = "data1"
-            try:
-                exp_list.create(tag, export_type or "Data")
-            except Exception as e1:
-                return {"status": "error", "message": f"无法创建 Data 导出: {e1}"}
-            feat = exp_list(tag) if callable(exp_list) else exp_list.get(tag)
-            if feat is not None:
-                feat.set("filename", str(path.resolve()))
-                feat.set("data", dataset_or_plot_tag)
-                for k, v in kwargs.items():
-                    try:
-                        feat.set(k, v)
-                    except Exception:
-                        pass
-                if hasattr(feat, "run"):
-                    feat.run()
-            _save_model_avoid_lock(model, Path(model_path))
+            self._do_export_data(model, dataset_or_plot_tag, out_path, export_type, **kwargs)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {"status": "success", "message": f"已导出数据到 {out_path}", "path": out_path}
         except Exception as e:
-            logger.warning("export_data 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("export_data 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def table_export(
@@ -1442,76 +2482,143 @@ class JavaAPIController:
         """导出表格到文件。"""
         try:
             model = self._load_model(model_path)
-            if not hasattr(model, "result"):
-                return {"status": "error", "message": "当前 COMSOL 模型无 result() 接口"}
-            res = model.result()
-            if not hasattr(res, "table"):
-                return {"status": "error", "message": "result().table() 不可用"}
-            tbl = res.table(table_tag) if callable(res.table()) else res.table().get(table_tag)
-            if tbl is None:
-                return {"status": "error", "message": f"表格不存在: {table_tag}"}
-            path = Path(out_path)
-            path.parent.mkdir(parents=True, exist_ok=True)
-            if hasattr(tbl, "saveFile"):
-                tbl.saveFile(str(path.resolve()))
-            else:
-                return {"status": "error", "message": "当前 COMSOL 版本表格无 saveFile()"}
-            _save_model_avoid_lock(model, Path(model_path))
+            self._do_table_export(model, table_tag, out_path)
+            _save_model_avoid_lock(model, _absolute_path(model_path))
             return {"status": "success", "message": f"已导出表格到 {out_path}", "path": out_path}
         except Exception as e:
-            logger.warning("table_export 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.warning("table_export 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
-    def _materials_api(self, model):
-        """Return the material sequence, preferring the component scope."""
-        try:
-            if self._node_list_has(model.component(), "comp1") and hasattr(
-                model.component("comp1"), "material"
-            ):
-                return model.component("comp1").material()
-        except Exception:
-            pass
-        try:
-            if hasattr(model, "materials"):
-                return model.materials()
-            if hasattr(model, "material"):
-                return model.material()
-        except Exception as e:
-            raise RuntimeError(f"COMSOL material API unavailable: {e}") from e
-        raise RuntimeError("Current COMSOL model object has no material API")
+    def export_many(
+        self, model_path: str, items: List[Dict[str, Any]], save_to_path: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """一次加载模型，依次执行多个导出，最后只保存一次。
+        items 每项为 {"kind": "image" | "data" | "table", ...对应单项导出方法的参数}；
+        image/data 未给 tag 时按顺序分配 img1、img2 / data1、data2，避免导出节点重名。"""
+        kinds = {"image": "export_plot_image", "data": "export_data", "table": "table_export"}
+        counters = {"image": 0, "data": 0}
+        ops = []
+        for item in items or []:
+            args = dict(item or {})
+            kind = args.pop("kind", None)
+            if kind in counters:
+                counters[kind] += 1
+                args.setdefault("tag", f"{'img' if kind == 'image' else 'data'}{counters[kind]}")
+            ops.append({"kind": kinds.get(kind, kind), "args": args})
+        return self.apply_operations(model_path, ops, save_to_path=save_to_path)
 
-    def _material_feature(self, model, name: str):
-        """Return a material feature, preferring the component scope."""
-        try:
-            if self._node_list_has(model.component(), "comp1"):
-                return model.component("comp1").material(name)
-        except Exception:
-            pass
-        try:
-            if hasattr(model, "materials"):
-                return model.materials(name)
-            if hasattr(model, "material"):
-                return model.material(name)
-        except Exception as e:
-            raise RuntimeError(f"Failed to get material feature {name!r}: {e}") from e
-        raise RuntimeError("Current COMSOL model object has no material feature API")
+    @staticmethod
+    def _export_feature(model, tag: str, types: Tuple[str, ...]):
+        """取得 result().export() 下名为 tag 的导出节点；不存在时依次尝试按 types 创建。"""
+        if not _has_cap(model, "result"):
+            raise RuntimeError("当前 COMSOL 模型无 result() 接口")
+        res = model.result()
+        if not _has_cap(res, "export"):
+            raise RuntimeError("result().export() 不可用")
+        exp_list = res.export()
+        if not JavaAPIController._tags_contain(exp_list, tag):
+            for i, export_type in enumerate(types):
+                try:
+                    exp_list.create(tag, export_type)
+                    break
+                except Exception as e:
+                    if i == len(types) - 1:
+                        raise RuntimeError(f"无法创建 {types[0]} 导出: {e}") from e
+        return exp_list(tag) if callable(exp_list) else exp_list.get(tag)
 
-    def _find_unused_material_name(self, model, base: str) -> str:
-        """在模型中找一个未使用的材料名称，如 mat1 -> mat2, mat3 ..."""
-        mat_seq = self._materials_api(model)
-        existing = set(self._tags_or_names(mat_seq))
+    def _do_export_plot_image(
+        self,
+        model,
+        plot_group_tag: str,
+        out_path: str,
+        width: int = 800,
+        height: int = 600,
+        tag: str = "img1",
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        target = _export_target(out_path)
+        feat = self._export_feature(model, tag, ("Image", "Plot"))
+        if feat is not None:
+            feat.set("filename", target)
+            feat.set("width", str(width))
+            feat.set("height", str(height))
+            if plot_group_tag:
+                try:
+                    feat.set("plotgroup", plot_group_tag)
+                except Exception:
+                    pass
+            _set_params_lenient(feat, kwargs)
+            if _has_cap(feat, "run"):
+                feat.run()
+        return {"path": out_path, "tag": tag}
+
+    def _do_export_data(
+        self,
+        model,
+        dataset_or_plot_tag: str,
+        out_path: str,
+        export_type: str = "Data",
+        tag: str = "data1",
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        target = _export_target(out_path)
+        feat = self._export_feature(model, tag, (export_type or "Data",))
+        if feat is not None:
+            feat.set("filename", target)
+            feat.set("data", dataset_or_plot_tag)
+            _set_params_lenient(feat, kwargs)
+            if _has_cap(feat, "run"):
+                feat.run()
+        return {"path": out_path, "tag": tag}
+
+    def _do_table_export(self, model, table_tag: str, out_path: str) -> Dict[str, Any]:
+        if not _has_cap(model, "result"):
+            raise RuntimeError("当前 COMSOL 模型无 result() 接口")
+        res = model.result()
+        if not _has_cap(res, "table"):
+            raise RuntimeError("result().table() 不可用")
+        tbl = res.table(table_tag) if callable(res.table()) else res.table().get(table_tag)
+        if tbl is None:
+            raise RuntimeError(f"表格不存在: {table_tag}")
+        if not _has_cap(tbl, "saveFile"):
+            raise RuntimeError("当前 COMSOL 版本表格无 saveFile()")
+        tbl.saveFile(_export_target(out_path))
+        return {"path": out_path, "table": table_tag}
+
+    def _find_unused_material_name(self, model, base: str, existing: Optional[set] = None) -> str:
+        """在模型中找一个未使用的材料名称，如 mat1 -> mat2, mat3 ...
+        existing 为调用方持有的已用名称集合（循环内连续创建时只取一次 tags），选中的名称会加入其中。"""
+        if existing is None:
+            existing = set(self._tags_or_names(self._materials_api(model)))
+        name = self._pick_unused_material_name(existing, base)
+        existing.add(name)
+        return name
+
+    @staticmethod
+    def _pick_unused_material_name(existing: set, base: str) -> str:
+        """一次扫描已用名称中 base[_]N 的最大后缀 N，返回 base 接 N+1（不逐个试探候选名）。"""
         if base not in existing:
             return base
-        for i in range(1, 100):
-            candidate = f"{base}{i}" if base[-1].isdigit() else f"{base}_{i}"
-            if candidate not in existing:
-                return candidate
-        return f"{base}_new"
+        pattern = re.compile(rf"{re.escape(base)}_?(\d+)")
+        suffix = max(
+            (int(m.group(1)) for m in map(pattern.fullmatch, existing) if m is not None),
+            default=0,
+        )
+        sep = "" if base[-1].isdigit() else "_"
+        return f"{base}{sep}{suffix + 1}"
+
+    def _find_unused_physics_name(self, model, base: str, existing: Optional[set] = None) -> str:
+        """在模型中找一个未使用的物理场名称，如 ht0 -> ht1, solid0 -> solid1 ...
+        existing 同 _find_unused_material_name：由调用方在循环外取一次，选中的名称会加入其中。"""
+        if existing is None:
+            existing = set(self._tags_or_names(self._physics_api(model)))
+        name = self._pick_unused_physics_name(existing, base)
+        existing.add(name)
+        return name
 
-    def _find_unused_physics_name(self, model, base: str) -> str:
-        """在模型中找一个未使用的物理场名称，如 ht0 -> ht1, solid0 -> solid1 ..."""
-        ph_seq = self._physics_api(model)
-        existing = set(self._tags_or_names(ph_seq))
+    @staticmethod
+    def _pick_unused_physics_name(existing: set, base: str) -> str:
         if base not in existing:
             return base
         # 若 base 以数字结尾（如 ht0、solid0），尝试递增：ht1, ht2...
@@ -1576,7 +2683,7 @@ class JavaAPIController:
             name = self._find_unused_physics_name(model, base)
             return {"status": "success", "name": name, "base": base}
         except Exception as e:
-            logger.warning("generate_unique_physics_name 失败: %s", e)
+            logger.warning("generate_unique_physics_name 失败: {}", e)
             return {"status": "error", "message": str(e), "name": base}
 
     def generate_unique_study_name(self, model_path: str, base: str = "std") -> Dict[str, Any]:
@@ -1586,7 +2693,7 @@ class JavaAPIController:
             name = self._find_unused_study_name(model, base)
             return {"status": "success", "name": name, "base": base}
         except Exception as e:
-            logger.warning("generate_unique_study_name 失败: %s", e)
+            logger.warning("generate_unique_study_name 失败: {}", e)
             return {"status": "error", "message": str(e), "name": base}
 
     def add_materials(
@@ -1605,79 +2712,103 @@ class JavaAPIController:
                 saved_path = _save_model_to_new_path(model, Path(save_to_path))
             else:
                 # 始终保存到新路径，避免同一进程内覆盖 model_path 导致「模型文件被占用」
-                p = Path(model_path).resolve()
+                p = _absolute_path(model_path)
                 default_save = p.parent / f"{p.stem}_material.mph"
                 saved_path = _save_model_to_new_path(model, default_save)
             out = {"status": "success", "message": "材料设置成功", "result": result}
-            out["saved_path"] = str(saved_path.resolve())
+            out["saved_path"] = str(saved_path)
             return out
         except Exception as e:
-            logger.error(f"添加材料失败: {e}")
+            _discard_cached_model(model_path)
+            logger.error("添加材料失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def _add_materials_direct(self, model, material_plan: MaterialPlan) -> Dict[str, Any]:
         mat_seq = self._materials_api(model)
+        # 循环前一次性取出 pydantic 字段，循环体内只读局部变量
+        mats = tuple(material_plan.materials)
+        assigns = tuple(material_plan.assignments)
         added = []
+        used_names = set(self._tags_or_names(mat_seq))  # 新分配的名称随时加入，不再逐个查询
         name_map = {}  # 请求名 -> 实际使用名（智能创建时可能不同）
-        for mat_def in material_plan.materials:
-            actual_name = self._find_unused_material_name(model, mat_def.name)
+        handles = {}  # 实际使用名 -> 创建时取得的材料节点，分配阶段直接复用
+        # 第一遍只在内存中的已用名称集合上分配实际名称，不经 JNI
+        planned = []
+        for mat_def in mats:
+            actual_name = self._find_unused_material_name(model, mat_def.name, used_names)
             name_map[mat_def.name] = actual_name
-            mat_seq.create(actual_name)
-            feat = self._material_feature(model, actual_name)
-            if mat_def.label:
-                try:
-                    feat.label(mat_def.label)
-                except Exception:
-                    pass
-
-            if mat_def.builtin_name:
-                try:
-                    feat.materialType("lib")
-                    feat.set("family", mat_def.builtin_name)
-                except Exception:
-                    logger.warning("内置材料加载失败: %s，将使用自定义属性", mat_def.builtin_name)
-                    _ensure_material_thermal_k(feat, mat_def)
-                _ensure_material_heat_properties(feat, mat_def)
-            else:
-                group = mat_def.property_group or "def"
-                prop_group = _material_property_group(feat, group)
-                prop_names_lower = [p.name.strip().lower() for p in mat_def.properties]
-                has_k = any(
-                    n in ("k", "thermalconductivity", "thermal conductivity")
-                    for n in prop_names_lower
+            planned.append((mat_def, actual_name))
+        # 第二遍创建并写入属性；中途失败时删除本次已建节点再抛出，内存模型不留半成品
+        created = []
+        try:
+            for mat_def, actual_name in planned:
+                mat_seq.create(actual_name)
+                created.append(actual_name)
+                feat = self._material_feature(model, actual_name)
+                handles[actual_name] = feat
+                self._populate_material(feat, mat_def)
+                added.append(
+                    {
+                        "material": actual_name,
+                        "label": mat_def.label,
+                        "requested_name": mat_def.name,
+                    }
                 )
-                for prop in mat_def.properties:
-                    name_to_set = MATERIAL_PROPERTY_COMSOL_ALIAS.get(prop.name, prop.name)
-                    value_to_set = _comsol_value(prop.value, prop.unit or None)
-                    try:
-                        prop_group.set(name_to_set, value_to_set)
-                    except Exception:
-                        try:
-                            prop_group.set(prop.name, value_to_set)
-                        except Exception as e2:
-                            logger.warning(
-                                f"设置材料属性 {prop.name}（或 {name_to_set}）失败: {e2}"
-                            )
-                if not has_k:
-                    _ensure_material_thermal_k(feat, mat_def)
-                _ensure_material_heat_properties(feat, mat_def)
-            added.append(
-                {"material": actual_name, "label": mat_def.label, "requested_name": mat_def.name}
-            )
+        except Exception:
+            for name in reversed(created):
+                try:
+                    mat_seq.remove(name)
+                except Exception as e:
+                    logger.warning("回滚材料 {} 失败: {}", name, e)
+            raise
 
-        for assignment in material_plan.assignments:
+        for assignment in assigns:
             mat_name = name_map.get(assignment.material_name, assignment.material_name)
+            assign_all, domain_ids = assignment.assign_all, assignment.domain_ids
             try:
-                feat = self._material_feature(model, mat_name)
-                if assignment.assign_all:
+                feat = handles.get(mat_name) or self._material_feature(model, mat_name)
+                if assign_all:
                     feat.selection().all()
-                elif assignment.domain_ids:
-                    feat.selection().set(assignment.domain_ids)
+                elif domain_ids:
+                    feat.selection().set(_jint_array(domain_ids))
             except Exception as e:
-                logger.warning("材料分配失败 %s: %s", mat_name, e)
+                logger.warning("材料分配失败 {}: {}", mat_name, e)
 
         return {"materials": added}
 
+    @staticmethod
+    def _populate_material(feat, mat_def: MaterialDefinition) -> None:
+        """为新建材料节点写入标签与属性：内置材料按 family 加载，否则逐个写入自定义属性并补齐热属性。"""
+        label, builtin = mat_def.label, mat_def.builtin_name
+        if label:
+            try:
+                feat.label(label)
+            except Exception:
+                pass
+        if builtin:
+            try:
+                feat.materialType("lib")
+                feat.set("family", builtin)
+            except Exception:
+                logger.warning("内置材料加载失败: {}，将使用自定义属性", builtin)
+                _ensure_material_thermal_k(feat, mat_def)
+            _ensure_material_heat_properties(feat, mat_def)
+            return
+        prop_group = _material_property_group(feat, mat_def.property_group or "def")
+        has_k = False
+        for prop in mat_def.properties:
+            prop_name = prop.name
+            if prop_name.strip().lower() in ("k", "thermalconductivity", "thermal conductivity"):
+                has_k = True
+            value_to_set = _comsol_value(prop.value, prop.unit or None)
+            try:
+                _set_aliased_property(prop_group, prop_group.set, prop_name, value_to_set)
+            except Exception as e:
+                logger.warning("设置材料属性 {} 失败: {}", prop_name, e)
+        if not has_k:
+            _ensure_material_thermal_k(feat, mat_def)
+        _ensure_material_heat_properties(feat, mat_def)
+
     # ===== Physics =====
 
     def add_physics(
@@ -1695,17 +2826,18 @@ class JavaAPIController:
                 saved_path = _save_model_to_new_path(model, Path(save_to_path))
             else:
                 saved_path = _save_model_avoid_lock(
-                    model, Path(model_path), allow_fallback=not run_single_file
+                    model, _absolute_path(model_path), allow_fallback=not run_single_file
                 )
             failures = result.get("failures", []) if isinstance(result, dict) else []
             out = {"status": "success", "message": "物理场设置成功", "result": result}
             if failures:
                 out["status"] = "warning"
                 out["message"] = f"物理场已创建，但存在 {len(failures)} 个子操作失败"
-            out["saved_path"] = str(saved_path.resolve())
+            out["saved_path"] = str(saved_path)
             return out
         except Exception as e:
-            logger.error(f"添加物理场失败: {e}")
+            _discard_cached_model(model_path)
+            logger.error("添加物理场失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def _add_physics_direct(self, model, physics_plan: PhysicsPlan) -> Dict[str, Any]:
@@ -1713,170 +2845,182 @@ class JavaAPIController:
         geom_tag = "geom1"
         added = []
         failures = []
-        for i, field in enumerate(physics_plan.fields):
-            tag = PHYSICS_TYPE_TO_COMSOL_TAG.get(field.type, "HeatTransfer")
-            base_name = self._physics_interface_name(field.type, i)
-            name = self._find_unused_physics_name(model, base_name)
-            ph_seq = self._physics_api(model)
+        fields = tuple(physics_plan.fields)
+        couplings = tuple(physics_plan.couplings)
+        physics_tag = PHYSICS_TYPE_TO_COMSOL_TAG.get
+        # 物理场列表句柄在循环外取一次，取已用名称与逐个 create 共用
+        ph_seq = self._physics_api(model) if fields else None
+        used_names = set(self._tags_or_names(ph_seq)) if fields else set()
+        for i, field in enumerate(fields):
+            field_type = field.type
+            bcs = tuple(field.boundary_conditions)
+            dcs = tuple(field.domain_conditions)
+            ics = tuple(field.initial_conditions)
+            tag = physics_tag(field_type, "HeatTransfer")
+            base_name = self._physics_interface_name(field_type, i)
+            name = self._find_unused_physics_name(model, base_name, used_names)
+            # create() 返回新建节点，直接复用，省去再按名称查找的 JNI 往返
+            ph_feat = None
             try:
-                ph_seq.create(name, tag, geom_tag)
+                ph_feat = ph_seq.create(name, tag, geom_tag)
             except Exception as e:
-                logger.warning("物理场 create 失败，尝试 fallback: %s", e)
+                logger.warning("物理场 create 失败，尝试 fallback: {}", e)
                 try:
-                    if self._node_list_has(model.component(), "comp1"):
-                        model.component("comp1").physics().create(name, tag, geom_tag)
-                    else:
-                        model.physics().create(name, tag, geom_tag)
+                    ph_feat = self._component(model).physics().create(name, tag, geom_tag)
                 except Exception as e2:
                     failures.append(
                         {
                             "kind": "physics_interface",
                             "name": name,
-                            "field_type": field.type,
+                            "field_type": field_type,
                             "error": str(e2),
                         }
                     )
-                    logger.warning("物理场 fallback create 失败 %s: %s", name, e2)
+                    logger.warning("物理场 fallback create 失败 {}: {}", name, e2)
                     continue
 
-            ph_feat = self._physics_feature(model, name)
-            if field.type == "heat":
+            if ph_feat is None:
+                ph_feat = self._physics_feature(model, name)
+            is_heat = field_type == "heat"
+            if is_heat:
                 try:
-                    model.param().set("k", "237[W/(m*K)]")
-                    model.param().set("rho", "2700[kg/m^3]")
-                    model.param().set("Cp", "900[J/(kg*K)]")
+                    param = model.param()
+                    param.set("k", "237[W/(m*K)]")
+                    param.set("rho", "2700[kg/m^3]")
+                    param.set("Cp", "900[J/(kg*K)]")
                 except Exception as e:
-                    logger.warning("璁剧疆榛樿鐑潗鏂欏弬鏁板け璐? %s", e)
+                    logger.warning("璁剧疆榛樿鐑潗鏂欏弬鏁板け璐? {}", e)
                 try:
                     solid = ph_feat.feature("solid1")
-                    for key, value in {
-                        "k_mat": "userdef",
-                        "k": "237[W/(m*K)]",
-                        "rho_mat": "userdef",
-                        "rho": "2700[kg/m^3]",
-                        "Cp_mat": "userdef",
-                        "Cp": "900[J/(kg*K)]",
-                    }.items():
-                        try:
-                            solid.set(key, value)
-                        except Exception:
-                            pass
+                    _set_params_lenient(solid, _HEAT_SOLID_DEFAULTS)
                 except Exception as e:
-                    logger.warning("璁剧疆 HeatTransfer solid1 榛樿鐑睘鎬уけ璐? %s", e)
-            # Boundary conditions
-            for bc in field.boundary_conditions:
-                try:
-                    feature_type = (
-                        _heat_boundary_feature_type(bc.condition_type)
-                        if field.type == "heat"
-                        else bc.condition_type
-                    )
+                    logger.warning("璁剧疆 HeatTransfer solid1 榛樿鐑睘鎬уけ璐? {}", e)
+            # 边界条件与域条件共用一个循环：按类别决定特征类型与 create 维度
+            for kind, label, conds in (
+                ("boundary_condition", "边界条件", bcs),
+                ("domain_condition", "域条件", dcs),
+            ):
+                is_bc = kind == "boundary_condition"
+                heat_bc = is_heat and is_bc
+                for cond in conds:
+                    cond_name, cond_type = cond.name, cond.condition_type
                     try:
-                        ph_feat.create(bc.name, feature_type, 1)
-                    except Exception:
-                        ph_feat.create(bc.name, feature_type)
-                    if isinstance(bc.selection, list) and bc.selection:
-                        ph_feat.feature(bc.name).selection().set(bc.selection)
-                    for k, v in bc.parameters.items():
-                        ph_feat.feature(bc.name).set(
-                            k, _physics_parameter_value(bc.condition_type, k, v)
+                        feature_type = (
+                            _heat_boundary_feature_type(cond_type) if heat_bc else cond_type
                         )
-                except Exception as e:
-                    failures.append(
-                        {
-                            "kind": "boundary_condition",
-                            "interface": name,
-                            "name": bc.name,
-                            "error": str(e),
+                        values = {
+                            k: _physics_parameter_value(cond_type, k, v)
+                            for k, v in cond.parameters.items()
                         }
-                    )
-                    logger.warning(f"设置边界条件 {bc.name} 失败: {e}")
-
-            # Domain conditions
-            for dc in field.domain_conditions:
-                try:
-                    ph_feat.create(dc.name, dc.condition_type)
-                    if isinstance(dc.selection, list) and dc.selection:
-                        ph_feat.feature(dc.name).selection().set(dc.selection)
-                    for k, v in dc.parameters.items():
-                        ph_feat.feature(dc.name).set(
-                            k, _physics_parameter_value(dc.condition_type, k, v)
+                        self._create_physics_condition(
+                            ph_feat,
+                            cond_name,
+                            feature_type,
+                            cond.selection,
+                            values,
+                            dim=1 if is_bc else None,
                         )
-                except Exception as e:
-                    failures.append(
-                        {
-                            "kind": "domain_condition",
-                            "interface": name,
-                            "name": dc.name,
-                            "error": str(e),
-                        }
-                    )
-                    logger.warning(f"设置域条件 {dc.name} 失败: {e}")
+                    except Exception as e:
+                        failures.append(
+                            {"kind": kind, "interface": name, "name": cond_name, "error": str(e)}
+                        )
+                        logger.warning("设置{} {} 失败: {}", label, cond_name, e)
 
-            # Initial conditions
-            for ic in field.initial_conditions:
+            # 初始条件优先写入默认的 init1，句柄只取一次；写入失败时另建 init 节点
+            init_feat = None
+            if ics:
+                try:
+                    init_feat = ph_feat.feature("init1")
+                except Exception:
+                    init_feat = None
+            for ic in ics:
+                ic_name, ic_var, ic_value = ic.name, ic.variable, ic.value
                 try:
-                    ph_feat.feature("init1").set(ic.variable, ic.value)
+                    if init_feat is None:
+                        raise LookupError("init1")
+                    init_feat.set(ic_var, ic_value)
                 except Exception:
                     try:
-                        ph_feat.create(ic.name, "init")
-                        ph_feat.feature(ic.name).set(ic.variable, ic.value)
+                        ic_feat = ph_feat.create(ic_name, "init") or ph_feat.feature(ic_name)
+                        ic_feat.set(ic_var, ic_value)
                     except Exception as e:
                         failures.append(
                             {
                                 "kind": "initial_condition",
                                 "interface": name,
-                                "name": ic.name,
+                                "name": ic_name,
                                 "error": str(e),
                             }
                         )
-                        logger.warning("设置初始条件 %s 失败: %s", ic.name, e)
+                        logger.warning("设置初始条件 {} 失败: {}", ic_name, e)
 
-            added.append({"interface": name, "type": field.type, "tag": tag})
+            added.append({"interface": name, "type": field_type, "tag": tag})
 
         # Multi-physics couplings
-        for coupling in physics_plan.couplings:
-            ctag = COUPLING_TYPE_TO_COMSOL_TAG.get(coupling.type, coupling.type)
+        for coupling in couplings:
+            ctype = coupling.type
+            ctag = COUPLING_TYPE_TO_COMSOL_TAG.get(ctype, ctype)
             try:
-                model.multiphysics().create(coupling.type, ctag)
+                model.multiphysics().create(ctype, ctag)
             except Exception as e:
                 failures.append(
                     {
                         "kind": "coupling",
-                        "name": coupling.type,
+                        "name": ctype,
                         "tag": ctag,
                         "error": str(e),
                     }
                 )
-                logger.warning("创建耦合 %s 失败: %s", coupling.type, e)
+                logger.warning("创建耦合 {} 失败: {}", ctype, e)
 
         return {"interfaces": added, "failures": failures}
 
+    @staticmethod
+    def _create_physics_condition(ph_feat, cond_name, feature_type, selection, values, dim=None):
+        """在物理场节点下创建条件特征，写入选择与参数；create() 返回的句柄直接复用。
+        dim 不为空时先按 create(name, type, dim) 创建，该重载不可用再退回 create(name, type)。"""
+        if dim is None:
+            feat = ph_feat.create(cond_name, feature_type)
+        else:
+            try:
+                feat = ph_feat.create(cond_name, feature_type, dim)
+            except Exception:
+                feat = ph_feat.create(cond_name, feature_type)
+        if feat is None:
+            feat = ph_feat.feature(cond_name)
+        if isinstance(selection, list) and selection:
+            feat.selection().set(_jint_array(selection))
+        if not _bulk_set(feat, values):
+            for k, v in values.items():
+                feat.set(k, v)
+        return feat
+
     @staticmethod
     def _physics_interface_name(physics_type: str, index: int) -> str:
-        prefix_map = {
-            "heat": "ht",
-            "electromagnetic": "emw",
-            "structural": "solid",
-            "fluid": "fluid",
-            "acoustics": "acpr",
-            "piezoelectric": "pzd",
-            "chemical": "chds",
-            "multibody": "mbd",
-        }
-        return f"{prefix_map.get(physics_type, physics_type[:3])}{index}"
+        return f"{PHYSICS_INTERFACE_NAME_PREFIX.get(physics_type, physics_type[:3])}{index}"
+
+    def _geometry_changed(self, model) -> None:
+        """几何或驱动几何的参数被修改：下次 _ensure_geometry_built 需重新 geom.run()。"""
+        with _CACHE_LOCK:
+            if _GEOM_READY.get(id(model)) is model:
+                del _GEOM_READY[id(model)]
 
     def _ensure_geometry_built(self, model) -> None:
+        if _GEOM_READY.get(id(model)) is model:
+            return
         err_msgs = []
         try:
-            if self._node_list_has(model.component(), "comp1") and self._node_list_has(model.component("comp1").geom(), "geom1"):
-                model.component("comp1").geom("geom1").run()
+            comp = self._comp1(model)
+            if comp is not None and self._node_list_has(comp.geom(), "geom1"):
+                comp.geom("geom1").run()
+                _GEOM_READY[id(model)] = model
                 return
         except Exception as e:
             err_msgs.append(f"component.geom run 失败: {e}")
         try:
             if self._node_list_has(model.geom(), "geom1"):
                 model.geom("geom1").run()
+                _GEOM_READY[id(model)] = model
                 return
         except Exception as e:
             err_msgs.append(f"root.geom run 失败: {e}")
@@ -1900,19 +3044,113 @@ class JavaAPIController:
                 saved_path = _save_model_to_new_path(model, Path(save_to_path))
             else:
                 saved_path = _save_model_avoid_lock(
-                    model, Path(model_path), allow_fallback=not run_single_file
+                    model, _absolute_path(model_path), allow_fallback=not run_single_file
                 )
             out = {"status": "success", "message": "网格划分成功", "result": {}}
-            out["saved_path"] = str(saved_path.resolve())
+            out["saved_path"] = str(saved_path)
             return out
         except Exception as e:
-            logger.error(f"生成网格失败: {e}")
+            _discard_cached_model(model_path)
+            logger.error("生成网格失败: {}", e)
+            return {"status": "error", "message": str(e)}
+
+    def build_geom_and_mesh(
+        self,
+        model_path: str,
+        mesh_params: Optional[Dict[str, Any]] = None,
+        save_to_path: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """一次加载模型：构建几何 geom1、划分网格，最后只保存一次。
+        用于导入几何后直接划分网格，避免 import/构建/网格各自加载与保存。"""
+        try:
+            model = self._load_model(model_path)
+            self._ensure_geometry_built(model)
+            self._generate_mesh_direct(model, mesh_params or {})
+            if save_to_path:
+                saved_path = _save_model_to_new_path(model, Path(save_to_path))
+            else:
+                saved_path = _save_model_avoid_lock(model, _absolute_path(model_path))
+            return {
+                "status": "success",
+                "message": "几何构建与网格划分成功",
+                "saved_path": str(saved_path),
+            }
+        except Exception as e:
+            _discard_cached_model(model_path)
+            logger.error("构建几何并划分网格失败: {}", e)
+            return {"status": "error", "message": str(e)}
+
+    def start_mesh(
+        self,
+        model_path: str,
+        mesh_params: Optional[Dict[str, Any]] = None,
+        save_to_path: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """在后台线程中划分网格并保存，立即返回；之后用 mesh_status 轮询进度与结果。
+        同一模型已有未结束的任务时不重复启动。任务结束前对该模型的其他调用返回“模型正忙”错误。"""
+        key = str(_absolute_path(model_path))
+        job = self._mesh_jobs.get(key)
+        if job is not None and job["thread"].is_alive():
+            return {"status": "success", "message": "网格任务仍在运行", "running": True}
+        try:
+            model = self._load_model(model_path)
+        except Exception as e:
+            logger.warning("start_mesh 加载模型失败: {}", e)
             return {"status": "error", "message": str(e)}
+        job = {"started": time.monotonic(), "error": None, "saved_path": None}
+        job["thread"] = threading.Thread(
+            target=self._run_mesh_job,
+            args=(job, model, model_path, mesh_params or {}, save_to_path),
+            name=f"mesh-{Path(key).stem}",
+            daemon=True,
+        )
+        self._mesh_jobs[key] = job
+        # 任务结束前缓存条目不被淘汰或丢弃（见 _MODEL_PINS），由 _run_mesh_job 解除
+        _pin_model(key)
+        job["thread"].start()
+        return {"status": "success", "message": "网格任务已启动", "running": True}
+
+    def _run_mesh_job(self, job, model, model_path, mesh_params, save_to_path) -> None:
+        try:
+            self._generate_mesh_direct(model, mesh_params)
+            if save_to_path:
+                saved_path = _save_model_to_new_path(model, Path(save_to_path))
+            else:
+                saved_path = _save_model_avoid_lock(model, _absolute_path(model_path))
+            job["saved_path"] = str(saved_path)
+        except Exception as e:
+            logger.error("后台生成网格失败: {}", e)
+            job["error"] = str(e)
+        finally:
+            _unpin_model(str(_absolute_path(model_path)))
+            if job["error"] is not None:
+                _discard_cached_model(model_path)
+            job["elapsed"] = time.monotonic() - job["started"]
+
+    def mesh_status(self, model_path: str, mesh_tag: str = "mesh1") -> Dict[str, Any]:
+        """查询 start_mesh 启动的网格任务：运行中返回 running/elapsed；结束后附带 mesh_stats 统计。"""
+        job = self._mesh_jobs.get(str(_absolute_path(model_path)))
+        if job is None:
+            return {"status": "error", "message": "该模型没有后台网格任务", "running": False}
+        if job["thread"].is_alive():
+            elapsed = time.monotonic() - job["started"]
+            return {"status": "success", "running": True, "elapsed": elapsed}
+        out = {"running": False, "elapsed": job.get("elapsed")}
+        if job["error"] is not None:
+            return {"status": "error", "message": job["error"], **out}
+        stats = self.mesh_stats(model_path, mesh_tag)
+        out.update(
+            status="success",
+            saved_path=job["saved_path"],
+            num_vertex=stats.get("num_vertex"),
+            num_elem=stats.get("num_elem"),
+        )
+        return out
 
     def _mesh_has(self, mesh_list, tag: str) -> bool:
-        if hasattr(mesh_list, "has"):
+        if _has_cap(mesh_list, "has"):
             return mesh_list.has(tag)
-        if hasattr(mesh_list, "hasTag"):
+        if _has_cap(mesh_list, "hasTag"):
             return mesh_list.hasTag(tag)
         return False
 
@@ -1921,22 +3159,24 @@ class JavaAPIController:
         geom_tag = "geom1"
         hauto = mesh_params.get("hauto", 5) if isinstance(mesh_params, dict) else 5
         try:
-            if self._node_list_has(model.component(), "comp1"):
-                mesh_seq = model.component("comp1").mesh()
+            comp = self._comp1(model)
+            if comp is not None:
+                mesh_seq = comp.mesh()
                 if not self._mesh_has(mesh_seq, mesh_name):
                     try:
                         mesh_seq.create(mesh_name, geom_tag)
                     except Exception:
                         mesh_seq.create(mesh_name)
+                mesh = comp.mesh(mesh_name)
                 try:
-                    model.component("comp1").mesh(mesh_name).create("size", "Size")
+                    mesh.create("size", "Size")
                 except Exception:
                     pass
                 try:
-                    model.component("comp1").mesh(mesh_name).feature("size").set("hauto", hauto)
+                    mesh.feature("size").set("hauto", hauto)
                 except Exception:
                     pass
-                model.component("comp1").mesh(mesh_name).run()
+                mesh.run()
                 return
         except Exception:
             pass
@@ -1970,41 +3210,51 @@ class JavaAPIController:
                 saved_path = _save_model_to_new_path(model, Path(save_to_path))
             else:
                 saved_path = _save_model_avoid_lock(
-                    model, Path(model_path), allow_fallback=not run_single_file
+                    model, _absolute_path(model_path), allow_fallback=not run_single_file
                 )
             failures = result.get("failures", []) if isinstance(result, dict) else []
             out = {"status": "success", "message": "研究配置成功", "result": result}
             if failures:
                 out["status"] = "warning"
                 out["message"] = f"研究已创建，但存在 {len(failures)} 个子操作失败"
-            out["saved_path"] = str(saved_path.resolve())
+            out["saved_path"] = str(saved_path)
             return out
         except Exception as e:
-            logger.error(f"配置研究失败: {e}")
+            _discard_cached_model(model_path)
+            logger.error("配置研究失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def _configure_study_direct(self, model, study_plan: StudyPlan) -> Dict[str, Any]:
         added = []
         failures = []
-        for i, st in enumerate(study_plan.studies):
-            step_type = STUDY_TYPE_TO_COMSOL_TAG.get(st.type, "Stationary")
+        study_tag = STUDY_TYPE_TO_COMSOL_TAG.get
+        for i, st in enumerate(tuple(study_plan.studies)):
+            st_type, ps = st.type, st.parametric_sweep
+            step_type = study_tag(st_type, "Stationary")
             base_name = f"std{i + 1}"
             name = self._find_unused_study_name(model, base_name)
-            model.study().create(name)
-            model.study(name).create("std", step_type)
+            # create() 返回的节点句柄直接复用，不再每次经 model.study(name).feature(...) 重新查找
+            study = model.study().create(name)
+            if study is None:
+                study = model.study(name)
+            step = study.create("std", step_type)
             try:
-                model.study(name).feature("std").set("rtol", "0.05")
+                (step if step is not None else study.feature("std")).set("rtol", "0.05")
             except Exception:
                 pass
 
-            if st.parametric_sweep:
-                ps = st.parametric_sweep
+            if ps:
                 try:
-                    model.study(name).create("param", "Parametric")
-                    model.study(name).feature("param").set("pname", ps.parameter_name)
-                    model.study(name).feature("param").set(
-                        "prange", f"range({ps.range_start},{ps.step or ''},{ps.range_end})"
-                    )
+                    sweep = study.create("param", "Parametric")
+                    if sweep is None:
+                        sweep = study.feature("param")
+                    values = {
+                        "pname": ps.parameter_name,
+                        "prange": f"range({ps.range_start},{ps.step or ''},{ps.range_end})",
+                    }
+                    if not _bulk_set(sweep, values):
+                        for k, v in values.items():
+                            sweep.set(k, v)
                 except Exception as e:
                     failures.append(
                         {
@@ -2013,11 +3263,77 @@ class JavaAPIController:
                             "error": str(e),
                         }
                     )
-                    logger.warning("参数化扫描配置失败: %s", e)
+                    logger.warning("参数化扫描配置失败: {}", e)
 
-            added.append({"study": name, "type": st.type, "tag": step_type})
+            added.append({"study": name, "type": st_type, "tag": step_type})
         return {"studies": added, "failures": failures}
 
+    # ===== 整体计划：一次加载、一次保存 =====
+
+    def apply_plan(
+        self,
+        model_path: str,
+        material_plan: Optional[MaterialPlan] = None,
+        physics_plan: Optional[PhysicsPlan] = None,
+        mesh_params: Optional[Dict[str, Any]] = None,
+        study_plan: Optional[StudyPlan] = None,
+        solve: bool = False,
+        run_single_file: bool = False,
+        save_to_path: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """在同一个已加载模型上依次配置材料、物理场、网格、研究（solve=True 时继续求解），
+        最后只保存一次。各阶段参数为 None 时跳过；某阶段抛错则中止且不保存，返回已完成的阶段。"""
+        logger.info("按整体计划配置模型...")
+        stages = (
+            ("material", material_plan, self._add_materials_direct),
+            ("physics", physics_plan, self._add_physics_direct),
+            ("mesh", mesh_params, self._generate_mesh_direct),
+            ("study", study_plan, self._configure_study_direct),
+            ("solve", True if solve else None, lambda m, _: {"study": self._solve_direct(m)}),
+        )
+        results: Dict[str, Any] = {}
+        try:
+            model = self._load_model(model_path)
+        except Exception as e:
+            logger.error("整体计划加载模型失败: {}", e)
+            return {"status": "error", "message": str(e), "result": results}
+        failures: List[Dict[str, Any]] = []
+        for stage, plan, apply in stages:
+            if plan is None:
+                continue
+            try:
+                res = apply(model, plan)
+            except Exception as e:
+                _discard_cached_model(model_path)
+                logger.error("整体计划阶段 {} 失败: {}", stage, e)
+                return {
+                    "status": "error",
+                    "message": f"{stage} 阶段失败: {e}",
+                    "stage": stage,
+                    "result": results,
+                }
+            results[stage] = res if isinstance(res, dict) else {}
+            for failure in results[stage].get("failures", []):
+                failures.append({"stage": stage, **failure})
+        try:
+            if save_to_path:
+                saved_path = _save_model_to_new_path(model, Path(save_to_path))
+            else:
+                saved_path = _save_model_avoid_lock(
+                    model, _absolute_path(model_path), allow_fallback=not run_single_file
+                )
+        except Exception as e:
+            _discard_cached_model(model_path)
+            logger.error("整体计划保存失败: {}", e)
+            return {"status": "error", "message": str(e), "result": results}
+        out = {"status": "success", "message": "整体计划配置成功", "result": results}
+        if failures:
+            out["status"] = "warning"
+            out["message"] = f"整体计划已完成，但存在 {len(failures)} 个子操作失败"
+            out["failures"] = failures
+        out["saved_path"] = str(saved_path)
+        return out
+
     # ===== Solve =====
 
     def solve(
@@ -2025,36 +3341,70 @@ class JavaAPIController:
         model_path: str,
         run_single_file: bool = False,
         save_to_path: Optional[str] = None,
+        study_tag: Optional[str] = None,
+        run_all: bool = False,
     ) -> Dict[str, Any]:
+        """求解并保存。默认求解最后一个研究；study_tag 指定研究；run_all 时在同一次加载/保存内
+        依次求解全部研究，result["studies"] 给出各研究的结果（单个失败不影响其余研究）。"""
         logger.info("执行求解...")
         try:
             model = self._load_model(model_path)
-            study_name = self._solve_direct(model)
+            if run_all:
+                studies = self._solve_all_direct(model)
+                if not any(v == "success" for v in studies.values()):
+                    raise RuntimeError(f"全部研究求解失败: {studies}")
+                failed = [t for t, v in studies.items() if v != "success"]
+                out = {
+                    "status": "warning" if failed else "success",
+                    "message": f"部分研究求解失败: {', '.join(failed)}" if failed else "求解成功",
+                    "result": {"studies": studies},
+                }
+            else:
+                study_name = self._solve_direct(model, study_tag)
+                out = {"status": "success", "message": "求解成功", "result": {"study": study_name}}
             if save_to_path:
                 saved_path = _save_model_to_new_path(model, Path(save_to_path))
             else:
                 saved_path = _save_model_avoid_lock(
-                    model, Path(model_path), allow_fallback=not run_single_file
+                    model, _absolute_path(model_path), allow_fallback=not run_single_file
                 )
-            out = {"status": "success", "message": "求解成功", "result": {"study": study_name}}
-            out["saved_path"] = str(saved_path.resolve())
+            out["saved_path"] = str(saved_path)
             return out
         except Exception as e:
-            logger.error(f"求解失败: {e}")
-            return {"status": "error", "message": str(e)}
-
-    def _solve_direct(self, model) -> str:
-        tags = model.study().tags()
-        if not tags:
-            raise RuntimeError("模型中没有研究，请先配置研究")
-        study_name = tags[-1]
+            _discard_cached_model(model_path)
+            logger.error("求解失败: {}", e)
+            return {"status": "error", "message": _brief_error(e)}
+
+    def _solve_direct(self, model, study_tag: Optional[str] = None) -> str:
+        study_name = study_tag
+        if study_name is None:
+            tags = self._tags_or_names(model.study())
+            if not tags:
+                raise RuntimeError("模型中没有研究，请先配置研究")
+            study_name = tags[-1]
         try:
             model.study(study_name).run()
         except Exception as first_error:
-            logger.warning("默认 study.run() 求解失败，尝试直接求解器 fallback: %s", first_error)
+            logger.warning("默认 study.run() 求解失败，尝试直接求解器 fallback: {}", first_error)
             self._run_stationary_direct_solver(model, study_name)
         return study_name
 
+    def _solve_all_direct(self, model) -> Dict[str, str]:
+        """依次求解模型中的全部研究，返回 {研究 tag: "success" 或错误信息}。
+        同一模型对象非线程安全，研究间还可能共享解数据，故不并发提交。"""
+        tags = self._tags_or_names(model.study())
+        if not tags:
+            raise RuntimeError("模型中没有研究，请先配置研究")
+        studies: Dict[str, str] = {}
+        for tag in tags:
+            try:
+                self._solve_direct(model, tag)
+                studies[tag] = "success"
+            except Exception as e:
+                logger.warning("研究 {} 求解失败: {}", tag, e)
+                studies[tag] = _brief_error(e)
+        return studies
+
     def _run_stationary_direct_solver(self, model, study_name: str) -> str:
         """Create a conservative stationary solver sequence with PARDISO."""
         sol_name = self._find_unused_solver_name(model, "sol1")
@@ -2103,31 +3453,55 @@ class JavaAPIController:
     def execute_direct(
         self, operation: str, model_path: str, parameters: Dict[str, Any]
     ) -> Dict[str, Any]:
-        logger.debug(f"直接调用 Java API: {operation}")
+        logger.debug("直接调用 Java API: {}", operation)
         try:
             model = self._load_model(model_path)
-            if operation == "set_parameter":
-                result = self._set_parameter_direct(model, parameters)
-            elif operation == "add_boundary_condition":
-                result = self._add_boundary_condition_direct(model, parameters)
-            else:
-                raise ValueError(f"不支持的直接操作: {operation}")
-            model.save(model_path)
-            return {"status": "success", "message": f"直接执行 {operation} 成功", "result": result}
+            result = self._do_execute_direct(model, operation, parameters)
+            out = {"status": "success", "message": f"直接执行 {operation} 成功", "result": result}
+            # 参数值未变化时模型无修改，跳过整份 .mph 的序列化与写盘
+            if result.pop("dirty", True):
+                saved_path = _save_model_avoid_lock(model, _absolute_path(model_path))
+                if saved_path != _absolute_path(model_path):
+                    out["saved_path"] = str(saved_path)
+            return out
         except Exception as e:
-            logger.error(f"直接调用 Java API 失败: {e}")
-            return {"status": "error", "message": f"直接调用失败: {e}"}
+            _discard_cached_model(model_path)
+            logger.error("直接调用 Java API 失败: {}", e)
+            return {"status": "error", "message": f"直接调用失败: {_brief_error(e)}"}
+
+    def _do_execute_direct(
+        self, model, operation: str, parameters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """在已加载模型上执行一个直接操作，只修改不保存；参数未变化时结果带 dirty=False。"""
+        parameters = parameters or {}
+        if operation == "set_parameter":
+            return self._set_parameter_direct(model, parameters)
+        if operation == "set_parameters":
+            return self._set_parameters_batch(model, parameters.get("params", parameters))
+        if operation == "add_boundary_condition":
+            return self._add_boundary_condition_direct(model, parameters)
+        raise ValueError(f"不支持的直接操作: {operation}")
+
+    def execute_direct_batch(
+        self, model_path: str, ops: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """依次执行多个直接操作，只加载、保存一次。ops 每项为 execute_direct 的参数：
+        {"operation": ..., "parameters": {...}}。"""
+        batch = [{"kind": "execute_direct", "args": dict(op)} for op in ops or []]
+        return self.apply_operations(model_path, batch)
 
     def validate_execution(
         self, model_path: str, expected_result: Dict[str, Any]
     ) -> Dict[str, Any]:
         try:
-            path = Path(model_path)
-            if not path.exists():
+            path = _absolute_path(model_path)
+            stamp = _file_stamp(path)
+            if stamp is None:
                 return {"status": "error", "message": "模型文件不存在"}
-
-            if path.stat().st_size == 0:
+            if stamp[1] == 0:
                 return {"status": "error", "message": "模型文件为空"}
+            if not _mph_container_ok(path, stamp):
+                return {"status": "error", "message": "模型文件不完整（不是有效的 .mph 压缩容器）"}
 
             expected = expected_result or {}
             tree_info = self.list_model_tree(model_path)
@@ -2245,15 +3619,18 @@ class JavaAPIController:
     ) -> Dict[str, Any]:
         try:
             model = self._load_model(model_path)
+            # 任意官方 API 调用都可能改动几何，保守地标记为需重建
+            self._geometry_changed(model)
             target = self._resolve_api_target(model, target_path)
             result = self._get_comsol_runner().invoke_java_method(target, method_name, *(args or []))
-            saved_path = _save_model_avoid_lock(model, Path(model_path))
+            saved_path = _save_model_avoid_lock(model, _absolute_path(model_path))
             out = {"status": "success", "method": method_name, "result": str(result)}
-            if saved_path != Path(model_path):
+            if saved_path != _absolute_path(model_path):
                 out["saved_path"] = str(saved_path)
             return out
         except Exception as e:
-            logger.error("invoke_official_api 失败: %s", e)
+            _discard_cached_model(model_path)
+            logger.error("invoke_official_api 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def invoke_official_static_api(
@@ -2269,7 +3646,7 @@ class JavaAPIController:
                 "result": str(result),
             }
         except Exception as e:
-            logger.error("invoke_official_static_api 失败: %s", e)
+            logger.error("invoke_official_static_api 失败: {}", e)
             return {"status": "error", "message": str(e)}
 
     def register_official_api_wrappers(
@@ -2438,77 +3815,135 @@ class JavaAPIController:
     # ===== 模型预览（导出几何/结果图为 PNG，供桌面端显示）=====
 
     def export_model_preview(
-        self, model_path: str, width: int = 640, height: int = 480
+        self, model_path: str, width: int = 640, height: int = 480, encoding: str = "base64"
     ) -> Dict[str, Any]:
-        """加载 .mph 模型，导出几何或结果图为 PNG，返回 base64 编码供前端显示。"""
-        path = Path(model_path)
-        if not path.exists():
+        """加载 .mph 模型，导出几何或结果图为 PNG，返回 base64 编码供前端显示。
+
+        装有 Pillow 且 WebP 更小时改传 WebP；mime 字段标明实际格式，前端据此拼 data URI。
+        encoding="raw" 时直接返回 image_bytes（供可传二进制的通道，省去 base64 膨胀与编码）；
+        encoding="path" 时只返回 image_path（本机前端直接读文件，大尺寸预览不经 JSON 传输）；
+        各方式都附 image_size / image_sha256，前端可据此识别未变化的预览、跳过重复传输。
+        同一文件（按 mtime/大小）同一尺寸的预览缓存在进程内，重复请求不再进入 JVM 渲染。"""
+        if encoding not in ("base64", "raw", "path"):
+            return {"status": "error", "message": f"不支持的编码: {encoding}", "image_base64": None}
+        # 一次 stat 同时判断存在性并取缓存键用的时间戳；之后各处沿用同一个绝对路径对象
+        abs_path = _absolute_path(model_path)
+        stamp = _file_stamp(abs_path)
+        if stamp is None:
             return {"status": "error", "message": "模型文件不存在", "image_base64": None}
         try:
-            model = self._load_model(model_path)
-            fd, out_path = tempfile.mkstemp(suffix=".png", prefix="comsol_preview_")
-            try:
-                import os
-
-                os.close(fd)
-            except Exception:
-                pass
-            out_path = Path(out_path)
-            try:
-                geom = self._geom_for_export(model)
-                if geom is not None:
-                    img = geom.image()
-                    img.set("pngfilename", str(out_path.resolve()))
-                    img.set("width", str(width))
-                    img.set("height", str(height))
-                    img.export()
-                else:
-                    raise RuntimeError("无几何节点")
-            except Exception as e1:
-                logger.warning("几何导出失败: %s", e1)
-                if out_path.exists():
-                    out_path.unlink(missing_ok=True)
-                return {"status": "error", "message": f"预览导出失败: {e1}", "image_base64": None}
-            if not out_path.exists():
-                return {"status": "error", "message": "未生成预览图", "image_base64": None}
-            data = out_path.read_bytes()
-            out_path.unlink(missing_ok=True)
-            b64 = base64.b64encode(data).decode("ascii")
-            return {"status": "success", "message": "预览已生成", "image_base64": b64}
-        except Exception as e:
-            logger.exception("export_model_preview 失败")
+            key = (str(abs_path), stamp, int(width), int(height))
+            # 有未落盘修改时内存模型比文件新，不走按文件时间戳的缓存
+            pending = key[0] in _BATCH_DEPTH or key[0] in _DEBOUNCED_SAVES
+            with _CACHE_LOCK:
+                entry = None if pending else _PREVIEW_CACHE.get(key)
+                if entry is not None:
+                    _PREVIEW_CACHE.move_to_end(key)
+            if entry is None:
+                data, mime = self._render_preview(abs_path, width, height)
+                entry = (data, mime, hashlib.sha256(data).hexdigest())
+                if not pending:
+                    with _CACHE_LOCK:
+                        _PREVIEW_CACHE[key] = entry
+                        while len(_PREVIEW_CACHE) > _PREVIEW_CACHE_MAX:
+                            _PREVIEW_CACHE.popitem(last=False)
+            data, mime, digest = entry
+            out = {
+                "status": "success",
+                "message": "预览已生成",
+                "mime": mime,
+                "image_size": len(data),
+                "image_sha256": digest,
+            }
+            if encoding == "raw":
+                out["image_bytes"] = data
+            elif encoding == "path":
+                out["image_path"] = str(_preview_file(data, mime, digest))
+            else:
+                out["image_base64"] = _b64encode(data).decode("ascii")
+            return out
+        except Exception as e:
+            logger.warning("export_model_preview 失败: {}", e)
             return {"status": "error", "message": str(e), "image_base64": None}
 
-    def _geom_for_export(self, model):
-        """获取用于导出的几何对象。"""
-        try:
-            if self._node_list_has(model.component(), "comp1") and self._node_list_has(model.component("comp1").geom(), "geom1"):
-                return model.component("comp1").geom("geom1")
-        except Exception:
-            pass
+    def _render_preview(self, model_path, width: int, height: int) -> Tuple[bytes, str]:
+        """在 JVM 中渲染几何预览，返回 (图像字节, MIME)。PNG 写到本线程复用的预览槽文件，
+        不再每次 mkstemp/unlink；以导出前后的文件时间戳判断本次是否真的写出了图像。"""
+        model = self._load_model(model_path, readonly=True)
+        out_path = _preview_slot()
+        before = _file_stamp(out_path)
         try:
-            if self._node_list_has(model.geom(), "geom1"):
-                return model.geom("geom1")
-        except Exception:
-            pass
+            geom = self._geom_for_export(model)
+            if geom is None:
+                raise RuntimeError("无几何节点")
+            img = geom.image()
+            props = {"pngfilename": str(out_path), "width": str(width), "height": str(height)}
+            if not _bulk_set(img, props):
+                for k, v in props.items():
+                    img.set(k, v)
+            img.export()
+            after = _file_stamp(out_path)
+            data = out_path.read_bytes() if after is not None and after != before else b""
+        except Exception as e:
+            raise RuntimeError(f"预览导出失败: {e}") from e
+        if not data:
+            raise RuntimeError("未生成预览图")
+        return _compact_preview(data)
+
+    def _geom_for_export(self, model):
+        """获取用于导出的几何对象：依次在 comp1 与模型根下按 tag 成员判断查找 geom1。
+        comp1 取自按模型缓存的入口，接口有无用 _has_cap 判断，正常路径不靠抛/捕 Java 异常分派。"""
+        for scope in (self._comp1(model), model):
+            if scope is None or not _has_cap(scope, "geom"):
+                continue
+            if self._node_list_has(scope.geom(), "geom1"):
+                return scope.geom("geom1")
         return None
 
     def _set_parameter_direct(self, model, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """设置全局参数：单个（name/value）或多个（params: {name: value}，一次取 param() 批量写入）。"""
+        values = parameters.get("params")
+        if isinstance(values, dict) and values:
+            return self._set_parameters_batch(model, values)
         param_name = parameters.get("name")
         param_value = parameters.get("value")
         if not param_name or param_value is None:
             raise ValueError("参数名称和值必须提供")
-        model.param().set(param_name, param_value)
+        param = model.param()
+        if _param_unchanged(param, param_name, param_value):
+            return {"parameter": param_name, "value": param_value, "dirty": False}
+        self._geometry_changed(model)
+        param.set(param_name, param_value)
         return {"parameter": param_name, "value": param_value}
 
+    def _set_parameters_batch(self, model, params: Dict[str, Any]) -> Dict[str, Any]:
+        """一次写入多个全局参数：param() 只取一次，已是目标值的跳过，其余走 set(String[], String[])
+        一次 JNI 调用；该重载不可用时在同一句柄上逐个 set。"""
+        if not params:
+            raise ValueError("参数字典不能为空")
+        param = model.param()
+        changed = {k: v for k, v in params.items() if not _param_unchanged(param, k, v)}
+        if not changed:
+            return {"parameters": dict(params), "dirty": False}
+        # 参数可能驱动几何尺寸，改动后几何需重建
+        self._geometry_changed(model)
+        if not _bulk_set(param, changed):
+            for k, v in changed.items():
+                param.set(k, v)
+        return {"parameters": dict(params)}
+
     def _add_boundary_condition_direct(self, model, parameters: Dict[str, Any]) -> Dict[str, Any]:
         physics_name = parameters.get("physics_name", "ht")
         boundary_name = parameters.get("boundary_name", "bc1")
         condition_type = parameters.get("condition_type", "Temperature")
         ph_feat = self._physics_feature(model, physics_name)
-        ph_feat.create(boundary_name, condition_type)
-        for k, v in parameters.get("params", {}).items():
-            ph_feat.feature(boundary_name).set(k, v)
+        bc_feat = ph_feat.create(boundary_name, condition_type)
+        if bc_feat is None:
+            bc_feat = ph_feat.feature(boundary_name)
+        params = parameters.get("params", {})
+        if not _bulk_set(bc_feat, params):
+            for k, v in params.items():
+                bc_feat.set(k, v)
         return {"physics": physics_name, "boundary": boundary_name, "type": condition_type}
 
     # ===== Globals / case extraction / ops catalog =====
@@ -2537,7 +3972,7 @@ class JavaAPIController:
         definitions: List[Dict[str, Any]],
         save_to_path: Optional[str] = None,
     ) -> Dict[str, Any]:
-        path = Path(model_path).resolve()
+        path = _absolute_path(model_path)
         if not path.exists():
             return {"status": "error", "message": f"model file not found: {path}"}
         if not isinstance(definitions, list) or not definitions:
@@ -2597,9 +4032,10 @@ class JavaAPIController:
             }
 
         try:
-            model = self._load_model(str(path))
+            model = self._load_model(path)
+            self._geometry_changed(model)
             param_api = model.param()
-            if param_api is None or not hasattr(param_api, "set"):
+            if param_api is None or not _has_cap(param_api, "set"):
                 return {
                     "status": "error",
                     "message": "model.param() API is unavailable in current COMSOL version",
@@ -2618,7 +4054,7 @@ class JavaAPIController:
                     except Exception:
                         param_api.set(definition.name, expression)
                         try:
-                            if hasattr(param_api, "descr"):
+                            if _has_cap(param_api, "descr"):
                                 param_api.descr(definition.name, definition.description)
                         except Exception:
                             pass
@@ -2634,7 +4070,7 @@ class JavaAPIController:
                     }
                 )
 
-            target = Path(save_to_path).resolve() if save_to_path else path
+            target = _absolute_path(save_to_path) if save_to_path else path
             if save_to_path:
                 saved_path = _save_model_to_new_path(model, target)
             else:
@@ -2648,17 +4084,18 @@ class JavaAPIController:
                 "saved_path": str(saved_path),
             }
         except Exception as e:
+            _discard_cached_model(path)
             msg = self._normalize_comsol_error(e)
             logger.exception("define_global_parameters failed")
             return {"status": "error", "message": msg}
 
     def list_global_parameters(self, model_path: str) -> Dict[str, Any]:
-        path = Path(model_path).resolve()
+        path = _absolute_path(model_path)
         if not path.exists():
             return {"status": "error", "message": f"model file not found: {path}", "items": []}
 
         try:
-            model = self._load_model(str(path))
+            model = self._load_model(path, readonly=True)
             param_api = model.param()
             if param_api is None:
                 return {
@@ -2669,11 +4106,11 @@ class JavaAPIController:
 
             names: List[str] = []
             for getter in ("varnames", "names", "tags"):
-                if hasattr(param_api, getter):
+                if _has_cap(param_api, getter):
                     try:
                         raw = getattr(param_api, getter)()
                         if raw is not None:
-                            names = [str(x) for x in raw]
+                            names = _java_strings(raw)
                             break
                     except Exception:
                         continue
@@ -2684,7 +4121,7 @@ class JavaAPIController:
                 description: Optional[str] = None
 
                 for getter in ("get", "evaluate", "expr"):
-                    if hasattr(param_api, getter):
+                    if _has_cap(param_api, getter):
                         try:
                             got = getattr(param_api, getter)(name)
                             if got is not None:
@@ -2693,7 +4130,7 @@ class JavaAPIController:
                         except Exception:
                             continue
 
-                if hasattr(param_api, "descr"):
+                if _has_cap(param_api, "descr"):
                     try:
                         got_desc = param_api.descr(name)
                         if got_desc is not None:
@@ -3376,7 +4813,7 @@ class JavaAPIController:
         )
 
     def extract_model_operation_case(self, model_path: str) -> Dict[str, Any]:
-        path = Path(model_path).resolve()
+        path = _absolute_path(model_path)
         if not path.exists():
             return {"status": "error", "message": f"model file not found: {path}"}
         if path.suffix.lower() != ".mph":
@@ -3526,3 +4963,37 @@ class JavaAPIController:
             "message": "model operation case extracted",
             "case": case.model_dump(mode="json"),
         }
+
+
+# AsyncJavaAPIController 的调用锁：所有外观实例共用，多个实例包装的控制器操作的是同一批缓存模型
+_ASYNC_CALL_LOCK = threading.Lock()
+
+
+class AsyncJavaAPIController:
+    """JavaAPIController 的异步外观：公开方法在 asyncio.to_thread 中执行，不阻塞事件循环。
+    COMSOL 模型对象非线程安全，所有外观实例的调用经同一把进程级锁（_ASYNC_CALL_LOCK）串行执行；
+    batch() 等上下文管理器请直接用同步控制器。"""
+
+    _SYNC_ONLY = frozenset({"batch"})
+
+    def __init__(self, controller: Optional[JavaAPIController] = None):
+        self.sync = controller if controller is not None else JavaAPIController()
+
+    @staticmethod
+    def _call_locked(fn, *args, **kwargs):
+        with _ASYNC_CALL_LOCK:
+            return fn(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or name in self._SYNC_ONLY:
+            raise AttributeError(name)
+        fn = getattr(self.sync, name)
+        if not callable(fn):
+            return fn
+
+        async def _method(*args, **kwargs):
+            return await asyncio.to_thread(self._call_locked, fn, *args, **kwargs)
+
+        _method.__name__ = name
+        _method.__doc__ = fn.__doc__
+        return _method
@@ -0,0 +1,216 @@
+"""STEP 片段提取：按零件名从大装配 STEP 中裁出子集，供 import_geometry 只导入所需零件。"""
+
+import hashlib
+import mmap
+import re
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from agent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 实体编号 -> (起始字节偏移, 结束字节偏移, 实体类型, 引用的实体编号)；复合实体的类型为各部分以空格连接
+StepIndex = Dict[int, Tuple[int, int, str, Tuple[int, ...]]]
+
+_ENTITY_HEAD = re.compile(r"\s*#(\d+)\s*=\s*([A-Z0-9_]*)")
+_TYPE_NAME = re.compile(r"([A-Z_][A-Z0-9_]*)\s*\(")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_REF = re.compile(r"#(\d+)")
+_PRODUCT_ARGS = re.compile(r"PRODUCT\s*\(\s*'((?:[^']|'')*)'\s*,\s*'((?:[^']|'')*)'")
+_DELIM = re.compile(r"[';]")
+_NON_SPACE = re.compile(r"\S")
+
+
+def _step_skim_index(path: Path) -> Tuple[StepIndex, Dict[str, int], int]:
+    """单遍流式扫描 STEP 文件，只记录每个实体的字节区间与引用，不保留实体文本。
+
+    语句按字符串外的 ';' 切分：一行可含多个实体，一个实体也可跨多行；每个实体的区间从 '#'
+    起到 ';' 止。返回 (实体索引, 零件名/零件 id -> PRODUCT 实体编号, DATA 段起始偏移)。"""
+    entities: StepIndex = {}
+    products: Dict[str, int] = {}
+    data_start = -1
+    offset = 0
+    start = -1
+    in_quote = False
+    buf: List[str] = []
+
+    def _record(stmt: str, end: int) -> None:
+        head = _ENTITY_HEAD.match(stmt)
+        if head is None:
+            return
+        eid = int(head.group(1))
+        body = _STRING.sub("''", stmt[head.end() :])
+        kind = head.group(2) or " ".join(_TYPE_NAME.findall(body))
+        entities[eid] = (start, end, kind, tuple(int(r) for r in _REF.findall(body)))
+        if kind == "PRODUCT":
+            args = _PRODUCT_ARGS.search(stmt)
+            if args:
+                for name in args.groups():
+                    if name:
+                        products.setdefault(name.replace("''", "'"), eid)
+
+    with open(path, "rb") as f:
+        for raw in f:
+            # latin-1 单字节解码：字符下标即该行内的字节偏移
+            line = raw.decode("latin-1")
+            line_start = offset
+            offset += len(raw)
+            if data_start < 0:
+                if line.strip().upper() == "DATA;":
+                    data_start = offset
+                continue
+            seg = i = 0
+            while i < len(line):
+                if start < 0:
+                    lead = _NON_SPACE.search(line, i)
+                    if lead is None:
+                        break
+                    seg = i = lead.start()
+                    start = line_start + i
+                delim = _DELIM.search(line, i)
+                if delim is None:
+                    break
+                i = delim.end()
+                if delim.group() == "'":
+                    # '' 转义连续翻转两次，不影响引号内外状态
+                    in_quote = not in_quote
+                    continue
+                if in_quote:
+                    continue
+                buf.append(line[seg:i])
+                _record("".join(buf), line_start + i)
+                buf = []
+                start = -1
+            if start >= 0:
+                buf.append(line[seg:])
+    if data_start < 0:
+        raise ValueError(f"不是有效的 STEP 文件（缺少 DATA 段）: {path}")
+    return entities, products, data_start
+
+
+def _closure(roots: Iterable[int], edges: Callable[[int], Iterable[int]]) -> Set[int]:
+    """从 roots 出发按 edges(eid) 做 BFS，返回可达实体集合（含 roots）。"""
+    seen = set(roots)
+    queue = deque(seen)
+    while queue:
+        for nxt in edges(queue.popleft()):
+            if nxt not in seen:
+                seen.add(nxt)
+                queue.append(nxt)
+    return seen
+
+
+def select_step_entities(entities: StepIndex, products: Dict[str, int], parts) -> Set[int]:
+    """挑出所选零件所需的实体编号（选中装配时包含其下级零件）。
+
+    1. 反向闭包：引用所选 PRODUCT 的实体（PRODUCT_DEFINITION、SHAPE_DEFINITION_REPRESENTATION 等），
+       去掉同时关联未选零件的实体（如连接选中与未选零件的装配关系）；
+    2. 正向闭包：上述实体引用的全部实体（形状表示、几何、上下文）；
+    3. 补齐不关联零件的实体，直到不再变化：引用全部已保留的（协议声明等），或是与已保留实体相连、
+       且不会带入其他零件形状的关系实体（如 SHAPE_REPRESENTATION_RELATIONSHIP 挂接的 B-rep）。"""
+    missing = [p for p in parts if p not in products]
+    if missing:
+        raise ValueError(f"STEP 中未找到零件: {', '.join(missing)}")
+    chosen = {products[p] for p in parts}
+    back: Dict[int, List[int]] = {}
+    for eid, (_, _, _, refs) in entities.items():
+        for ref in refs:
+            back.setdefault(ref, []).append(eid)
+
+    def up(eid: int) -> Iterable[int]:
+        return back.get(eid, ())
+
+    def down(eid: int) -> Iterable[int]:
+        entry = entities.get(eid)
+        return entry[3] if entry else ()
+
+    # 选中装配时连同其下级零件（NEXT_ASSEMBLY_USAGE_OCCURRENCE: 上级 PD -> 下级 PD）
+    all_products = set(products.values())
+
+    def product_of(eid: int) -> int:
+        # PRODUCT_DEFINITION -> PRODUCT_DEFINITION_FORMATION -> PRODUCT
+        for ref in down(eid):
+            if ref in all_products:
+                return ref
+            for sub in down(ref):
+                if sub in all_products:
+                    return sub
+        return -1
+
+    usages = [
+        refs[:2]
+        for _, _, kind, refs in entities.values()
+        if kind == "NEXT_ASSEMBLY_USAGE_OCCURRENCE" and len(refs) >= 2
+    ]
+    grown = True
+    while grown:
+        grown = False
+        for relating, related in usages:
+            child = product_of(related)
+            if child >= 0 and child not in chosen and product_of(relating) in chosen:
+                chosen.add(child)
+                grown = True
+
+    other_owners = _closure(all_products - chosen, up)
+    owners = _closure(chosen, up) - other_owners
+    keep = _closure(owners, down)
+    other_shapes = _closure(other_owners, down) - keep
+    pending = deque(r for k in keep for r in up(k))
+    while pending:
+        eid = pending.popleft()
+        entry = entities.get(eid)
+        if entry is None or eid in keep or eid in other_owners or not entry[3]:
+            continue
+        kind, refs = entry[2], entry[3]
+        if all(r in keep for r in refs):
+            added = {eid}
+        elif "RELATIONSHIP" in kind:
+            added = _closure((eid,), down) - keep
+            if added & other_shapes:
+                continue
+        else:
+            continue
+        keep |= added
+        pending.extend(r for a in added for r in up(a))
+    return keep & entities.keys()
+
+
+def extract_step_parts(path: Path, parts, use_mmap: bool = True) -> Path:
+    """把 STEP 文件中 parts（零件名或零件 id）所需的实体写成片段文件并返回其路径。
+
+    片段写在源文件旁（<stem>.parts-<hash>.step），比源文件新时直接复用。
+    use_mmap 时把源文件映射到内存、按区间切片直接写出，不再逐段 seek/read 复制到用户态缓冲；
+    网络文件系统上映射不可靠，可传 False 走普通读取。"""
+    parts = sorted({str(p) for p in parts})
+    digest = hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:10]
+    out = path.with_name(f"{path.stem}.parts-{digest}.step")
+    if out.exists() and out.stat().st_mtime >= path.stat().st_mtime:
+        return out
+    entities, products, data_start = _step_skim_index(path)
+    keep = select_step_entities(entities, products, parts)
+    # 头部原样保留；实体区间只到 ';' 为止，逐个另起一行写出
+    spans = sorted(entities[eid][:2] for eid in keep)
+    tmp = out.with_name(out.name + ".tmp")
+    with open(path, "rb") as src, open(tmp, "wb") as dst:
+        if use_mmap:
+            with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    dst.write(view[:data_start])
+                    for start, end in spans:
+                        dst.write(view[start:end])
+                        dst.write(b"\n")
+                finally:
+                    view.release()
+        else:
+            dst.write(src.read(data_start))
+            for start, end in spans:
+                src.seek(start)
+                dst.write(src.read(end - start))
+                dst.write(b"\n")
+        dst.write(b"ENDSEC;\nEND-ISO-10303-21;\n")
+    tmp.replace(out)
+    logger.info("STEP 片段: {} 个实体中保留 {} 个 -> {}", len(entities), len(keep), out.name)
+    return out
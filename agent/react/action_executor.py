@@ -161,7 +161,7 @@ class ActionExecutor:
         step: ExecutionStep,
         thought: Dict[str, Any],
     ) -> Dict[str, Any]:
-        logger.info(f"执行步骤: {step.action} ({step.step_type})")
+        logger.info("执行步骤: {} ({})", step.action, step.step_type)
         if self._context_manager:
             self._context_manager.append_operation(
                 "动作开始",
@@ -212,7 +212,7 @@ class ActionExecutor:
                 )
             return result
         except Exception as e:
-            logger.error(f"执行步骤失败: {e}")
+            logger.error("执行步骤失败: {}", e)
             if self._context_manager:
                 self._context_manager.append_operation(
                     "动作异常",
@@ -296,7 +296,7 @@ class ActionExecutor:
             else:
                 model_path = runner.create_model_from_plan(geometry_plan, output_filename)
         except Exception as e:
-            logger.error(f"几何建模失败: {e}")
+            logger.error("几何建模失败: {}", e)
             return {"status": "error", "message": f"几何建模失败: {e}"}
         plan.model_path = str(model_path)
         self._update_latest(plan)
@@ -529,7 +529,7 @@ class ActionExecutor:
                 "ui": ui,
             }
         except Exception as e:
-            logger.error(f"材料设置失败: {e}")
+            logger.error("材料设置失败: {}", e)
             return {"status": "error", "message": f"材料设置失败: {e}"}
 
     def execute_update_material_property(
@@ -660,7 +660,7 @@ class ActionExecutor:
             logger.warning("PhysicsAgent 尚未实现，跳过物理场设置")
             return {"status": "warning", "message": "物理场设置功能尚未实现"}
         except Exception as e:
-            logger.error(f"物理场设置失败: {e}")
+            logger.error("物理场设置失败: {}", e)
             return {"status": "error", "message": f"物理场设置失败: {e}"}
 
     # ===== Mesh =====
@@ -697,7 +697,7 @@ class ActionExecutor:
             }
             return {"status": "success", "message": "网格划分成功", "mesh_info": result, "ui": ui}
         except Exception as e:
-            logger.error(f"网格划分失败: {e}")
+            logger.error("网格划分失败: {}", e)
             return {"status": "error", "message": f"网格划分失败: {e}"}
 
     # ===== Study =====
@@ -761,7 +761,7 @@ class ActionExecutor:
             logger.warning("StudyAgent 尚未实现，跳过研究配置")
             return {"status": "warning", "message": "研究配置功能尚未实现"}
         except Exception as e:
-            logger.error(f"研究配置失败: {e}")
+            logger.error("研究配置失败: {}", e)
             return {"status": "error", "message": f"研究配置失败: {e}"}
 
     # ===== Solve =====
@@ -796,7 +796,7 @@ class ActionExecutor:
             }
             return {"status": "success", "message": "求解成功", "solve_info": result, "ui": ui}
         except Exception as e:
-            logger.error(f"求解失败: {e}")
+            logger.error("求解失败: {}", e)
             return {"status": "error", "message": f"求解失败: {e}"}
 
     # ===== Geometry IO / Selection / Postprocess =====
@@ -818,6 +818,8 @@ class ActionExecutor:
             file_path,
             geom_tag=params.get("geom_tag", "geom1"),
             feature_tag=params.get("feature_tag"),
+            decimate_target=params.get("decimate_target"),
+            parts=params.get("parts"),
         )
         if result.get("status") == "error":
             return result
@@ -994,7 +996,7 @@ class ActionExecutor:
             for s in plan.execution_path:
                 if s.step_id == step_id and s.status == "failed":
                     s.status = "pending"
-                    logger.info(f"重置步骤 {step_id} 状态为 pending")
+                    logger.info("重置步骤 {} 状态为 pending", step_id)
                     break
         return {"status": "success", "message": f"已重置 {len(failed_steps)} 个失败步骤"}
 
@@ -1008,6 +1010,6 @@ class ActionExecutor:
             for s in plan.execution_path:
                 if s.step_id == step_id:
                     s.status = "skipped"
-                    logger.info(f"跳过步骤 {step_id}")
+                    logger.info("跳过步骤 {}", step_id)
                     break
         return {"status": "success", "message": f"已跳过 {len(failed_steps)} 个失败步骤"}
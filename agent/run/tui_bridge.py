@@ -55,6 +55,7 @@ try:
     )
     from agent.core.events import EventBus, Event, EventType
     from agent.executor.java_api_controller import JavaAPIController
+    from agent.utils.config import get_settings
     from agent.utils.context_manager import get_all_models_from_context, get_context_manager
 except Exception as e:
     _early_log("Import failed:\n" + "".join(traceback.format_exception(type(e), e, e.__traceback__)))
@@ -506,9 +507,19 @@ def _handle(req: dict[str, Any]) -> None:
                 ctrl = JavaAPIController()
                 width = int(req.get("width") or 640)
                 height = int(req.get("height") or 480)
-                result = ctrl.export_model_preview(path_str, width=width, height=height)
+                # encoding="path" 时只回传本机文件路径，前端直接读文件
+                encoding = "path" if req.get("encoding") == "path" else "base64"
+                result = ctrl.export_model_preview(
+                    path_str, width=width, height=height, encoding=encoding
+                )
                 ok = result.get("status") == "success"
-                _reply(ok, result.get("message", ""), image_base64=result.get("image_base64"))
+                _reply(
+                    ok,
+                    result.get("message", ""),
+                    image_base64=result.get("image_base64"),
+                    image_path=result.get("image_path"),
+                    mime=result.get("mime", "image/png"),
+                )
             except Exception as e:
                 _reply(False, str(e), image_base64=None)
             return
@@ -599,6 +610,9 @@ def main() -> None:
 
         sys.excepthook = _excepthook
 
+    if get_settings().comsol_jvm_warmup:
+        JavaAPIController.warmup()
+
     for line in sys.stdin:
         line = line.strip()
         if not line:
@@ -84,6 +84,12 @@ class Settings(BaseSettings):
     java_download_mirror: str = ""
     # 为 true 时禁用自动下载 JDK，仅使用已存在的 JAVA_HOME 或 runtime/java（环境已就绪时可用）
     java_skip_auto_download: bool = False
+    # 为 true 时 list_model_tree 并行读取各类节点名称（只读查询；COMSOL 多线程读取异常时保持关闭）
+    comsol_parallel_tree_queries: bool = False
+    # 大于 0 时原地保存延迟该毫秒数并合并同一模型的连续保存（进程退出时写出）；0 为立即保存
+    comsol_save_debounce_ms: int = 0
+    # 为 true 时 tui-bridge 启动后即在后台预热 JVM，首个模型操作不再等待 JVM 启动
+    comsol_jvm_warmup: bool = False
 
     # 内置 claw-code COMSOL 调度配置
     claw_code_enabled: bool = True
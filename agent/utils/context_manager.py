@@ -433,20 +433,6 @@ class ContextManager:
         except Exception as e:
             logger.error("Failed to save summary.json: %s", e)
 
-    @staticmethod
-    def _clean_summary_lines(text: str) -> List[str]:
-        lines: List[str] = []
-        for raw in (text or "").splitlines():
-            line = raw.strip()
-            if not line:
-                continue
-            line = re.sub(r"^[-*•]\s*", "", line)
-            line = re.sub(r"^\d+[.)、]\s*", "", line)
-            line = line.strip()
-            if line:
-                lines.append(line)
-        return lines
-
     @staticmethod
     def _clip_text(text: str, limit: int = 160) -> str:
         text = re.sub(r"\s+", " ", (text or "").strip())
@@ -454,26 +440,6 @@ class ContextManager:
             return text
         return text[: max(0, limit - 3)].rstrip() + "..."
 
-    @classmethod
-    def _format_summary_block(cls, title: str, text: str) -> List[str]:
-        lines = cls._clean_summary_lines(text)
-        if not lines:
-            return []
-        return [title, *[f"- {line}" for line in lines]]
-
-    @classmethod
-    def _compose_summary_text(cls, manual_summary: str, auto_summary: str) -> str:
-        blocks: List[str] = []
-        manual_block = cls._format_summary_block("用户整理的记忆", manual_summary)
-        auto_block = cls._format_summary_block("系统自动摘要", auto_summary)
-        if manual_block:
-            blocks.extend(manual_block)
-        if auto_block:
-            if blocks:
-                blocks.append("")
-            blocks.extend(auto_block)
-        return "\n".join(blocks).strip()
-
     def get_editable_summary_text(self) -> str:
         summary = self.load_summary()
         if not summary:
@@ -594,135 +560,6 @@ class ContextManager:
         )
         self.save_summary(summary)
 
-    def _generate_auto_summary_text(
-        self,
-        history: List[Dict[str, Any]],
-        recent_shapes: List[str],
-        preferences: Dict[str, Any],
-    ) -> str:
-        total = len(history)
-        successful = sum(1 for entry in history if entry.get("success", True))
-        if total == 0:
-            return ""
-
-        lines = [f"总计 {total} 轮对话，成功 {successful} 轮。"]
-        if recent_shapes:
-            lines.append(f"最近涉及的几何类型: {', '.join(recent_shapes)}。")
-        preferred_unit = str(preferences.get("preferred_unit", "")).strip()
-        if preferred_unit:
-            lines.append(f"常用单位: {preferred_unit}。")
-
-        recent_entries = history[-5:]
-        if recent_entries:
-            lines.append("最近几轮:")
-            for entry in recent_entries:
-                user_input = self._clip_text(str(entry.get("user_input", "")), limit=60)
-                assistant_summary = self._clip_text(
-                    str(entry.get("assistant_summary", "")),
-                    limit=80,
-                )
-                status = "成功" if entry.get("success", True) else "失败"
-                line = f"- 用户: {user_input or '（空）'} [{status}]"
-                if assistant_summary:
-                    line += f" | 助手: {assistant_summary}"
-                lines.append(line)
-
-        return "\n".join(lines)
-
-    def get_context_for_planner(self) -> str:
-        summary = self.load_summary()
-        lines: List[str] = []
-
-        if summary:
-            lines.extend(self._format_summary_block("用户长期记忆", summary.manual_summary))
-
-            auto_lines = self._clean_summary_lines(summary.auto_summary)
-            if auto_lines:
-                if lines:
-                    lines.append("")
-                lines.append("系统自动摘要")
-                lines.extend(f"- {line}" for line in auto_lines[:6])
-
-            if summary.recent_shapes:
-                if lines:
-                    lines.append("")
-                lines.append("最近涉及的几何类型")
-                lines.append(f"- {', '.join(summary.recent_shapes[:8])}")
-
-            preferred_unit = str(summary.preferences.get("preferred_unit", "")).strip()
-            if preferred_unit:
-                if lines:
-                    lines.append("")
-                lines.append("稳定偏好")
-                lines.append(f"- 常用单位: {preferred_unit}")
-
-        recent_history = self.get_recent_history(limit=4)
-        if recent_history:
-            if lines:
-                lines.append("")
-            lines.append("最近对话片段")
-            for entry in recent_history:
-                user_input = self._clip_text(str(entry.get("user_input", "")), limit=80)
-                assistant_summary = self._clip_text(
-                    str(entry.get("assistant_summary", "")),
-                    limit=100,
-                )
-                status = "成功" if entry.get("success", True) else "失败"
-                lines.append(f"- 用户: {user_input or '（空）'} [{status}]")
-                if assistant_summary:
-                    lines.append(f"  助手: {assistant_summary}")
-
-        discussion = self.load_discussion_card()
-        if isinstance(discussion, dict):
-            discussion_points: List[str] = []
-            for key in (
-                "physical_principles",
-                "target_metrics",
-                "known_inputs",
-                "unknowns",
-                "candidate_solutions",
-                "risks",
-            ):
-                values = discussion.get(key)
-                if isinstance(values, list):
-                    discussion_points.extend(
-                        self._clip_text(str(item), limit=100)
-                        for item in values[:2]
-                        if str(item).strip()
-                    )
-            if discussion_points:
-                if lines:
-                    lines.append("")
-                lines.append("当前讨论卡")
-                lines.extend(f"- {item}" for item in discussion_points[:6])
-
-        plan = self.load_plan()
-        if isinstance(plan, dict):
-            plan_lines: List[str] = []
-            if plan.get("plan_confirmed") is True:
-                plan_lines.append("已有已确认的建模规划。")
-            unresolved = plan.get("unresolved_clarifications") or []
-            if isinstance(unresolved, list) and unresolved:
-                plan_lines.append(f"仍有 {len(unresolved)} 个澄清项未闭环。")
-            steps = plan.get("steps") or []
-            if isinstance(steps, list) and steps:
-                descriptions = []
-                for step in steps[:3]:
-                    if not isinstance(step, dict):
-                        continue
-                    description = self._clip_text(str(step.get("description", "")), limit=60)
-                    if description:
-                        descriptions.append(description)
-                if descriptions:
-                    plan_lines.append("当前计划步骤: " + " | ".join(descriptions))
-            if plan_lines:
-                if lines:
-                    lines.append("")
-                lines.append("当前计划状态")
-                lines.extend(f"- {line}" for line in plan_lines)
-
-        return "\n".join(lines)
-
     @staticmethod
     def _clean_summary_lines(text: str) -> List[str]:
         lines: List[str] = []
@@ -55,3 +55,238 @@ class TestDoExecFromFile:
         ok, msg = do_exec_from_file(tmp_path / "nonexistent.json", verbose=False)
         assert ok is False
         assert msg
+
+
+class TestJPypeGcHook:
+    """COMSOLRunner 启动 JVM 后对 JPype GC 回调的节流（用假 _jpype 模块，不启动 JVM）。"""
+
+    def test_throttle_forwards_every_nth_collection(self, monkeypatch):
+        import gc
+        import sys
+        import types
+
+        from agent.executor import comsol_runner
+
+        calls = []
+        fake = types.ModuleType("_jpype")
+        fake._collect = lambda phase, info: calls.append(phase)
+        monkeypatch.setitem(sys.modules, "_jpype", fake)
+        monkeypatch.setattr(gc, "callbacks", [fake._collect])
+
+        assert comsol_runner._throttle_jpype_gc_hook(every=3) is True
+        hook = gc.callbacks[0]
+        for _ in range(6):
+            hook("start", {})
+            hook("stop", {})
+        assert calls == ["start", "stop", "start", "stop"]
+
+    def test_throttle_is_noop_without_jpype_hook(self, monkeypatch):
+        import gc
+        import sys
+        import types
+
+        from agent.executor import comsol_runner
+
+        monkeypatch.setitem(sys.modules, "_jpype", types.ModuleType("_jpype"))
+        monkeypatch.setattr(gc, "callbacks", [])
+        assert comsol_runner._throttle_jpype_gc_hook() is False
+
+
+class TestJavaClassCache:
+    """COMSOLRunner.get_java_class 按类名缓存 JClass（用假 jpype，不启动 JVM）。"""
+
+    def test_get_java_class_resolves_each_class_once(self, monkeypatch):
+        from agent.executor import comsol_runner
+
+        resolved = []
+        fake_jpype = Mock()
+        fake_jpype.JClass.side_effect = lambda name: resolved.append(name) or object()
+        monkeypatch.setattr(comsol_runner, "_jpype", lambda: fake_jpype)
+        monkeypatch.setattr(comsol_runner.COMSOLRunner, "_java_classes", {})
+        runner = comsol_runner.COMSOLRunner.__new__(comsol_runner.COMSOLRunner)
+
+        first = runner.get_java_class("java.lang.Math")
+        assert runner.get_java_class("java.lang.Math") is first
+        runner.get_java_class("java.lang.System")
+        assert resolved == ["java.lang.Math", "java.lang.System"]
+
+
+class TestShapeCreation:
+    """create_shape 复用调用方传入的几何序列句柄（用 Mock 模型，不启动 JVM）。"""
+
+    def test_shapes_reuse_given_geom_handle(self):
+        from agent.executor import comsol_runner
+
+        runner = comsol_runner.COMSOLRunner.__new__(comsol_runner.COMSOLRunner)
+        model, geom = Mock(), Mock()
+        shapes = [
+            GeometryShape(type="rectangle", parameters={"width": 1, "height": 2}),
+            GeometryShape(type="circle", parameters={"radius": 0.5}, name="c1"),
+        ]
+        for i, shape in enumerate(shapes, 1):
+            runner.create_shape(model, shape, i, geom=geom)
+
+        assert [c.args for c in geom.create.call_args_list] == [
+            ("rect1", "Rectangle"),
+            ("c1", "Circle"),
+        ]
+        model.component.assert_not_called()
+        model.geom.assert_not_called()
+
+    def test_polygon_coordinates_are_passed_as_one_double_array(self, monkeypatch):
+        from agent.executor import comsol_runner
+
+        class _JDoubleArray:
+            def __init__(self, buf):
+                self.values = list(buf)
+
+        monkeypatch.setattr(comsol_runner, "_JDoubleArray", _JDoubleArray)
+        runner = comsol_runner.COMSOLRunner.__new__(comsol_runner.COMSOLRunner)
+        geom = Mock()
+        shape = GeometryShape(
+            type="polygon", parameters={"x": [0, 1.5, 1], "y": ["0", "L", "L/2"]}
+        )
+        runner.create_shape(Mock(), shape, geom=geom)
+
+        x_call, y_call = geom.create.return_value.set.call_args_list
+        assert x_call.args[0] == "x" and x_call.args[1].values == [0.0, 1.5, 1.0]
+        assert y_call.args == ("y", ["0", "L", "L/2"])
+
+
+class TestJvmStartup:
+    """多个线程/控制器并发首次调用时 JVM 只启动一次。"""
+
+    def test_concurrent_ensure_starts_jvm_once(self, monkeypatch):
+        import threading
+        import time
+
+        from agent.executor import comsol_runner
+
+        cls = comsol_runner.COMSOLRunner
+        starts = []
+
+        def fake_start(klass):
+            starts.append(1)
+            time.sleep(0.05)
+            klass._jvm_started = True
+
+        monkeypatch.setattr(cls, "_jvm_started", False)
+        monkeypatch.setattr(cls, "_start_jvm", classmethod(fake_start))
+        threads = [threading.Thread(target=cls._ensure_jvm_started) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert starts == [1]
+
+
+_ASSEMBLY_STEP = """ISO-10303-21;
+HEADER;
+FILE_NAME('asm.step','',(''),(''),'','','');
+ENDSEC;
+DATA;
+#1=APPLICATION_CONTEXT('core data; for test');
+#2=APPLICATION_PROTOCOL_DEFINITION('','ap214',2010,#1);
+#3=PRODUCT_CONTEXT('',#1,'mechanical');
+#4=PRODUCT_DEFINITION_CONTEXT('',#1,'design');
+#5=(GEOMETRIC_REPRESENTATION_CONTEXT(3) REPRESENTATION_CONTEXT('',''));
+#10=PRODUCT('A','Bracket','',(#3));
+#11=PRODUCT_DEFINITION_FORMATION('','',#10);
+#12=PRODUCT_DEFINITION('','',#11,#4);
+#13=PRODUCT_DEFINITION_SHAPE('','',#12);
+#14=SHAPE_DEFINITION_REPRESENTATION(#13,#15);
+#15=SHAPE_REPRESENTATION('',(#16),#5);
+#16=AXIS2_PLACEMENT_3D('',#17,$,$);
+#17=CARTESIAN_POINT('',(0.,0.,0.));
+#18=SHAPE_REPRESENTATION_RELATIONSHIP('','',#15,#19);
+#19=ADVANCED_BREP_SHAPE_REPRESENTATION('',(#20),#5);
+#20=MANIFOLD_SOLID_BREP('a',
+  #21);
+#21=CARTESIAN_POINT('',(1.,2.,3.));
+#30=PRODUCT('B','Housing','',(#3));
+#31=PRODUCT_DEFINITION_FORMATION('','',#30);
+#32=PRODUCT_DEFINITION('','',#31,#4);
+#33=PRODUCT_DEFINITION_SHAPE('','',#32);
+#34=SHAPE_DEFINITION_REPRESENTATION(#33,#35);
+#35=SHAPE_REPRESENTATION('',(#36),#5);
+#36=AXIS2_PLACEMENT_3D('',#37,$,$);
+#37=CARTESIAN_POINT('',(0.,0.,0.));
+#38=SHAPE_REPRESENTATION_RELATIONSHIP('','',#35,#39);
+#39=ADVANCED_BREP_SHAPE_REPRESENTATION('',(#40),#5);
+#40=MANIFOLD_SOLID_BREP('b',#41);
+#41=CARTESIAN_POINT('',(4.,5.,6.));
+#50=PRODUCT_RELATED_PRODUCT_CATEGORY('part','',(#10,#30,#60));
+#60=PRODUCT('ASM','Assembly','',(#3));
+#61=PRODUCT_DEFINITION_FORMATION('','',#60);
+#62=PRODUCT_DEFINITION('','',#61,#4);
+#63=NEXT_ASSEMBLY_USAGE_OCCURRENCE('1','','',#62,#12,$);
+#64=NEXT_ASSEMBLY_USAGE_OCCURRENCE('2','','',#62,#32,$);
+ENDSEC;
+END-ISO-10303-21;
+"""
+
+
+class TestStepFragment:
+    """按零件名裁剪 STEP：只保留所选零件的实体链与共享上下文。"""
+
+    def test_extract_single_part_drops_other_parts(self, tmp_path):
+        from agent.executor.step_fragment import extract_step_parts
+
+        src = tmp_path / "asm.step"
+        src.write_text(_ASSEMBLY_STEP, encoding="latin-1")
+        out = extract_step_parts(src, ["Bracket"])
+        text = out.read_text(encoding="latin-1")
+        assert text.startswith("ISO-10303-21;\nHEADER;")
+        assert text.rstrip().endswith("END-ISO-10303-21;")
+        for eid in (1, 2, 5, 10, 14, 18, 19, 20, 21):
+            assert f"#{eid}=" in text
+        for eid in (30, 34, 39, 41, 50, 60, 63):
+            assert f"#{eid}=" not in text
+        assert "  #21);" in text
+        assert extract_step_parts(src, ["A"]) != out  # 不同名称对应不同片段文件
+
+    def test_entities_sharing_a_line_are_indexed_separately(self, tmp_path):
+        from agent.executor.step_fragment import _step_skim_index, extract_step_parts
+
+        text = _ASSEMBLY_STEP.replace("#21=CARTESIAN_POINT('',(1.,2.,3.));\n", "").replace(
+            "#41=CARTESIAN_POINT('',(4.,5.,6.));\n",
+            "#41=CARTESIAN_POINT('a;b',(4.,5.,6.)); #21=CARTESIAN_POINT('',(1.,2.,3.));\n",
+        )
+        src = tmp_path / "asm.step"
+        src.write_text(text, encoding="latin-1")
+        entities, _, _ = _step_skim_index(src)
+        raw = src.read_bytes()
+        assert raw[slice(*entities[41][:2])] == b"#41=CARTESIAN_POINT('a;b',(4.,5.,6.));"
+        assert raw[slice(*entities[21][:2])] == b"#21=CARTESIAN_POINT('',(1.,2.,3.));"
+        out = extract_step_parts(src, ["Bracket"]).read_text(encoding="latin-1")
+        assert "#21=" in out and "#41=" not in out
+
+    def test_extract_without_mmap_matches_mapped_copy(self, tmp_path):
+        from agent.executor.step_fragment import extract_step_parts
+
+        a, b = tmp_path / "a", tmp_path / "b"
+        a.mkdir()
+        b.mkdir()
+        (a / "asm.step").write_text(_ASSEMBLY_STEP, encoding="latin-1")
+        (b / "asm.step").write_text(_ASSEMBLY_STEP, encoding="latin-1")
+        mapped = extract_step_parts(a / "asm.step", ["Housing"])
+        plain = extract_step_parts(b / "asm.step", ["Housing"], use_mmap=False)
+        assert mapped.read_bytes() == plain.read_bytes()
+        assert b"#40=" in mapped.read_bytes()
+
+    def test_selecting_assembly_includes_child_parts(self, tmp_path):
+        from agent.executor.step_fragment import _step_skim_index, select_step_entities
+
+        src = tmp_path / "asm.step"
+        src.write_text(_ASSEMBLY_STEP, encoding="latin-1")
+        entities, products, _ = _step_skim_index(src)
+        keep = select_step_entities(entities, products, ["ASM"])
+        assert {20, 40, 63, 64, 50} <= keep
+
+    def test_unknown_part_raises(self, tmp_path):
+        from agent.executor.step_fragment import extract_step_parts
+
+        src = tmp_path / "asm.step"
+        src.write_text(_ASSEMBLY_STEP, encoding="latin-1")
+        with pytest.raises(ValueError, match="Nope"):
+            extract_step_parts(src, ["Nope"])
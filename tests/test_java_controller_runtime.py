@@ -0,0 +1,2003 @@
+"""JavaAPIController 运行时路径测试（JClass 缓存、模型加载等），用假 jpype/模型替代 JVM。"""
+
+import os
+
+import pytest
+
+from agent.executor import comsol_runner
+from agent.executor import java_api_controller as jac
+
+
+@pytest.fixture(autouse=True)
+def _empty_model_cache():
+    jac.clear_model_cache()
+    yield
+    jac.clear_model_cache()
+
+
+class _FakeJPype:
+    def __init__(self):
+        self.jclass_calls = []
+
+    def JClass(self, name):
+        self.jclass_calls.append(name)
+        return object()
+
+
+@pytest.fixture
+def fake_jpype(monkeypatch):
+    fake = _FakeJPype()
+    monkeypatch.setattr(jac, "_jpype", lambda: fake)
+    monkeypatch.setattr(comsol_runner, "_jpype", lambda: fake)
+    monkeypatch.setattr(jac.COMSOLRunner, "_ensure_jvm_started", classmethod(lambda cls: None))
+    monkeypatch.setattr(jac, "_ModelUtil", None)
+    return fake
+
+
+def test_get_model_util_resolves_jclass_once(fake_jpype):
+    first = jac._get_model_util()
+    second = jac._get_model_util()
+    assert first is second
+    assert fake_jpype.jclass_calls == ["com.comsol.model.util.ModelUtil"]
+
+
+def test_get_model_util_reuses_class_registered_at_jvm_start(fake_jpype, monkeypatch):
+    registered = object()
+    monkeypatch.setattr(jac.COMSOLRunner, "_java_classes", {jac.MODEL_UTIL_CLASS: registered})
+    assert jac._get_model_util() is registered
+    assert fake_jpype.jclass_calls == []
+
+
+def test_warmup_starts_jvm_in_background_and_swallows_errors(monkeypatch):
+    calls = []
+
+    def _boom():
+        calls.append("start")
+        raise RuntimeError("no comsol")
+
+    monkeypatch.setattr(jac, "_get_model_util", _boom)
+    thread = jac.JavaAPIController.warmup()
+    thread.join(timeout=5)
+    assert thread.daemon and calls == ["start"]
+    assert jac.JavaAPIController.warmup(background=False) is None
+    assert calls == ["start", "start"]
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    class _DummyRunner:
+        def __init__(self, *args, **kwargs):
+            pass
+
+    monkeypatch.setattr(jac, "COMSOLRunner", _DummyRunner)
+    return jac.JavaAPIController()
+
+
+def test_apply_plan_loads_once_and_saves_once(controller, monkeypatch, tmp_path):
+    model_path = tmp_path / "demo.mph"
+    model_path.write_text("dummy", encoding="utf-8")
+    calls = []
+    model = object()
+
+    def _load(path, readonly=False):
+        calls.append("load")
+        return model
+
+    def _save(m, dest, allow_fallback=True):
+        calls.append("save")
+        return dest
+
+    monkeypatch.setattr(controller, "_load_model", _load)
+    monkeypatch.setattr(jac, "_save_model_avoid_lock", _save)
+    monkeypatch.setattr(
+        controller, "_add_materials_direct", lambda m, p: calls.append("material") or {}
+    )
+    monkeypatch.setattr(
+        controller,
+        "_add_physics_direct",
+        lambda m, p: calls.append("physics") or {"failures": [{"kind": "coupling"}]},
+    )
+    monkeypatch.setattr(controller, "_generate_mesh_direct", lambda m, p: calls.append("mesh"))
+
+    res = controller.apply_plan(
+        str(model_path),
+        material_plan=jac.MaterialPlan(),
+        physics_plan=jac.PhysicsPlan(),
+        mesh_params={},
+    )
+
+    assert calls == ["load", "material", "physics", "mesh", "save"]
+    assert res["status"] == "warning"
+    assert res["failures"] == [{"stage": "physics", "kind": "coupling"}]
+    assert set(res["result"]) == {"material", "physics", "mesh"}
+
+
+def test_apply_plan_stops_without_saving_on_stage_error(controller, monkeypatch, tmp_path):
+    saved = []
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: object())
+    monkeypatch.setattr(jac, "_save_model_avoid_lock", lambda *a, **kw: saved.append(a))
+
+    def _boom(model, plan):
+        raise RuntimeError("bad physics")
+
+    monkeypatch.setattr(controller, "_add_physics_direct", _boom)
+
+    res = controller.apply_plan(str(tmp_path / "demo.mph"), physics_plan=jac.PhysicsPlan())
+
+    assert res["status"] == "error"
+    assert res["stage"] == "physics"
+    assert saved == []
+
+
+def test_apply_plan_can_finish_with_solve(controller, monkeypatch, tmp_path):
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: object())
+    monkeypatch.setattr(jac, "_save_model_avoid_lock", lambda m, dest, **kw: dest)
+    monkeypatch.setattr(controller, "_solve_direct", lambda m: "std1")
+
+    res = controller.apply_plan(str(tmp_path / "demo.mph"), solve=True)
+
+    assert res["status"] == "success"
+    assert res["result"] == {"solve": {"study": "std1"}}
+
+
+def test_add_physics_reuses_created_feature_handles(controller, monkeypatch):
+    from agent.schemas.physics import BoundaryCondition, PhysicsField, PhysicsPlan
+
+    lookups = []
+
+    class _Feat:
+        def __init__(self):
+            self.values = {}
+            self.entities = None
+
+        def selection(self):
+            return type("Sel", (), {"set": lambda _, ids: setattr(self, "entities", ids)})()
+
+        def set(self, key, value):
+            self.values[key] = value
+
+    class _Interface:
+        def __init__(self):
+            self.created = {}
+
+        def create(self, name, *args):
+            return self.created.setdefault(name, _Feat())
+
+        def feature(self, name):
+            lookups.append(name)
+            return _Feat()
+
+    interface = _Interface()
+
+    class _Seq:
+        def create(self, name, tag, geom):
+            return interface
+
+    monkeypatch.setattr(controller, "_ensure_geometry_built", lambda model: None)
+    monkeypatch.setattr(
+        controller, "_find_unused_physics_name", lambda model, base, used=None: base
+    )
+    monkeypatch.setattr(controller, "_physics_api", lambda model: _Seq())
+    monkeypatch.setattr(
+        controller, "_physics_feature", lambda model, name: pytest.fail("lookup by name")
+    )
+    plan = PhysicsPlan(
+        fields=[
+            PhysicsField(
+                type="structural",
+                boundary_conditions=[
+                    BoundaryCondition(
+                        name="fix1", condition_type="Fixed", selection=[1], parameters={"a": 1}
+                    )
+                ],
+            )
+        ]
+    )
+
+    res = controller._add_physics_direct(object(), plan)
+
+    assert res["failures"] == []
+    assert lookups == []
+    assert list(interface.created["fix1"].entities) == [1]
+    assert "a" in interface.created["fix1"].values
+
+
+def test_configure_study_reuses_created_nodes_and_sets_sweep_in_one_call(controller):
+    from agent.schemas.study import ParametricSweep, StudyPlan, StudyType
+
+    class _Feat:
+        def __init__(self):
+            self.sets = []
+
+        def set(self, *args):
+            self.sets.append(args)
+
+    class _Study:
+        def __init__(self):
+            self.feats = {}
+
+        def create(self, tag, kind):
+            return self.feats.setdefault(tag, _Feat())
+
+    class _Studies:
+        def __init__(self):
+            self.nodes, self.lookups = {}, 0
+
+        def tags(self):
+            return list(self.nodes)
+
+        def create(self, tag):
+            return self.nodes.setdefault(tag, _Study())
+
+    class _Model:
+        def __init__(self):
+            self.studies = _Studies()
+
+        def study(self, tag=None):
+            if tag is None:
+                return self.studies
+            self.studies.lookups += 1
+            return self.studies.nodes[tag]
+
+    model = _Model()
+    sweep = ParametricSweep(parameter_name="L", range_start=1, range_end=3, step=1)
+    plan = StudyPlan(studies=[StudyType(type="stationary", parametric_sweep=sweep)])
+
+    res = controller._configure_study_direct(model, plan)
+
+    assert res["failures"] == []
+    assert model.studies.lookups == 0
+    feats = model.studies.nodes["std1"].feats
+    assert feats["std"].sets == [("rtol", "0.05")]
+    assert feats["param"].sets == [(["pname", "prange"], ["L", "range(1.0,1.0,3.0)"])]
+
+
+def test_add_physics_looks_up_init1_once_per_interface(controller, monkeypatch):
+    from agent.schemas.physics import InitialCondition, PhysicsField, PhysicsPlan
+
+    lookups, values = [], {}
+
+    class _Init:
+        def set(self, key, value):
+            values[key] = value
+
+    class _Interface:
+        def feature(self, name):
+            lookups.append(name)
+            return _Init()
+
+    class _Seq:
+        def create(self, name, tag, geom):
+            return _Interface()
+
+    monkeypatch.setattr(controller, "_ensure_geometry_built", lambda model: None)
+    monkeypatch.setattr(
+        controller, "_find_unused_physics_name", lambda model, base, used=None: base
+    )
+    monkeypatch.setattr(controller, "_physics_api", lambda model: _Seq())
+    plan = PhysicsPlan(
+        fields=[
+            PhysicsField(
+                type="electromagnetic",
+                initial_conditions=[
+                    InitialCondition(variable="V", value=0),
+                    InitialCondition(variable="A", value="0[Wb/m]"),
+                ],
+            )
+        ]
+    )
+
+    res = controller._add_physics_direct(object(), plan)
+
+    assert res["failures"] == []
+    assert lookups == ["init1"]
+    assert values == {"V": 0, "A": "0[Wb/m]"}
+
+
+def test_absolute_path_keeps_absolute_and_resolves_relative(tmp_path, monkeypatch):
+    absolute = tmp_path / "a.mph"
+    assert jac._absolute_path(str(absolute)) == absolute
+    assert jac._absolute_path(str(absolute)) is jac._absolute_path(str(absolute))
+    monkeypatch.chdir(tmp_path)
+    assert jac._absolute_path("b.mph") == (tmp_path / "b.mph").resolve()
+    (tmp_path / "sub").mkdir()
+    monkeypatch.chdir(tmp_path / "sub")
+    assert jac._absolute_path("b.mph") == (tmp_path / "sub" / "b.mph").resolve()
+
+
+def test_add_materials_reuses_created_handle_for_assignment(controller, monkeypatch):
+    class _Sel:
+        def __init__(self):
+            self.calls = []
+
+        def all(self):
+            self.calls.append("all")
+
+    class _Feat:
+        def __init__(self):
+            self.sel = _Sel()
+
+        def selection(self):
+            return self.sel
+
+    class _Seq:
+        def create(self, name):
+            pass
+
+    lookups = []
+    feat = _Feat()
+
+    def _lookup(model, name):
+        lookups.append(name)
+        return feat
+
+    monkeypatch.setattr(controller, "_materials_api", lambda model: _Seq())
+    monkeypatch.setattr(controller, "_material_feature", _lookup)
+    monkeypatch.setattr(
+        controller, "_find_unused_material_name", lambda model, name, used=None: name
+    )
+    monkeypatch.setattr(jac, "_material_property_group", lambda f, g: None)
+    monkeypatch.setattr(jac, "_ensure_material_thermal_k", lambda f, m: None)
+    monkeypatch.setattr(jac, "_ensure_material_heat_properties", lambda f, m: None)
+
+    plan = jac.MaterialPlan(
+        materials=[{"name": "mat1", "label": ""}],
+        assignments=[{"material_name": "mat1", "assign_all": True}],
+    )
+    controller._add_materials_direct(object(), plan)
+
+    assert lookups == ["mat1"]
+    assert feat.sel.calls == ["all"]
+
+
+def test_add_materials_rolls_back_created_nodes_when_a_create_fails(controller, monkeypatch):
+    calls = []
+
+    class _Seq:
+        def tags(self):
+            return ["mat1"]
+
+        def create(self, name):
+            calls.append(("create", name))
+            if name == "bad":
+                raise RuntimeError("invalid tag")
+
+        def remove(self, name):
+            calls.append(("remove", name))
+
+    monkeypatch.setattr(controller, "_materials_api", lambda model: _Seq())
+    monkeypatch.setattr(controller, "_material_feature", lambda model, name: object())
+    monkeypatch.setattr(controller, "_populate_material", lambda feat, mat_def: None)
+
+    plan = jac.MaterialPlan(materials=[{"name": "mat1"}, {"name": "bad"}])
+    with pytest.raises(RuntimeError):
+        controller._add_materials_direct(object(), plan)
+
+    assert calls == [("create", "mat11"), ("create", "bad"), ("remove", "mat11")]
+
+
+def test_ensure_geometry_built_runs_once_per_loaded_model(controller, monkeypatch):
+    runs = []
+
+    class _Geom:
+        def run(self):
+            runs.append("run")
+
+    class _Model:
+        def component(self, *args):
+            return self
+
+        def geom(self, *args):
+            return _Geom() if args else self
+
+    monkeypatch.setattr(controller, "_node_list_has", lambda seq, tag: True)
+    model = _Model()
+    controller._ensure_geometry_built(model)
+    controller._ensure_geometry_built(model)
+    assert runs == ["run"]
+
+    class _ModelUtil:
+        @staticmethod
+        def load(tag, path):
+            return model
+
+    monkeypatch.setattr(jac, "_get_model_util", lambda: _ModelUtil)
+    controller._load_model("demo.mph")
+    controller._ensure_geometry_built(model)
+    assert runs == ["run", "run"]
+
+
+class _CountingModelUtil:
+    def __init__(self):
+        self.loads = []
+        self.removed = []
+
+    def load(self, tag, path):
+        self.loads.append(tag)
+        return type("Model", (), {"save": lambda self, p: None})()
+
+    def remove(self, tag):
+        self.removed.append(tag)
+
+
+@pytest.fixture
+def model_util(monkeypatch):
+    util = _CountingModelUtil()
+    monkeypatch.setattr(jac, "_get_model_util", lambda: util)
+    monkeypatch.setattr(jac, "_ModelUtil", util)
+    return util
+
+
+def test_load_model_reuses_cached_model_until_file_changes(controller, model_util, tmp_path):
+    path = tmp_path / "demo.mph"
+    path.write_bytes(b"v1")
+    first = controller._load_model(str(path))
+    assert controller._load_model(str(path)) is first
+    assert model_util.loads == ["demo"]
+
+    path.write_bytes(b"version2")
+    assert controller._load_model(str(path)) is not first
+    assert model_util.loads == ["demo", "demo"]
+
+
+def test_saved_model_stays_cached_under_destination(controller, model_util, tmp_path):
+    path = tmp_path / "demo.mph"
+    path.write_bytes(b"v1")
+    model = controller._load_model(str(path))
+
+    def _save(p):
+        jac.Path(p).write_bytes(b"saved")
+
+    model.save = _save
+    dest = jac._save_model_to_new_path(model, tmp_path / "demo_material.mph")
+
+    assert controller._load_model(str(dest)) is model
+    assert controller._load_model(str(path)) is not model
+    # 原路径需以新 tag 重新加载，不能替换掉已改挂到 dest 的同 tag 模型
+    assert model_util.loads[0] == "demo" and model_util.loads[1].startswith("demo_")
+    assert controller._load_model(str(dest)) is model
+
+
+def test_save_as_over_cached_destination_releases_replaced_model(
+    controller, model_util, tmp_path
+):
+    path, dest = tmp_path / "demo.mph", tmp_path / "target.mph"
+    for p in (path, dest):
+        p.write_bytes(b"v1")
+    controller._load_model(str(dest))
+    model = controller._load_model(str(path))
+    model.save = lambda p: jac.Path(p).write_bytes(b"saved")
+
+    jac._save_model_to_new_path(model, dest)
+
+    assert model_util.removed == ["target"]
+    assert controller._load_model(str(dest)) is model
+
+
+def test_cached_loads_keep_geometry_built_state_until_geometry_changes(
+    controller, model_util, tmp_path
+):
+    path = tmp_path / "demo.mph"
+    path.write_bytes(b"v1")
+    other = tmp_path / "other.mph"
+    other.write_bytes(b"v1")
+    model = controller._load_model(str(path))
+    jac._GEOM_READY[id(model)] = model
+
+    # 另一个控制器实例共享同一缓存模型及其“几何已构建”状态
+    second = jac.JavaAPIController()
+    assert second._load_model(str(path), readonly=True) is model
+    assert controller._load_model(str(other)) is not model
+    assert jac._GEOM_READY.get(id(model)) is model
+    second._geometry_changed(model)
+    assert id(model) not in jac._GEOM_READY
+
+    jac._GEOM_READY[id(model)] = model
+    path.write_bytes(b"version2")
+    assert controller._load_model(str(path)) is not model
+    assert not jac._GEOM_READY
+    assert model_util.loads == ["demo", "other", "demo"]
+
+
+def test_reload_bypasses_model_cache(controller, model_util, tmp_path):
+    path = tmp_path / "demo.mph"
+    path.write_bytes(b"v1")
+    controller._load_model(str(path))
+    controller._load_model(str(path))
+    controller._load_model(str(path), reload=True)
+    controller._load_model(str(path))
+    assert model_util.loads == ["demo", "demo"]
+
+    jac.JavaAPIController.clear_model_cache()
+    controller._load_model(str(path))
+    assert model_util.loads == ["demo", "demo", "demo"]
+
+
+def test_readonly_load_reads_the_model_being_saved(controller, model_util, tmp_path):
+    import threading
+
+    path = tmp_path / "demo.mph"
+    path.write_bytes(b"v1")
+    model = controller._load_model(str(path))
+    lock = jac._SAVE_LOCKS.setdefault(str(path), threading.Lock())
+    lock.acquire()
+    path.write_bytes(b"half-written")  # 其他线程正在写出该路径
+
+    # 只读查询直接读内存模型：不淘汰、不 remove、不重新加载
+    assert controller._load_model(str(path), readonly=True) is model
+    assert model_util.loads == ["demo"] and model_util.removed == []
+
+    # 修改类调用等待写出结束，写出后缓存时间戳已刷新，不重新加载
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(controller._load_model(str(path))))
+    waiter.start()
+    waiter.join(0.05)
+    assert waiter.is_alive()
+    path.write_bytes(b"v2-complete")
+    jac._remember_saved_model(model, path)
+    lock.release()
+    waiter.join(5)
+
+    assert result == [model]
+    assert model_util.loads == ["demo"]
+
+
+def test_failed_mutation_discards_cached_model(controller, model_util, tmp_path):
+    path = tmp_path / "demo.mph"
+    path.write_bytes(b"v1")
+    controller._load_model(str(path))
+
+    res = controller.remove_material(str(path), "mat1")
+
+    assert res["status"] == "error"
+    controller._load_model(str(path))
+    assert model_util.loads == ["demo", "demo"]
+
+
+def test_unsupported_api_keeps_cached_model(controller, model_util, tmp_path, monkeypatch):
+    path = tmp_path / "demo.mph"
+    path.write_bytes(b"v1")
+    monkeypatch.setattr(controller, "_materials_api", lambda model: object())
+    monkeypatch.setattr(controller, "_physics_api", lambda model: object())
+
+    for res in (
+        controller.remove_material(str(path), "mat1"),
+        controller.remove_all_materials(str(path)),
+        controller.clear_physics(str(path)),
+    ):
+        assert res["status"] == "error" and "不支持" in res["message"]
+    controller._load_model(str(path))
+    assert model_util.loads == ["demo"]
+
+
+def test_batch_defers_in_place_saves_until_exit(controller, model_util, tmp_path, monkeypatch):
+    path = tmp_path / "demo.mph"
+    path.write_bytes(b"v1")
+    saves = []
+    monkeypatch.setattr(
+        controller, "_do_update_material", lambda m, name, props, group: {"material": name}
+    )
+
+    with controller.batch(str(path)):
+        model = controller._load_model(str(path))
+        model.save = saves.append
+        assert controller.update_material_properties(str(path), "mat1", {})["status"] == "success"
+        assert controller.update_material_properties(str(path), "mat2", {})["status"] == "success"
+        assert saves == []
+
+    assert saves == [str(path)]
+    assert model_util.loads == ["demo"]
+    assert not jac._BATCH_DEPTH and not jac._BATCH_PENDING
+
+
+def test_batch_skips_save_and_drops_model_on_error(controller, model_util, tmp_path):
+    path = tmp_path / "demo.mph"
+    path.write_bytes(b"v1")
+
+    with pytest.raises(RuntimeError):
+        with controller.batch(str(path)):
+            model = controller._load_model(str(path))
+            model.save = lambda p: pytest.fail("batch should not save after an error")
+            jac._save_model_avoid_lock(model, path)
+            raise RuntimeError("boom")
+
+    controller._load_model(str(path))
+    assert model_util.loads == ["demo", "demo"]
+
+
+def test_debounced_saves_keep_only_the_last_model_per_path(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        jac, "get_settings", lambda: type("S", (), {"comsol_save_debounce_ms": 60_000})()
+    )
+    path = tmp_path / "demo.mph"
+    writes = []
+
+    class _Model:
+        def __init__(self, name):
+            self.name = name
+
+        def save(self, p):
+            writes.append((self.name, p))
+
+    assert jac._save_model_avoid_lock(_Model("first"), path) == path
+    assert jac._save_model_avoid_lock(_Model("second"), path) == path
+    assert writes == []
+
+    jac.flush_pending_saves(path)
+    assert writes == [("second", path.as_posix())]
+    assert not jac._DEBOUNCED_SAVES
+
+
+def test_debounced_flush_keeps_the_model_pending_until_written(
+    controller, model_util, monkeypatch, tmp_path
+):
+    monkeypatch.setattr(
+        jac, "get_settings", lambda: type("S", (), {"comsol_save_debounce_ms": 60_000})()
+    )
+    path = tmp_path / "demo.mph"
+    path.write_bytes(b"v1")
+    model = controller._load_model(str(path))
+    seen = []
+
+    def _save(p):
+        # 写出期间其他线程的失败修改不能丢掉正在写出的内存模型
+        jac._discard_cached_model(path)
+        seen.append(str(path) in jac._DEBOUNCED_SAVES)
+        path.write_bytes(b"v2-saved")
+
+    model.save = _save
+    jac._save_model_avoid_lock(model, path)
+    jac.flush_pending_saves(path)
+
+    assert seen == [True]
+    assert not jac._DEBOUNCED_SAVES
+    assert controller._load_model(str(path)) is model
+    assert model_util.loads == ["demo"]
+
+
+def test_model_cache_evicts_least_recently_used(controller, model_util, tmp_path, monkeypatch):
+    monkeypatch.setattr(jac, "_MODEL_CACHE_MAX", 2)
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.mph").write_bytes(b"x")
+        controller._load_model(str(tmp_path / f"{name}.mph"))
+
+    assert model_util.removed == ["a"]
+    assert list(jac._MODEL_CACHE) == [str(tmp_path / "b.mph"), str(tmp_path / "c.mph")]
+
+
+def test_model_cache_eviction_drops_derived_caches(controller, model_util, tmp_path, monkeypatch):
+    monkeypatch.setattr(jac, "_MODEL_CACHE_MAX", 1)
+    a, b = tmp_path / "a.mph", tmp_path / "b.mph"
+    a.write_bytes(b"x")
+    b.write_bytes(b"x")
+    model_a = controller._load_model(str(a))
+    controller._comp1(model_a)
+    jac._QUERY_CACHE[("list_model_tree", str(a), "stamp", (), ())] = {"status": "success"}
+    assert id(model_a) in jac._MODEL_ACCESSORS
+
+    controller._load_model(str(b))
+    assert model_util.removed == ["a"]
+    assert id(model_a) not in jac._MODEL_ACCESSORS
+    assert not jac._QUERY_CACHE
+
+
+def test_apply_operations_saves_once_and_reports_each_op(controller, monkeypatch, tmp_path):
+    saves = []
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: object())
+    monkeypatch.setattr(
+        jac, "_save_model_avoid_lock", lambda m, dest, **kw: saves.append(dest) or dest
+    )
+    monkeypatch.setattr(
+        controller, "_do_remove_material", lambda m, name: {"removed": name}
+    )
+
+    res = controller.apply_operations(
+        str(tmp_path / "demo.mph"),
+        [
+            {"kind": "remove_material", "args": {"name": "mat1"}},
+            {"kind": "unknown"},
+            {"kind": "remove_material", "args": {"name": "mat2"}},
+        ],
+    )
+
+    assert len(saves) == 1
+    assert res["status"] == "warning"
+    assert [r["status"] for r in res["results"]] == ["success", "error", "success"]
+    assert res["results"][2]["removed"] == "mat2"
+
+
+def test_apply_operations_does_not_save_when_every_op_fails(controller, monkeypatch, tmp_path):
+    saves = []
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: object())
+    monkeypatch.setattr(jac, "_save_model_avoid_lock", lambda *a, **kw: saves.append(a))
+
+    res = controller.set_physics_feature_params_bulk(
+        str(tmp_path / "demo.mph"), [{"physics_tag": "ht"}]
+    )
+
+    assert res["status"] == "error"
+    assert res["results"][0]["kind"] == "set_physics"
+    assert saves == []
+
+
+def test_has_cap_probes_each_type_once(monkeypatch):
+    monkeypatch.setattr(jac, "_CAPS", {})
+    probes = []
+
+    class _Seq:
+        def __getattr__(self, name):
+            probes.append(name)
+            raise AttributeError(name)
+
+        def tags(self):
+            return ["a"]
+
+    assert jac.JavaAPIController._tags_or_names(_Seq()) == ["a"]
+    assert jac.JavaAPIController._tags_or_names(_Seq()) == ["a"]
+    assert probes == ["names"]
+
+
+def test_material_queries_reuse_capability_probes(controller, monkeypatch):
+    monkeypatch.setattr(jac, "_CAPS", {})
+    probes = []
+
+    class _MatSeq:
+        def __getattr__(self, name):
+            probes.append(name)
+            raise AttributeError(name)
+
+        def tags(self):
+            return ["mat1"]
+
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: object())
+    monkeypatch.setattr(controller, "_materials_api", lambda model: _MatSeq())
+
+    assert controller.has_material("demo.mph", "mat1")["exists"] is True
+    assert controller.has_material("demo.mph", "mat2")["exists"] is False
+    assert probes == ["has", "names"]
+
+
+def test_copy_material_properties_copies_exactly_the_defined_properties(controller):
+    reads = []
+
+    class _OldGroup:
+        def properties(self):
+            return ["E", "density", "alpha_custom"]
+
+        def get(self, prop):
+            reads.append(prop)
+            return f"{prop}-value"
+
+    class _NewGroup:
+        def __init__(self):
+            self.values = {}
+
+        def set(self, prop, value):
+            self.values[prop] = value
+
+    new_groups = {}
+
+    class _Feat:
+        def __init__(self, old):
+            self.old = old
+
+        def propertyGroup(self, g):
+            if self.old:
+                return _OldGroup()
+            return new_groups.setdefault(g, _NewGroup())
+
+    controller._copy_material_properties(_Feat(True), _Feat(False))
+
+    assert reads == ["E", "density", "alpha_custom"] * len(jac.MATERIAL_COPY_PROPERTY_GROUPS)
+    assert new_groups["Def"].values == {
+        "E": "E-value",
+        "density": "density-value",
+        "alpha_custom": "alpha_custom-value",
+    }
+
+
+class _LockedOnceModel:
+    """直接保存到目标路径失败、只能写临时文件的假模型。"""
+
+    def __init__(self, dest):
+        self.dest = dest
+
+    def save(self, p):
+        if jac.Path(p) == self.dest:
+            raise RuntimeError("locked")
+        jac.Path(p).write_bytes(b"new")
+
+
+def _winerror_32():
+    err = OSError("in use")
+    err.winerror = 32
+    return err
+
+
+def test_save_retries_replace_with_backoff_when_target_is_locked(monkeypatch, tmp_path):
+    dest = tmp_path / "demo.mph"
+    sleeps = []
+    real_replace = jac.Path.replace
+    failures = [_winerror_32(), _winerror_32()]
+
+    def _replace(self, target):
+        if failures:
+            raise failures.pop()
+        return real_replace(self, target)
+
+    monkeypatch.setattr(jac.Path, "replace", _replace)
+    monkeypatch.setattr("time.sleep", sleeps.append)
+
+    saved = jac._save_model_avoid_lock(_LockedOnceModel(dest), dest)
+
+    assert saved == dest
+    assert dest.read_bytes() == b"new"
+    assert sleeps == list(jac._SAVE_REPLACE_RETRY_DELAYS[:2])
+    assert list(tmp_path.iterdir()) == [dest]
+
+
+def test_save_falls_back_after_retries_are_exhausted(monkeypatch, tmp_path):
+    dest = tmp_path / "demo.mph"
+    sleeps = []
+
+    def _replace(self, target):
+        raise _winerror_32()
+
+    monkeypatch.setattr(jac.Path, "replace", _replace)
+    monkeypatch.setattr("time.sleep", sleeps.append)
+
+    saved = jac._save_model_avoid_lock(_LockedOnceModel(dest), dest)
+
+    assert saved == tmp_path / "demo_updated.mph"
+    assert saved.read_bytes() == b"new"
+    assert sleeps == list(jac._SAVE_REPLACE_RETRY_DELAYS)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["demo_updated.mph"]
+
+
+def test_save_goes_straight_to_fallback_when_target_is_held_open(monkeypatch, tmp_path):
+    dest = tmp_path / "demo.mph"
+    model = _LockedOnceModel(dest)
+    written = []
+    real_save = model.save
+    model.save = lambda p: written.append(jac.Path(p).name) or real_save(p)
+    monkeypatch.setattr(jac, "_file_locked", lambda p: p == dest)
+
+    saved = jac._save_model_avoid_lock(model, dest)
+
+    assert saved == tmp_path / "demo_updated.mph"
+    assert written == ["demo.mph", "demo_updated.mph"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["demo_updated.mph"]
+
+
+def test_save_writes_pid_named_mph_temp_next_to_target(tmp_path):
+    dest = tmp_path / "demo.mph"
+    model = _LockedOnceModel(dest)
+    written = []
+    real_save = model.save
+    model.save = lambda p: written.append(jac.Path(p).name) or real_save(p)
+
+    jac._save_model_avoid_lock(model, dest)
+
+    assert written == ["demo.mph", f"demo.tmp-{os.getpid()}.mph"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["demo.mph"]
+
+
+def test_comsol_tag_maps_are_read_only():
+    assert jac.PHYSICS_TYPE_TO_COMSOL_TAG["heat"] == "HeatTransfer"
+    with pytest.raises(TypeError):
+        jac.STUDY_TYPE_TO_COMSOL_TAG["stationary"] = "Time"
+    with pytest.raises(TypeError):
+        jac.PHYSICS_INTERFACE_NAME_PREFIX["heat"] = "x"
+    assert jac.JavaAPIController._physics_interface_name("structural", 0) == "solid0"
+    assert jac.JavaAPIController._physics_interface_name("magnetic", 2) == "mag2"
+
+
+def test_list_model_tree_is_reused_until_the_file_is_saved(controller, monkeypatch, tmp_path):
+    path = tmp_path / "demo.mph"
+    path.write_bytes(b"v1")
+    loads = []
+    model = object()
+    monkeypatch.setattr(controller, "_load_model", lambda p, **kw: loads.append(p) or model)
+    monkeypatch.setattr(
+        controller, "_collect_model_tree", lambda m, out: out.update(materials=["mat1"])
+    )
+
+    first = controller.list_model_tree(str(path))
+    first["tree"]["materials"].append("mutated")
+    second = controller.list_model_tree(str(path))
+
+    assert len(loads) == 1
+    assert second["tree"]["materials"] == ["mat1"]
+
+    jac._remember_saved_model(model, path)
+    controller.list_model_tree(str(path))
+    assert len(loads) == 2
+
+
+def test_has_node_answers_repeat_paths_from_cache_until_the_file_changes(
+    controller, monkeypatch, tmp_path
+):
+    path = tmp_path / "demo.mph"
+    path.write_bytes(b"v1")
+    queries = []
+
+    class _Model:
+        def hasNode(self, node):
+            queries.append(node)
+            return node == "/physics/ht"
+
+    monkeypatch.setattr(controller, "_load_model", lambda p, **kw: _Model())
+
+    assert controller.has_node(str(path), "/physics/ht")["exists"] is True
+    assert controller.has_node(str(path), "/physics/ht")["exists"] is True
+    assert controller.has_node(str(path), "/physics/solid")["exists"] is False
+    assert queries == ["/physics/ht", "/physics/solid"]
+
+    path.write_bytes(b"v2-longer")
+    controller.has_node(str(path), "/physics/ht")
+    assert queries == ["/physics/ht", "/physics/solid", "/physics/ht"]
+
+    # 保存后时间戳未变（粗粒度 mtime）也不返回旧结果
+    jac._remember_saved_model(object(), path)
+    controller.has_node(str(path), "/physics/ht")
+    assert queries == ["/physics/ht", "/physics/solid", "/physics/ht", "/physics/ht"]
+
+
+def test_jint_array_converts_once_through_cached_array_type(fake_jpype, monkeypatch):
+    built = []
+
+    class _Arr:
+        def __init__(self, values):
+            built.append([int(v) for v in values])
+
+    fake_jpype.JInt = "int"
+    fake_jpype.JArray = lambda t: _Arr
+    monkeypatch.setattr(comsol_runner, "_JIntArray", None)
+
+    comsol_runner._jint_array([1, 2, 3])
+    comsol_runner._jint_array((4,))
+
+    assert built == [[1, 2, 3], [4]]
+
+
+def test_jint_array_falls_back_to_list_without_jpype(monkeypatch):
+    def _missing():
+        raise RuntimeError("no jpype")
+
+    monkeypatch.setattr(comsol_runner, "_jpype", _missing)
+    monkeypatch.setattr(comsol_runner, "_JIntArray", None)
+    assert comsol_runner._jint_array((1, 2)) == [1, 2]
+
+
+def test_java_value_wraps_numeric_sequences_only(fake_jpype, monkeypatch):
+    class _Arr:
+        def __init__(self, kind, values):
+            self.kind = kind
+            self.values = [float(v) for v in values]
+
+    fake_jpype.JInt, fake_jpype.JDouble = "int", "double"
+    fake_jpype.JArray = lambda t: lambda values: _Arr(t, values)
+    monkeypatch.setattr(comsol_runner, "_JIntArray", None)
+    monkeypatch.setattr(comsol_runner, "_JDoubleArray", None)
+
+    ints, doubles = comsol_runner._java_value([1, 2]), comsol_runner._java_value((0, 0, -9.81))
+    assert (ints.kind, ints.values) == ("int", [1.0, 2.0])
+    assert (doubles.kind, doubles.values) == ("double", [0.0, 0.0, -9.81])
+    for value in ("200[GPa]", 7850, [], ["a", "b"], [True, False]):
+        assert comsol_runner._java_value(value) == value
+
+
+def test_material_accessor_is_resolved_once_per_model(controller, monkeypatch):
+    probes = []
+
+    class _Model:
+        def component(self, *args):
+            probes.append("component")
+            return []
+
+        def materials(self, *args):
+            return ("feature", args) if args else "seq"
+
+    monkeypatch.setattr(controller, "_node_list_has", lambda seq, tag: False)
+    model = _Model()
+
+    assert controller._materials_api(model) == "seq"
+    assert controller._material_feature(model, "mat1") == ("feature", ("mat1",))
+    assert controller._materials_api(model) == "seq"
+    assert probes == ["component"]
+
+
+def test_root_materials_accessor_is_picked_once_per_model_class():
+    class _Model:
+        def material(self, *args):
+            return "seq"
+
+    jac._pick_materials_accessor.cache_clear()
+    assert jac._pick_materials_accessor(_Model) == "material"
+    assert jac._pick_materials_accessor(_Model) == "material"
+    assert jac._pick_materials_accessor(object) is None
+    assert jac._pick_materials_accessor.cache_info().hits == 1
+
+
+def test_comp1_probe_is_shared_across_geometry_queries(controller, monkeypatch):
+    probes = []
+
+    class _Comp:
+        def geom(self, *args):
+            return type("Geoms", (), {"tags": lambda self: ["geom1"]})()
+
+    class _Model:
+        def component(self, *args):
+            probes.append(args)
+            return _Comp() if args else ["comp1"]
+
+    model = _Model()
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: model)
+    monkeypatch.setattr(controller, "_node_list_has", lambda seq, tag: tag in seq)
+
+    assert controller.list_geometry_tags("demo.mph")["tags"] == ["geom1"]
+    assert controller.list_geometry_tags("demo.mph")["tags"] == ["geom1"]
+    assert probes == [(), ("comp1",)]
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_collect_model_tree_fills_every_bucket(controller, monkeypatch, parallel):
+    class _Seq:
+        def __init__(self, *tags):
+            self._tags = list(tags)
+
+        def tags(self):
+            return self._tags
+
+    class _Model:
+        def component(self, *args):
+            return []
+
+        def materials(self):
+            return _Seq("mat1")
+
+        def study(self):
+            return _Seq("std1")
+
+        def mesh(self):
+            return _Seq("mesh1")
+
+        def geom(self):
+            return _Seq("geom1")
+
+        def result(self):
+            return _Seq("pg1")
+
+        def physics(self):
+            return _Seq("ht")
+
+    monkeypatch.setattr(controller.settings, "comsol_parallel_tree_queries", parallel)
+    out = {}
+    controller._collect_model_tree(_Model(), out)
+
+    assert out == {
+        "materials": ["mat1"],
+        "physics": ["ht"],
+        "studies": ["std1"],
+        "meshes": ["mesh1"],
+        "geometries": ["geom1"],
+        "results": ["pg1"],
+    }
+
+
+def test_update_material_writes_each_property_once_through_group(controller, monkeypatch):
+    writes = []
+
+    class _Group:
+        def set(self, key, value):
+            writes.append((key, value))
+
+    class _Feat:
+        def propertyGroup(self, group):
+            writes.append(("group", group))
+            return _Group()
+
+    monkeypatch.setattr(controller, "_material_feature", lambda m, name: _Feat())
+    res = controller._do_update_material(object(), "mat1", {"density": 1, "E": 2}, "def")
+
+    assert res["material"] == "mat1"
+    assert writes == [("group", "Def"), ("rho", 1), ("E", 2)]
+
+
+def test_tags_contain_stops_at_first_match_without_copy():
+    seen = []
+
+    class _Tags:
+        def __iter__(self):
+            for tag in ("mat1", "mat2", "mat3"):
+                seen.append(tag)
+                yield tag
+
+    class _Seq:
+        def tags(self):
+            return _Tags()
+
+    assert jac.JavaAPIController._tags_contain(_Seq(), "mat2") is True
+    assert seen == ["mat1", "mat2"]
+    assert jac.JavaAPIController._tags_or_names(_Seq()) == ["mat1", "mat2", "mat3"]
+    assert jac.JavaAPIController._tags_contain(object(), "mat1") is False
+
+
+def test_set_properties_batch_uses_array_overload_then_caches_fallback():
+    class _BatchGroup:
+        def __init__(self):
+            self.calls = []
+
+        def set(self, keys, vals):
+            self.calls.append((list(keys), list(vals)))
+
+    class _ScalarGroup:
+        def __init__(self):
+            self.calls = []
+
+        def set(self, prop, value):
+            if not isinstance(prop, str):
+                raise TypeError("no String[] overload")
+            self.calls.append((prop, value))
+
+    batch = _BatchGroup()
+    jac.JavaAPIController._set_properties_batch(batch, {"E": 2, "nu": "0.3"})
+    assert batch.calls == [(["E", "nu"], ["2", "0.3"])]
+
+    first, second = _ScalarGroup(), _ScalarGroup()
+    jac.JavaAPIController._set_properties_batch(first, {"E": 2})
+    jac.JavaAPIController._set_properties_batch(second, {"E": 3})
+    assert first.calls == [("E", 2)]
+    assert second.calls == [("E", 3)]
+    assert jac._CAPS[(_ScalarGroup, "set(String[],String[])")] is False
+
+
+def test_unused_name_lookup_reuses_caller_name_set(controller, monkeypatch):
+    monkeypatch.setattr(
+        controller, "_materials_api", lambda model: pytest.fail("tags fetched again")
+    )
+    used = {"mat1"}
+
+    assert controller._find_unused_material_name(object(), "mat1", used) == "mat11"
+    assert controller._find_unused_material_name(object(), "mat1", used) == "mat12"
+    assert used == {"mat1", "mat11", "mat12"}
+
+
+@pytest.mark.parametrize(
+    "existing, base, expected",
+    [
+        ({"steel"}, "steel", "steel_1"),
+        ({"steel", "steel_1", "steel_7", "steel_x"}, "steel", "steel_8"),
+        ({"mat1", "mat13"}, "mat1", "mat14"),
+        (set(), "mat1", "mat1"),
+    ],
+)
+def test_pick_unused_material_name_uses_max_suffix(existing, base, expected):
+    assert jac.JavaAPIController._pick_unused_material_name(existing, base) == expected
+
+
+def test_java_strings_joins_string_arrays_in_one_call(fake_jpype, monkeypatch):
+    joins = []
+
+    class _JArray(list):
+        pass
+
+    class _String:
+        @staticmethod
+        def join(sep, values):
+            joins.append(len(values))
+            return sep.join(values)
+
+    fake_jpype.JArray = _JArray
+    fake_jpype.JClass = lambda name: _String
+    monkeypatch.setattr(jac, "_JavaString", None)
+
+    assert jac._java_strings(_JArray(["mat1", "mat2"])) == ["mat1", "mat2"]
+    assert jac._java_strings(_JArray()) == []
+    assert jac._java_strings(("a", 1)) == ["a", "1"]
+    assert joins == [2]
+
+
+def test_bulk_set_only_disables_batching_when_overload_is_missing():
+    class _Feat:
+        def __init__(self, error=None):
+            self.error = error
+            self.calls = []
+
+        def set(self, keys, vals):
+            self.calls.append((list(keys), list(vals)))
+            if self.error is not None:
+                raise self.error
+
+    key = (_Feat, "set(String[],String[])")
+    assert jac._bulk_set(_Feat(RuntimeError("unknown property")), {"a": 1}) is False
+    assert key not in jac._CAPS
+    assert jac._bulk_set(_Feat(), {"a": [1, 2]}) is False
+
+    feat = _Feat()
+    assert jac._bulk_set(feat, {"a": 1, "b": "x"}) is True
+    assert feat.calls == [(["a", "b"], ["1", "x"])]
+
+    assert jac._bulk_set(_Feat(TypeError("no overload")), {"a": 1}) is False
+    assert jac._CAPS[key] is False
+    assert jac._bulk_set(feat, {"a": 1}) is False
+
+
+def test_export_many_loads_and_saves_once_with_distinct_tags(controller, monkeypatch, tmp_path):
+    loads, saves, created, runs = [], [], [], []
+
+    class _Export:
+        def __init__(self, tag):
+            self.tag = tag
+
+        def set(self, key, value):
+            pass
+
+        def run(self):
+            runs.append(self.tag)
+
+    class _ExportList:
+        def __init__(self):
+            self.nodes = {}
+
+        def tags(self):
+            return list(self.nodes)
+
+        def create(self, tag, kind):
+            created.append((tag, kind))
+            self.nodes[tag] = _Export(tag)
+
+        def __call__(self, tag):
+            return self.nodes[tag]
+
+    exports = _ExportList()
+
+    class _Result:
+        def export(self):
+            return exports
+
+    class _Model:
+        def result(self):
+            return _Result()
+
+    model = _Model()
+    monkeypatch.setattr(controller, "_load_model", lambda p, **kw: loads.append(p) or model)
+    monkeypatch.setattr(jac, "_save_model_avoid_lock", lambda m, dest, **kw: saves.append(dest))
+
+    res = controller.export_many(
+        str(tmp_path / "demo.mph"),
+        [
+            {"kind": "image", "plot_group_tag": "pg1", "out_path": str(tmp_path / "a.png")},
+            {"kind": "image", "plot_group_tag": "pg2", "out_path": str(tmp_path / "b.png")},
+            {"kind": "data", "dataset_or_plot_tag": "dset1", "out_path": str(tmp_path / "c.txt")},
+        ],
+    )
+
+    assert res["status"] == "success"
+    assert len(loads) == 1 and len(saves) == 1
+    assert created == [("img1", "Image"), ("img2", "Image"), ("data1", "Data")]
+    assert runs == ["img1", "img2", "data1"]
+
+
+def test_start_mesh_runs_in_background_and_reports_status(controller, monkeypatch, tmp_path):
+    import threading
+
+    release = threading.Event()
+    saves = []
+    monkeypatch.setattr(controller, "_load_model", lambda p, **kw: object())
+    monkeypatch.setattr(controller, "_generate_mesh_direct", lambda m, params: release.wait(5))
+    monkeypatch.setattr(jac, "_save_model_avoid_lock", lambda m, dest: saves.append(dest) or dest)
+    monkeypatch.setattr(
+        controller, "mesh_stats", lambda p, tag: {"num_vertex": 4, "num_elem": 2}
+    )
+    path = str(tmp_path / "demo.mph")
+
+    assert controller.mesh_status(path)["status"] == "error"
+    assert controller.start_mesh(path)["running"] is True
+    assert controller.mesh_status(path)["running"] is True
+    assert controller.start_mesh(path)["message"] == "网格任务仍在运行"
+
+    release.set()
+    controller._mesh_jobs[str(jac._absolute_path(path))]["thread"].join(5)
+    status = controller.mesh_status(path)
+
+    assert status["running"] is False
+    assert status["num_elem"] == 2
+    assert saves == [jac._absolute_path(path)]
+
+
+def test_model_with_running_mesh_job_is_not_evicted(
+    controller, model_util, monkeypatch, tmp_path
+):
+    import threading
+
+    release = threading.Event()
+    monkeypatch.setattr(controller, "_generate_mesh_direct", lambda m, params: release.wait(5))
+    monkeypatch.setattr(jac, "_save_model_avoid_lock", lambda m, dest: dest)
+    path = tmp_path / "busy.mph"
+    path.write_bytes(b"v1")
+    controller.start_mesh(str(path))
+    busy = jac._MODEL_CACHE[str(path)][2]
+
+    for i in range(jac._MODEL_CACHE_MAX + 1):
+        other = tmp_path / f"m{i}.mph"
+        other.write_bytes(b"v1")
+        controller._load_model(str(other))
+    jac._discard_cached_model(str(path))
+
+    assert "busy" not in model_util.removed
+    # 任务结束前前台调用不与后台线程同时使用模型
+    with pytest.raises(RuntimeError, match="后台划分网格"):
+        controller._load_model(str(path))
+    assert controller.list_model_tree(str(path))["status"] == "error"
+    release.set()
+    controller._mesh_jobs[str(path)]["thread"].join(5)
+    assert not jac._MODEL_PINS
+    assert controller._load_model(str(path)) is busy
+
+
+def test_physics_api_prefers_cached_component(controller, monkeypatch):
+    class _Comp:
+        def physics(self, *args):
+            return ("comp", args)
+
+    class _Components:
+        def has(self, tag):
+            return tag == "comp1"
+
+    class _Model:
+        def component(self, *args):
+            return _Comp() if args else _Components()
+
+        def physics(self, *args):
+            return ("root", args)
+
+    model = _Model()
+    assert controller._physics_api(model) == ("comp", ())
+    assert controller._physics_feature(model, "ht") == ("comp", ("ht",))
+    assert controller._component(model) is controller._comp1(model)
+    bare = object()
+    assert controller._component(bare) is bare
+
+
+def test_export_target_creates_each_directory_once(tmp_path, monkeypatch):
+    made = []
+    real_mkdir = jac.Path.mkdir
+
+    def _mkdir(self, *args, **kwargs):
+        made.append(self)
+        return real_mkdir(self, *args, **kwargs)
+
+    monkeypatch.setattr(jac.Path, "mkdir", _mkdir)
+    jac._ensure_dir.cache_clear()
+
+    first = jac._export_target(tmp_path / "out" / "a.png")
+    jac._export_target(tmp_path / "out" / "b.png")
+
+    assert first == str(tmp_path / "out" / "a.png")
+    assert made == [tmp_path / "out"]
+    assert (tmp_path / "out").is_dir()
+
+
+def test_set_params_lenient_drops_unknown_keys_before_writing():
+    class _Feat:
+        def __init__(self, known):
+            self.known = known
+            self.writes = []
+
+        def properties(self):
+            return self.known
+
+        def set(self, key, value):
+            if not isinstance(key, str):
+                raise TypeError("no String[] overload")
+            if key not in self.known:
+                raise RuntimeError(f"unknown property {key}")
+            self.writes.append((key, value))
+
+    feat = _Feat(["hmax", "hmin"])
+    jac._set_params_lenient(feat, {"hmax": 1, "bogus": 2, "hmin": 0.5})
+    assert feat.writes == [("hmax", 1), ("hmin", 0.5)]
+
+    jac._set_params_lenient(feat, {})
+    assert feat.writes == [("hmax", 1), ("hmin", 0.5)]
+
+
+def test_build_geom_and_mesh_saves_once(controller, monkeypatch, tmp_path):
+    steps = []
+    monkeypatch.setattr(controller, "_load_model", lambda p, **kw: steps.append("load") or object())
+    monkeypatch.setattr(controller, "_ensure_geometry_built", lambda m: steps.append("geom"))
+    monkeypatch.setattr(controller, "_generate_mesh_direct", lambda m, p: steps.append("mesh"))
+    monkeypatch.setattr(
+        jac, "_save_model_avoid_lock", lambda m, dest: steps.append("save") or dest
+    )
+
+    res = controller.build_geom_and_mesh(str(tmp_path / "demo.mph"), {"hauto": 3})
+
+    assert res["status"] == "success"
+    assert steps == ["load", "geom", "mesh", "save"]
+
+
+def test_next_tag_continues_after_highest_suffix():
+    assert jac._next_tag([], "imp") == "imp1"
+    assert jac._next_tag(["imp1", "imp3", "fin", "impx"], "imp") == "imp4"
+
+
+def test_async_controller_runs_methods_off_the_event_loop(controller, monkeypatch):
+    import asyncio
+    import threading
+
+    seen = []
+    monkeypatch.setattr(
+        controller, "has_node", lambda path, node: seen.append(threading.get_ident()) or node
+    )
+    facade = jac.AsyncJavaAPIController(controller)
+
+    assert asyncio.run(facade.has_node("demo.mph", "/physics/ht")) == "/physics/ht"
+    assert seen and seen[0] != threading.get_ident()
+    with pytest.raises(AttributeError):
+        facade.batch
+    with pytest.raises(AttributeError):
+        facade._load_model
+
+
+def test_async_controllers_share_one_call_lock(controller, monkeypatch):
+    import asyncio
+    import threading
+
+    active = []
+    overlaps = []
+
+    def _query(path, node):
+        active.append(node)
+        overlaps.append(len(active))
+        threading.Event().wait(0.02)
+        active.remove(node)
+        return node
+
+    monkeypatch.setattr(controller, "has_node", _query)
+    first = jac.AsyncJavaAPIController(controller)
+    second = jac.AsyncJavaAPIController(controller)
+
+    async def _both():
+        return await asyncio.gather(first.has_node("a.mph", "/a"), second.has_node("b.mph", "/b"))
+
+    assert asyncio.run(_both()) == ["/a", "/b"]
+    assert overlaps == [1, 1]
+
+
+def test_decimate_mesh_file_uses_pymeshlab_and_reuses_result(monkeypatch, tmp_path):
+    import sys
+    import types
+
+    calls = []
+
+    class _Mesh:
+        def face_number(self):
+            return 150000
+
+    class _MeshSet:
+        def load_new_mesh(self, path):
+            calls.append(("load", path))
+
+        def meshing_remove_duplicate_vertices(self):
+            calls.append("dedup")
+
+        def current_mesh(self):
+            return _Mesh()
+
+        def meshing_decimation_quadric_edge_collapse(self, targetfacenum, preservenormal):
+            calls.append(("decimate", targetfacenum))
+
+        def apply_coord_laplacian_smoothing(self, stepsmoothnum):
+            calls.append("smooth")
+
+        def save_current_mesh(self, path):
+            calls.append("save")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("solid decimated")
+
+    monkeypatch.setitem(sys.modules, "pymeshlab", types.SimpleNamespace(MeshSet=_MeshSet))
+    src = tmp_path / "part.stl"
+    src.write_text("solid part", encoding="utf-8")
+
+    out = jac._decimate_mesh_file(src, 70000)
+    assert out == tmp_path / "part.decimated-70000.stl"
+    assert out.read_text(encoding="utf-8") == "solid decimated"
+    assert ("decimate", 70000) in calls and "smooth" in calls
+    calls.clear()
+    assert jac._decimate_mesh_file(src, 70000) == out
+    assert calls == []
+
+
+class _ArrayMesh:
+    def getVertex(self):
+        return [[0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]]
+
+    def getTypes(self):
+        return ["vtx", "tet"]
+
+    def getElem(self, etype):
+        return [[0], [1], [2], [3]] if etype == "tet" else []
+
+
+class _ArrayMeshList:
+    def has(self, tag):
+        return tag == "mesh1"
+
+    def get(self, tag):
+        return _ArrayMesh()
+
+
+def test_mesh_arrays_returns_row_major_numpy_blocks(controller, monkeypatch):
+    np = pytest.importorskip("numpy")
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: object())
+    monkeypatch.setattr(controller, "_mesh_api", lambda model: _ArrayMeshList())
+
+    out = controller.mesh_arrays("demo.mph")
+    assert out["status"] == "success"
+    assert out["vertex"].shape == (4, 3) and out["vertex"].dtype == np.float64
+    assert list(out["vertex"][1]) == [1.0, 0.0, 0.0]
+    assert list(out["elements"]) == ["tet"]
+    assert out["elements"]["tet"].tolist() == [[0, 1, 2, 3]]
+
+
+def test_mesh_arrays_reports_missing_numpy(controller, monkeypatch):
+    import sys
+
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    out = controller.mesh_arrays("demo.mph")
+    assert out["status"] == "error" and "numpy" in out["message"]
+
+
+def test_set_parameter_direct_accepts_dict_and_resolves_param_once(controller):
+    class _Param:
+        def __init__(self):
+            self.calls = []
+
+        def set(self, name, value):
+            if not isinstance(name, str):
+                raise TypeError("no array overload")
+            self.calls.append((name, value))
+
+    class _Model:
+        def __init__(self):
+            self.param_calls = 0
+            self._param = _Param()
+
+        def param(self):
+            self.param_calls += 1
+            return self._param
+
+    model = _Model()
+    out = controller._set_parameter_direct(model, {"params": {"L": "2[m]", "T0": 300}})
+    assert out == {"parameters": {"L": "2[m]", "T0": 300}}
+    assert model.param_calls == 1
+    assert model._param.calls == [("L", "2[m]"), ("T0", 300)]
+
+
+def test_export_model_preview_reuses_scratch_slot(controller, monkeypatch, tmp_path):
+    model_path = tmp_path / "demo.mph"
+    model_path.write_text("dummy", encoding="utf-8")
+    written = []
+
+    class _Image:
+        def __init__(self, fail):
+            self.props, self.fail = {}, fail
+
+        def set(self, key, value):
+            self.props[key] = value
+
+        def export(self):
+            png = self.props["pngfilename"]
+            written.append(png)
+            with open(png, "wb") as f:
+                f.write(b"\x89PNG")
+            if self.fail:
+                raise RuntimeError("render failed")
+
+    class _Geom:
+        fail = False
+
+        def image(self):
+            return _Image(self.fail)
+
+    geom = _Geom()
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: object())
+    monkeypatch.setattr(controller, "_geom_for_export", lambda model: geom)
+    monkeypatch.setattr(jac, "_scratch_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(jac, "_PREVIEW_SLOTS", {})
+    monkeypatch.setattr(jac, "_PREVIEW_FILES", jac.OrderedDict())
+
+    out = controller.export_model_preview(str(model_path))
+    assert out["status"] == "success" and out["image_base64"] == "iVBORw=="
+    assert out["mime"] == "image/png"
+    assert out["image_size"] == 4 and len(out["image_sha256"]) == 64
+    raw = controller.export_model_preview(str(model_path), encoding="raw")
+    assert raw["image_bytes"] == b"\x89PNG" and "image_base64" not in raw
+    assert raw["image_sha256"] == out["image_sha256"]
+    by_path = controller.export_model_preview(str(model_path), encoding="path")
+    image_path = by_path["image_path"]
+    assert "image_base64" not in by_path and image_path.endswith(".png")
+    assert open(image_path, "rb").read() == b"\x89PNG"
+    again = controller.export_model_preview(str(model_path), encoding="path")
+    assert again["image_path"] == image_path
+    assert len(written) == 1  # 同一文件同一尺寸命中预览缓存，不再渲染
+    geom.fail = True
+    model_path.write_text("changed", encoding="utf-8")
+    out = controller.export_model_preview(str(model_path))
+    assert out["status"] == "error"
+    assert len(written) == 2 and written[0] == written[1]
+    jac._remove_preview_slots()
+    assert not os.path.exists(written[0]) and not os.path.exists(image_path)
+
+
+def test_compact_preview_prefers_smaller_webp(monkeypatch):
+    import sys
+    import types
+
+    class _Img:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def save(self, buf, format, quality, method):
+            buf.write(b"RIFFwebp")
+
+    fake_image = types.SimpleNamespace(open=lambda fp: _Img())
+    monkeypatch.setitem(sys.modules, "PIL", types.SimpleNamespace(Image=fake_image))
+    monkeypatch.setitem(sys.modules, "PIL.Image", fake_image)
+    png = b"\x89PNG" + b"\0" * 64
+    assert jac._compact_preview(png) == (b"RIFFwebp", "image/webp")
+    assert jac._compact_preview(b"\x89PNG") == (b"\x89PNG", "image/png")
+
+
+def test_execute_direct_skips_save_when_parameter_unchanged(controller, monkeypatch):
+    class _Param:
+        def __init__(self):
+            self.values = {"L": "2[m]"}
+
+        def get(self, name):
+            return self.values.get(name)
+
+        def set(self, name, value):
+            self.values[name] = value
+
+    model = type("Model", (), {})()
+    model._param = _Param()
+    model.param = lambda: model._param
+    saves = []
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: model)
+    monkeypatch.setattr(jac, "_save_model_avoid_lock", lambda m, dest: saves.append(dest) or dest)
+
+    out = controller.execute_direct("set_parameter", "demo.mph", {"name": "L", "value": "2[m]"})
+    assert out["status"] == "success" and "dirty" not in out["result"]
+    assert saves == []
+    controller.execute_direct("set_parameter", "demo.mph", {"name": "L", "value": "3[m]"})
+    assert model._param.values["L"] == "3[m]"
+    assert len(saves) == 1
+
+    ops = [
+        {"operation": "set_parameter", "parameters": {"name": "L", "value": "4[m]"}},
+        {"operation": "set_parameter", "parameters": {"name": "W", "value": "1[m]"}},
+        {"operation": "no_such_op"},
+    ]
+    out = controller.execute_direct_batch("demo.mph", ops)
+    assert out["status"] == "warning"
+    assert [r["status"] for r in out["results"]] == ["success", "success", "error"]
+    assert model._param.values == {"L": "4[m]", "W": "1[m]"}
+    assert len(saves) == 2
+
+
+def test_geom_for_export_prefers_component_then_model_root(controller):
+    class _Geoms:
+        def __init__(self, tags):
+            self._tags = tags
+
+        def has(self, tag):
+            return tag in self._tags
+
+    class _Scope:
+        def __init__(self, tags):
+            self._geoms = _Geoms(tags)
+
+        def geom(self, tag=None):
+            return self._geoms if tag is None else ("geom", self, tag)
+
+    comp = _Scope(["geom1"])
+    model = _Scope(["geom1"])
+    model.component = lambda tag=None: _Components() if tag is None else comp
+
+    class _Components:
+        def has(self, tag):
+            return tag == "comp1"
+
+    assert controller._geom_for_export(model) == ("geom", comp, "geom1")
+    comp._geoms._tags = []
+    jac.clear_model_cache()
+    assert controller._geom_for_export(model) == ("geom", model, "geom1")
+    model._geoms._tags = []
+    assert controller._geom_for_export(model) is None
+
+
+def test_solve_run_all_reports_each_study_and_saves_once(controller, monkeypatch):
+    runs = []
+
+    class _Study:
+        def __init__(self, tag):
+            self.tag = tag
+
+        def run(self):
+            runs.append(self.tag)
+
+    class _Studies:
+        def tags(self):
+            return ["std1", "std2"]
+
+    model = type("Model", (), {})()
+    model.study = lambda tag=None: _Studies() if tag is None else _Study(tag)
+    saves = []
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: model)
+    monkeypatch.setattr(
+        jac, "_save_model_avoid_lock", lambda m, dest, **kw: saves.append(dest) or dest
+    )
+
+    def _fallback(m, study):
+        raise RuntimeError("solver failed")
+
+    monkeypatch.setattr(controller, "_run_stationary_direct_solver", _fallback)
+    out = controller.solve("demo.mph", run_all=True)
+    assert out["status"] == "success"
+    assert out["result"]["studies"] == {"std1": "success", "std2": "success"}
+    assert runs == ["std1", "std2"] and len(saves) == 1
+
+    out = controller.solve("demo.mph", study_tag="std1")
+    assert out["result"] == {"study": "std1"} and runs[-1] == "std1"
+
+
+def test_execute_direct_set_parameters_uses_one_array_call(controller, monkeypatch):
+    class _Param:
+        def __init__(self):
+            self.calls = []
+
+        def get(self, name):
+            return {"L": "2[m]"}.get(name)
+
+        def set(self, names, values):
+            self.calls.append((list(names), list(values)))
+
+    model = type("Model", (), {})()
+    model._param = _Param()
+    model.param = lambda: model._param
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: model)
+    monkeypatch.setattr(jac, "_save_model_avoid_lock", lambda m, dest: dest)
+
+    out = controller.execute_direct(
+        "set_parameters", "demo.mph", {"params": {"L": "2[m]", "W": "1[m]", "T0": 300}}
+    )
+    assert out["status"] == "success"
+    assert model._param.calls == [(["W", "T0"], ["1[m]", "300"])]
+
+
+def test_render_preview_sets_image_properties_in_one_call(controller, monkeypatch, tmp_path):
+    calls = []
+
+    class _BulkImage:
+        def set(self, names, values):
+            calls.append((list(names), list(values)))
+            self.png = list(values)[0]
+
+        def export(self):
+            with open(self.png, "wb") as f:
+                f.write(b"\x89PNG")
+
+    geom = type("Geom", (), {"image": lambda self: _BulkImage()})()
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: object())
+    monkeypatch.setattr(controller, "_geom_for_export", lambda model: geom)
+    monkeypatch.setattr(jac, "_scratch_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(jac, "_PREVIEW_SLOTS", {})
+
+    assert controller._render_preview("demo.mph", 320, 240) == (b"\x89PNG", "image/png")
+    assert len(calls) == 1
+    assert calls[0][0] == ["pngfilename", "width", "height"] and calls[0][1][1:] == ["320", "240"]
+
+
+def test_validate_execution_rejects_truncated_mph(controller, monkeypatch, tmp_path):
+    import zipfile
+
+    good = tmp_path / "good.mph"
+    with zipfile.ZipFile(good, "w") as zf:
+        zf.writestr("model.xml", "<model/>" * 100)
+    truncated = tmp_path / "cut.mph"
+    truncated.write_bytes(good.read_bytes()[:60])
+    trees = []
+    monkeypatch.setattr(
+        controller,
+        "list_model_tree",
+        lambda path: trees.append(path) or {"status": "success", "tree": {}},
+    )
+
+    assert controller.validate_execution(str(truncated), {})["status"] == "error"
+    assert controller.validate_execution(str(good), {})["status"] == "success"
+    assert str(good) in jac._MPH_CHECKED
+    assert controller.validate_execution(str(tmp_path / "missing.mph"), {})["message"] == "模型文件不存在"
+    assert len(trees) == 1
+
+
+def test_solve_error_message_keeps_only_first_line(controller, monkeypatch):
+    def _boom(path, readonly=False):
+        raise RuntimeError(
+            "com.comsol.util.exceptions.FlException: Singular matrix\n\tat a.b(C.java:1)"
+        )
+
+    monkeypatch.setattr(controller, "_load_model", _boom)
+    out = controller.solve("demo.mph")
+    assert out == {
+        "status": "error",
+        "message": "com.comsol.util.exceptions.FlException: Singular matrix",
+    }
+
+
+def test_render_preview_rejects_stale_slot_content(controller, monkeypatch, tmp_path):
+    class _SilentImage:
+        def set(self, *args):
+            pass
+
+        def export(self):
+            pass  # 未写出文件：不能把上一次残留的预览当作本次结果
+
+    geom = type("Geom", (), {"image": lambda self: _SilentImage()})()
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: object())
+    monkeypatch.setattr(controller, "_geom_for_export", lambda model: geom)
+    monkeypatch.setattr(jac, "_scratch_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(jac, "_PREVIEW_SLOTS", {})
+    jac._preview_slot().write_bytes(b"\x89PNG old")
+
+    with pytest.raises(RuntimeError, match="未生成预览图"):
+        controller._render_preview("demo.mph", 640, 480)
+
+
+def test_same_named_models_in_different_dirs_stay_cached(controller, model_util, tmp_path):
+    a, b = tmp_path / "a" / "demo.mph", tmp_path / "b" / "demo.mph"
+    for p in (a, b):
+        p.parent.mkdir()
+        p.write_bytes(b"x")
+    first = controller._load_model(str(a))
+    second = controller._load_model(str(b))
+    assert controller._load_model(str(a)) is first
+    assert controller._load_model(str(b)) is second
+    assert len(model_util.loads) == 2
+    assert model_util.loads[0] == "demo" and model_util.loads[1].startswith("demo_")
+
+
+def test_model_tag_stays_stable_per_path(controller, model_util, tmp_path):
+    x, y = tmp_path / "x" / "m.mph", tmp_path / "y" / "m.mph"
+    for p in (x, y):
+        p.parent.mkdir()
+        p.write_bytes(b"v1")
+    controller._load_model(str(x))
+    controller._load_model(str(y))
+    y_tag = model_util.loads[1]
+    assert model_util.loads[0] == "m" and y_tag.startswith("m_")
+
+    jac._discard_cached_model(str(x))
+    y.write_bytes(b"version2")
+    controller._load_model(str(y))
+    controller._load_model(str(x))
+    assert model_util.loads[2:] == [y_tag, "m"]
+    assert model_util.removed == []
+
+
+def test_apply_operations_covers_physics_and_parameter_ops(controller, monkeypatch):
+    class _Feature:
+        def __init__(self):
+            self.renamed = None
+
+        def name(self, new):
+            self.renamed = new
+
+    class _Physics:
+        def __init__(self):
+            self.cleared = False
+
+        def has(self, tag):
+            return tag == "ht"
+
+        def clear(self):
+            self.cleared = True
+
+    physics, feature = _Physics(), _Feature()
+    param_calls = []
+    model = type("Model", (), {})()
+    model.param = lambda: type("P", (), {"set": lambda self, k, v: param_calls.append(k)})()
+    saves = []
+    monkeypatch.setattr(controller, "_load_model", lambda path, **kw: model)
+    monkeypatch.setattr(controller, "_physics_api", lambda m: physics)
+    monkeypatch.setattr(controller, "_physics_feature", lambda m, tag: feature)
+    monkeypatch.setattr(
+        jac, "_save_model_avoid_lock", lambda m, dest, **kw: saves.append(dest) or dest
+    )
+
+    res = controller.apply_operations(
+        "demo.mph",
+        [
+            {"kind": "rename_physics", "args": {"old_name": "ht", "new_name": "ht2"}},
+            {"kind": "rename_physics", "args": {"old_name": "missing", "new_name": "x"}},
+            {"kind": "set_parameters", "args": {"params": {"L": "1[m]"}}},
+            {"kind": "clear_physics"},
+        ],
+    )
+    assert [r["status"] for r in res["results"]] == ["success", "error", "success", "success"]
+    assert feature.renamed == "ht2" and physics.cleared and param_calls == [["L"]]
+    assert len(saves) == 1
+
+
+def test_aliased_property_remembers_accepted_name_per_node_type(monkeypatch):
+    monkeypatch.setattr(jac, "_PROPERTY_NAME_FORMS", {})
+    attempts = []
+
+    class _Group:
+        def set(self, name, value):
+            attempts.append(name)
+            if name == "rho":
+                raise RuntimeError("Unknown property rho")
+
+    jac._set_aliased_property(_Group(), _Group().set, "density", "7850")
+    jac._set_aliased_property(_Group(), _Group().set, "density", "2700")
+
+    assert attempts == ["rho", "density", "density"]
+
+
+def test_read_queries_are_cached_until_the_file_changes(controller, monkeypatch, tmp_path):
+    path = tmp_path / "demo.mph"
+    path.write_bytes(b"v1")
+    loads = []
+
+    class _MatSeq:
+        def tags(self):
+            return ["mat1"]
+
+    monkeypatch.setattr(controller, "_load_model", lambda p, **kw: loads.append(p))
+    monkeypatch.setattr(controller, "_materials_api", lambda model: _MatSeq())
+
+    first = controller.list_material_tags(str(path))
+    first["tags"].append("mutated")
+    assert controller.list_material_tags(model_path=str(path))["tags"] == ["mat1"]
+    assert controller.list_material_tags(str(path))["tags"] == ["mat1"]
+    assert controller.has_material(str(path), "mat1")["exists"] is True
+    assert len(loads) == 2
+
+    path.write_bytes(b"version2")
+    controller.list_material_tags(str(path))
+    assert len(loads) == 3
+
+
+def test_concurrent_saves_to_one_target_are_serialized(tmp_path):
+    import threading
+    import time
+
+    dest = tmp_path / "demo.mph"
+    active, overlaps = [], []
+
+    class _SlowModel:
+        def save(self, p):
+            active.append(p)
+            if len(active) > 1:
+                overlaps.append(p)
+            time.sleep(0.01)
+            jac.Path(p).write_bytes(b"new")
+            active.remove(p)
+
+    threads = [
+        threading.Thread(target=jac._write_model_avoid_lock, args=(_SlowModel(), dest))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert overlaps == []
+    assert dest.read_bytes() == b"new"